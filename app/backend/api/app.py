@@ -1,8 +1,12 @@
 from fastapi import FastAPI
-from api.routes import lessons, sessions, detections
+from api.routes import lessons, sessions, detections, progress
+from api import metrics
+from db import engine, async_engine
 
 
 app = FastAPI(title="Gestu API")
 app.include_router(lessons.router)
 app.include_router(sessions.router)
 app.include_router(detections.router)
+app.include_router(progress.router)
+metrics.install(app, (engine, async_engine))
@@ -0,0 +1,123 @@
+"""
+10k-item detection upload: the old ORM add() loop vs the bulk INSERT path,
+plus the full HTTP route for JSON and NDJSON bodies.
+
+Run from the repository root (uses a throwaway SQLite file):
+
+    PYTHONPATH=.:app/backend python -m api.bench_detections --items 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/bench.db"
+
+from sqlalchemy import delete  # noqa: E402
+
+from db import Base, engine, get_async_session, get_session  # noqa: E402
+from db.models import GestureCard, GestureDetection, Lesson, PracticeSession, User  # noqa: E402
+from api.routes.detections import _insert_rows  # noqa: E402
+
+
+def seed() -> int:
+    Base.metadata.create_all(engine)
+    db = get_session()
+    user = User(telegram_id=1, username="bench")
+    lesson = Lesson(title="bench", lesson_order=1)
+    db.add_all([user, lesson])
+    db.flush()
+    db.add(GestureCard(lesson_id=lesson.lesson_id, gesture_name="кот", gesture_image_url=""))
+    s = PracticeSession(user_id=user.user_id, lesson_id=lesson.lesson_id)
+    db.add(s)
+    db.commit()
+    session_id = s.session_id
+    db.close()
+    return session_id
+
+
+def items(session_id: int, n: int) -> list[dict]:
+    return [
+        {"session_id": session_id, "gesture_card_id": 1, "detection_accuracy": 0.5 + (i % 50) / 100.0}
+        for i in range(n)
+    ]
+
+
+async def orm_loop(rows):
+    async with get_async_session() as db:
+        for r in rows:
+            db.add(GestureDetection(detected_at=datetime.utcnow(), **r))
+        await db.commit()
+
+
+async def bulk(rows):
+    now = datetime.utcnow()
+    async with get_async_session() as db:
+        await _insert_rows(db, [dict(r, detected_at=now) for r in rows])
+        await db.commit()
+
+
+async def clear():
+    async with get_async_session() as db:
+        await db.execute(delete(GestureDetection))
+        await db.commit()
+
+
+async def timed(name, fn, rows, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        await clear()
+        t0 = time.perf_counter()
+        await fn(rows)
+        best = min(best, time.perf_counter() - t0)
+    print(f"{name:>16}: {best * 1000:8.1f} ms  ({len(rows) / best:,.0f} rows/s)")
+
+
+def http(session_id, n):
+    import httpx
+    from api.app import app
+    from api import deps
+
+    class _User:
+        user_id = 1
+
+    app.dependency_overrides[deps.get_current_user] = lambda: _User()
+    rows = items(session_id, n)
+    json_body = json.dumps({"items": rows})
+    ndjson_body = "\n".join(json.dumps(r) for r in rows)
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, path, body, ctype in (
+                ("HTTP JSON bulk", "/api/v1/detections/bulk", json_body, "application/json"),
+                ("HTTP NDJSON", "/api/v1/detections/stream", ndjson_body, "application/x-ndjson"),
+            ):
+                await clear()
+                t0 = time.perf_counter()
+                r = await client.post(path, content=body, headers={"content-type": ctype})
+                dt = time.perf_counter() - t0
+                print(f"{name:>16}: {dt * 1000:8.1f} ms  status {r.status_code} {r.json()}")
+
+    asyncio.run(go())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    session_id = seed()
+    rows = items(session_id, args.items)
+    asyncio.run(timed("ORM add() loop", orm_loop, rows, args.repeats))
+    asyncio.run(timed("bulk INSERT", bulk, rows, args.repeats))
+    http(session_id, args.items)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+import db.requests as rq
+
+
+class CatalogCache:
+    """
+    In-memory cache of pre-serialized catalog responses (lesson list, cards
+    of a lesson, full catalog) keyed by name, each with a strong ETag.
+
+    Entries are dropped when the catalog is written through db/requests.py in
+    this process, and expire after ``ttl_s`` to pick up writes made by other
+    processes. At most ``max_entries`` entries are kept, least recently used
+    first out.
+    """
+
+    def __init__(self, ttl_s: float = 300.0, max_entries: int = 256):
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self._items: OrderedDict = OrderedDict()
+        # Only for keys being built right now.
+        self._locks: dict = {}
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key, build) -> tuple[bytes, str]:
+        """
+        ``(body, etag)`` for ``key``; on a miss ``await build()`` produces the
+        JSON bytes. Concurrent misses on the same key build once. Nothing is
+        cached when ``build`` raises.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            try:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry
+
+                self.misses += 1
+                generation = self._generation
+                body = await build()
+                etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+                # A write that happened while building may not be in ``body``.
+                if generation == self._generation:
+                    self._store(key, body, etag)
+                return body, etag
+            finally:
+                # Callers already waiting keep their reference; later ones
+                # find the entry.
+                if self._locks.get(key) is lock:
+                    del self._locks[key]
+
+    def _lookup(self, key) -> tuple[bytes, str] | None:
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def _store(self, key, body: bytes, etag: str):
+        self._items[key] = (time.monotonic() + self.ttl_s, body, etag)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def invalidate(self, lesson_id: int | None = None):
+        self._generation += 1
+        if lesson_id is None:
+            self._items.clear()
+        else:
+            self._items.pop(("cards", lesson_id), None)
+            self._items.pop("catalog", None)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def cached_json(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+catalog = CatalogCache(
+    float(os.getenv("CATALOG_CACHE_TTL_S", "300")),
+    int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "256")),
+)
+rq.on_catalog_change(catalog.invalidate)
@@ -1,50 +1,95 @@
 from fastapi import Depends, Header, HTTPException
-from sqlalchemy.orm import Session
-from db import get_session
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import get_async_session
 from db.models import User
-import hmac, hashlib, urllib.parse, json, os
+from api.metrics import registry
+from api.telegram_auth import InitDataError, InitDataVerifier, UserIdCache
+import os
 
 
-def get_db():
-    db = get_session()
-    try:
+_verifier: InitDataVerifier | None = None
+user_ids = UserIdCache(int(os.getenv("AUTH_USER_CACHE_SIZE", "50000")))
+
+
+class CurrentUser:
+    __slots__ = ("user_id", "telegram_id", "username")
+
+    def __init__(self, user_id: int, telegram_id: int, username: str | None):
+        self.user_id = user_id
+        self.telegram_id = telegram_id
+        self.username = username
+
+
+async def get_db():
+    async with get_async_session() as db:
         yield db
-    finally:
-        db.close()
 
 
-def _check_telegram_init_data(init_data_raw: str, bot_token: str) -> dict:
-    parsed = dict(urllib.parse.parse_qsl(init_data_raw, keep_blank_values=True))
-    if 'hash' not in parsed:
-        raise HTTPException(status_code=401, detail="Missing hash")
-    received_hash = parsed.pop('hash')
+def get_verifier() -> InitDataVerifier:
+    global _verifier
+    token = os.getenv("TOKEN", "")
+    if _verifier is None or _verifier.bot_token != token:
+        _verifier = InitDataVerifier(
+            token,
+            ttl_s=float(os.getenv("AUTH_CACHE_TTL_S", "300")),
+            max_age_s=float(os.getenv("AUTH_MAX_AGE_S", "86400")),
+        )
+    return _verifier
+
+
+registry.counter("gestu_auth_init_data_cache_hits_total", "initData checks answered from the cache.",
+                 fn=lambda: get_verifier().hits)
+registry.counter("gestu_auth_init_data_cache_misses_total", "initData checks that ran the HMAC.",
+                 fn=lambda: get_verifier().misses)
+registry.gauge("gestu_auth_init_data_cache_entries", "Verified initData strings cached.",
+               fn=lambda: get_verifier().stats()["size"])
+registry.counter("gestu_auth_user_id_cache_hits_total", "Telegram id lookups answered from the cache.",
+                 fn=lambda: user_ids.hits)
+registry.counter("gestu_auth_user_id_cache_misses_total", "Telegram id lookups that went to the database.",
+                 fn=lambda: user_ids.misses)
+registry.gauge("gestu_auth_user_id_cache_entries", "Telegram id to user id mappings cached.",
+               fn=lambda: user_ids.stats()["size"])
 
-    data_check_string = "\n".join(f"{k}={parsed[k]}" for k in sorted(parsed.keys()))
-    secret_key = hashlib.sha256(bot_token.encode()).digest()
-    h = hmac.new(secret_key, msg=data_check_string.encode(), digestmod=hashlib.sha256).hexdigest()
-    if not hmac.compare_digest(h, received_hash):
-        raise HTTPException(status_code=401, detail="Bad signature")
 
-    user_json = parsed.get("user")
-    if not user_json:
-        raise HTTPException(status_code=401, detail="No user")
-    return json.loads(user_json)
+async def _upsert_user(db: AsyncSession, tg_id: int, username: str | None) -> int:
+    # Several first-open requests may race here: insert-or-ignore, then read.
+    dialect = db.bind.dialect.name
+    values = {"telegram_id": tg_id, "username": username or ""}
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        await db.execute(
+            insert(User).values(**values).on_conflict_do_nothing(index_elements=["telegram_id"])
+        )
+        await db.commit()
+    else:
+        db.add(User(**values))
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
 
+    return (await db.execute(select(User.user_id).filter_by(telegram_id=tg_id))).scalar_one()
 
-def get_current_user(
+
+async def get_current_user(
     x_init_data: str | None = Header(default=None, alias="X-Telegram-Init-Data"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     if not x_init_data:
         raise HTTPException(status_code=401, detail="No init data")
-    user_dict = _check_telegram_init_data(x_init_data, os.getenv("TOKEN", ""))
+    try:
+        user_dict = get_verifier().verify(x_init_data)
+    except InitDataError as exc:
+        raise HTTPException(status_code=401, detail=str(exc))
     tg_id = user_dict["id"]
     username = user_dict.get("username")
 
-    user = db.query(User).filter_by(telegram_id=tg_id).first()
-    if not user:
-        user = User(telegram_id=tg_id, username=username)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    return user
+    user_id = user_ids.get(tg_id)
+    if user_id is None:
+        user_id = (await db.execute(select(User.user_id).filter_by(telegram_id=tg_id))).scalar()
+        if user_id is None:
+            user_id = await _upsert_user(db, tg_id, username)
+        user_ids.put(tg_id, user_id)
+    return CurrentUser(user_id, tg_id, username)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.backend.db import get_async_session, get_session
+from app.backend.db.models import GestureDetection, PracticeSession, User
+from app.backend.db.progress import add_detections
+from app.backend.api.metrics import background_task
+
+logger = logging.getLogger("gesture_ws")
+
+
+class DetectionWriter:
+    """
+    Write-behind buffer for detections confirmed on the WebSocket.
+
+    ``submit`` only appends to an in-memory queue and never waits on the
+    database. A background task writes the queued rows as one multi-row
+    INSERT whenever ``flush_rows`` rows are waiting or ``flush_interval_s``
+    has passed. The queue holds at most ``max_rows`` rows; past that the
+    oldest rows are dropped and counted in ``dropped``.
+
+    When a write fails, the rows are written again session by session, so
+    one session's bad rows (say, a card deleted meanwhile) do not take the
+    other learners' detections down with them. Rows that still fail go back
+    to the front of the queue and are retried with the next flush; a row
+    that failed ``max_attempts`` times is given up on and counted in
+    ``failed``.
+    """
+
+    def __init__(self, flush_rows: int = 200, flush_interval_s: float = 1.0, max_rows: int = 10000,
+                 max_attempts: int = 3):
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval_s = max(0.01, float(flush_interval_s))
+        self.max_rows = max(self.flush_rows, int(max_rows))
+        self.max_attempts = max(1, int(max_attempts))
+
+        self._rows: deque[dict] = deque()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._lock: asyncio.Lock | None = None
+        self._closing = False
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = background_task(self._run())
+
+    def submit(self, session_id: int, card_id: int, accuracy: float, detected_at: datetime | None = None):
+        self._ensure_started()
+        if len(self._rows) >= self.max_rows:
+            self._rows.popleft()
+            self.dropped += 1
+        self._rows.append({
+            "session_id": session_id,
+            "gesture_card_id": card_id,
+            "detection_accuracy": float(accuracy),
+            "detected_at": detected_at or datetime.utcnow(),
+        })
+        if len(self._rows) >= self.flush_rows:
+            self._wake.set()
+
+    async def flush(self, session_id: int | None = None):
+        """
+        Write the queued rows now. With ``session_id`` only that session's
+        rows are taken (used when its socket closes); the rest stay queued.
+        """
+        if self._lock is None:
+            return
+        async with self._lock:
+            if session_id is None:
+                rows = list(self._rows)
+                self._rows.clear()
+            else:
+                rows = [r for r in self._rows if r["session_id"] == session_id]
+                if rows:
+                    kept = [r for r in self._rows if r["session_id"] != session_id]
+                    self._rows.clear()
+                    self._rows.extend(kept)
+            if not rows:
+                return
+            try:
+                await self._write(rows)
+                return
+            except Exception:
+                logger.exception("failed to write %d detections", len(rows))
+
+            by_session: dict[int, list[dict]] = {}
+            for row in rows:
+                by_session.setdefault(row["session_id"], []).append(row)
+            if len(by_session) == 1:
+                self._requeue(rows)
+                return
+            failed = []
+            for session_rows in by_session.values():
+                try:
+                    await self._write(session_rows)
+                except Exception:
+                    failed.extend(session_rows)
+            if failed:
+                logger.warning("failed to write %d detections of %d sessions",
+                               len(failed), len({r["session_id"] for r in failed}))
+                self._requeue(failed)
+
+    async def _write(self, rows: list[dict]):
+        values = [{k: v for k, v in r.items() if k != "attempts"} for r in rows]
+        async with get_async_session() as db:
+            await db.execute(insert(GestureDetection), values)
+            await add_detections(db, values)
+            await db.commit()
+        self.written += len(rows)
+
+    def _requeue(self, rows: list[dict]):
+        retry = []
+        for row in rows:
+            row["attempts"] = row.get("attempts", 0) + 1
+            if row["attempts"] < self.max_attempts:
+                retry.append(row)
+        self.failed += len(rows) - len(retry)
+        # Rows submitted during the write stay behind the retried ones.
+        self._rows.extendleft(reversed(retry))
+        while len(self._rows) > self.max_rows:
+            self._rows.popleft()
+            self.dropped += 1
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def close(self):
+        # Let a flush that is already running finish rather than cancelling
+        # it halfway, then write whatever is left.
+        self._closing = True
+        if self._task is not None:
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # No later flush will retry what fails here.
+        for _ in range(self.max_attempts):
+            await self.flush()
+            if not self._rows:
+                break
+        if self._rows:
+            logger.error("gave up on %d detections at shutdown", len(self._rows))
+            self.failed += len(self._rows)
+            self._rows.clear()
+        self._closing = False
+
+    def stats(self) -> dict:
+        return {"pending": self.pending, "written": self.written, "dropped": self.dropped, "failed": self.failed}
+
+
+def session_owned_by(session_id: int, telegram_id: int) -> bool:
+    db = get_session()
+    try:
+        row = (
+            db.query(PracticeSession.session_id)
+            .join(User, User.user_id == PracticeSession.user_id)
+            .filter(PracticeSession.session_id == session_id, User.telegram_id == telegram_id)
+            .first()
+        )
+    finally:
+        db.close()
+    return row is not None
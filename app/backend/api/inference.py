@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import threading
+import time
+
+import numpy as np
+
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+from app.backend.ml.easy_sign.frames import decode_held
+from app.backend.ml.easy_sign.runtime import LabelSubset, Predictor
+from app.backend.api.metrics import registry
+
+logger = logging.getLogger("gesture_ws")
+
+queue_wait_seconds = registry.histogram(
+    "gestu_infer_queue_wait_seconds", "Time a clip waited in the scheduler before its batch started."
+)
+run_seconds = registry.histogram("gestu_infer_run_seconds", "Model session.run time per batch.")
+postprocess_seconds = registry.histogram("gestu_infer_postprocess_seconds", "Postprocessing time per batch.")
+batch_size = registry.histogram(
+    "gestu_infer_batch_size", "Clips per inference batch.", buckets=(1, 2, 4, 8, 16, 32)
+)
+failed_clips = registry.counter("gestu_infer_failed_clips_total", "Clips whose inference raised.")
+
+
+class ThreadBackend:
+    """
+    Decode and inference on the default thread pool of this process, with a
+    single Predictor shared by all sockets.
+
+    Given a ``factory`` instead of a predictor, the model is only loaded by
+    ``warmup()`` or the first batch, so importing the server stays cheap.
+    """
+
+    def __init__(self, predictor: Predictor | None = None, factory=None):
+        if predictor is None and factory is None:
+            raise ValueError("ThreadBackend needs a predictor or a factory")
+        self._predictor = predictor
+        self._factory = factory
+        self._lock = threading.Lock()
+        self.max_inflight = 1
+
+    @property
+    def predictor(self) -> Predictor:
+        if self._predictor is None:
+            with self._lock:
+                if self._predictor is None:
+                    self._predictor = self._factory()
+        return self._predictor
+
+    def _warmup(self) -> dict:
+        t0 = time.perf_counter()
+        predictor = self.predictor
+        return {"model_load": time.perf_counter() - t0, "first_inference": predictor.warmup()}
+
+    async def warmup(self) -> dict:
+        """
+        Load the model if needed and run one dummy clip through it. Returns
+        the seconds spent per phase.
+        """
+        return await asyncio.to_thread(self._warmup)
+
+    def new_buffer(self, window_size: int, size: int = 224, dtype=np.float32) -> ClipBuffer:
+        return ClipBuffer(window_size, size, dtype=dtype)
+
+    async def decode_into(self, frames: ClipBuffer, data: str | bytes, roi=None):
+        await decode_held(frames, data, roi)
+
+    def _run_batch(self, clips: list, subsets: list, timings: dict | None = None) -> list:
+        predictor = self.predictor
+        if all(isinstance(c, ClipBuffer) for c in clips):
+            # Windows go straight into the predictor's reusable batch tensor.
+            batch = predictor.batch_buffer(len(clips), clips[0].ring_shape)
+            for i, c in enumerate(clips):
+                c.clip(out=batch[i:i + 1])
+            clips = batch
+        return predictor.predict_batch(clips, subsets, timings)
+
+    async def predict_batch(self, clips: list, subsets: list, timings: dict | None = None) -> list:
+        return await asyncio.to_thread(self._run_batch, clips, subsets, timings)
+
+    async def close(self):
+        pass
+
+
+def _buffer_of(clip) -> ClipBuffer | None:
+    if isinstance(clip, ClipBuffer):
+        return clip
+    # A FeatureCache reads the frames of the buffer it wraps.
+    buffer = getattr(clip, "buffer", None)
+    return buffer if isinstance(buffer, ClipBuffer) else None
+
+
+def _unhold(batch: list):
+    for clip, _, _, _ in batch:
+        buffer = _buffer_of(clip)
+        if buffer is not None:
+            buffer.unhold()
+
+
+class InferenceScheduler:
+    """
+    Collects clips from all open sockets and runs them through the backend
+    as one batch.
+
+    A batch is closed when it reaches ``max_batch_size`` clips or when
+    ``max_wait_ms`` has passed since its first clip arrived, whichever comes
+    first. Each caller awaits only its own result. Up to
+    ``backend.max_inflight`` batches run at the same time. When a batch
+    fails, its clips are retried one by one, so only the caller whose clip
+    is at fault gets the exception.
+
+    Callers may submit a ClipBuffer instead of a prepared clip; its window is
+    then materialized by the backend, off the event loop. With a
+    TwoStagePredictor they may submit a FeatureCache, whose missing chunks
+    are computed by the backend. The buffer must not be appended to until
+    the result has been awaited. It is held (ClipBuffer.hold) from submission
+    until its batch has finished, so a socket that closes meanwhile only
+    frees its window afterwards. A LabelSubset restricts scoring of that one
+    clip to the given classes.
+    """
+
+    def __init__(self, backend, max_batch_size: int = 8, max_wait_ms: float = 20.0):
+        self.backend = backend
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.clips = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def busy(self) -> bool:
+        """
+        Whether live clips are queued or being scored.
+        """
+        return self.pending > 0 or bool(self._inflight)
+
+    @property
+    def load(self) -> float:
+        """
+        Queued clips relative to what one round of in-flight batches can take,
+        clipped to [0, 1].
+        """
+        capacity = self.max_batch_size * max(1, int(getattr(self.backend, "max_inflight", 1)))
+        return min(1.0, self.pending / capacity)
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def predict(self, clip: np.ndarray | ClipBuffer, subset: LabelSubset | None = None):
+        self._ensure_started()
+        fut = asyncio.get_running_loop().create_future()
+        buffer = _buffer_of(clip)
+        if buffer is not None:
+            buffer.hold()
+        self._queue.put_nowait((clip, subset, fut, time.perf_counter()))
+        return await fut
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        for task in list(self._inflight):
+            task.cancel()
+        await asyncio.gather(self._task, *self._inflight, return_exceptions=True)
+        self._task = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            item[2].cancel()
+            _unhold([item])
+        await self.backend.close()
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self, batch: list, slots: asyncio.Semaphore):
+        started = time.perf_counter()
+        for _, _, _, queued_at in batch:
+            queue_wait_seconds.observe(started - queued_at)
+
+        timings = {}
+        try:
+            try:
+                results = await self.backend.predict_batch(
+                    [clip for clip, _, _, _ in batch], [subset for _, subset, _, _ in batch], timings
+                )
+            except Exception:
+                if len(batch) == 1:
+                    raise
+                logger.warning(f"batch of {len(batch)} clips failed, retrying them one by one", exc_info=True)
+                timings = {}
+                results = await self._predict_singly(batch)
+        except Exception as exc:
+            logger.exception("batch inference failed")
+            failed_clips.inc(len(batch))
+            for _, _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        finally:
+            slots.release()
+            _unhold(batch)
+
+        self.batches += 1
+        self.clips += len(batch)
+        batch_size.observe(len(batch))
+        if timings:
+            run_seconds.observe(timings["run"])
+            postprocess_seconds.observe(timings["postprocess"])
+
+        for (_, _, fut, _), result in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    async def _predict_singly(self, batch: list) -> list:
+        """
+        Results of ``batch`` clip by clip; a clip that fails gets its
+        exception in place of a result.
+        """
+        results = []
+        for clip, subset, fut, _ in batch:
+            if fut.done():
+                results.append(None)
+                continue
+            try:
+                results.append((await self.backend.predict_batch([clip], [subset]))[0])
+            except Exception as exc:
+                logger.exception("clip inference failed")
+                failed_clips.inc()
+                results.append(exc)
+        return results
+
+    async def _run(self):
+        slots = asyncio.Semaphore(max(1, int(getattr(self.backend, "max_inflight", 1))))
+        while True:
+            await slots.acquire()
+            batch = await self._collect()
+            # Callers that went away (socket closed) no longer need a result.
+            _unhold([item for item in batch if item[2].done()])
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                slots.release()
+                continue
+
+            task = asyncio.create_task(self._dispatch(batch, slots))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
@@ -0,0 +1,155 @@
+"""
+Process-wide keepalive for /ws/gesture.
+
+One task pings every registered socket every ``interval_s`` instead of each
+socket running a pinger of its own. Sockets sit in a heap keyed by their
+next ping deadline; the task sleeps until the earliest one and pings every
+socket due within ``slack_s`` of it in one go. Any message from the client
+(frames, or the {"type": "pong"} answer to a ping) counts as a sign of life;
+a socket that let ``max_missed`` pings in a row go unanswered is handed to
+its ``on_dead`` callback, so its frame window is freed without waiting for
+TCP to notice.
+
+The task also wakes at least every ``lag_probe_s`` and records how late it
+woke up as gestu_event_loop_lag_seconds: a loop blocked by CPU work in a
+coroutine shows up there before it shows up as slow words.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from app.backend.api.metrics import registry
+
+logger = logging.getLogger("gesture_ws")
+
+loop_lag_seconds = registry.histogram(
+    "gestu_event_loop_lag_seconds", "How late the keepalive task woke up relative to its timer.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+ping_rtt_seconds = registry.histogram("gestu_ws_ping_rtt_seconds", "From sending a ping to receiving its pong.")
+dead_peers = registry.counter("gestu_ws_dead_peers_total", "Sockets closed after missing their pings.")
+
+
+class Peer:
+    __slots__ = ("ws", "on_dead", "on_tick", "missed", "deadline", "active")
+
+    def __init__(self, ws, on_dead, on_tick, deadline: float):
+        self.ws = ws
+        self.on_dead = on_dead
+        self.on_tick = on_tick
+        self.missed = 0
+        self.deadline = deadline
+        self.active = True
+
+    def seen(self):
+        self.missed = 0
+
+    def pong(self, ts):
+        self.missed = 0
+        if isinstance(ts, (int, float)):
+            ping_rtt_seconds.observe(max(0.0, time.time() - ts))
+
+
+class KeepaliveScheduler:
+    def __init__(self, interval_s: float = 10.0, max_missed: int = 3, slack_s: float = 0.25,
+                 send_timeout_s: float = 2.0, lag_probe_s: float = 0.5):
+        self.interval_s = max(0.1, float(interval_s))
+        self.max_missed = max(1, int(max_missed))
+        self.slack_s = max(0.0, float(slack_s))
+        self.send_timeout_s = float(send_timeout_s)
+        self.lag_probe_s = float(lag_probe_s)
+
+        self._heap: list[tuple[float, int, Peer]] = []
+        self._ids = itertools.count()
+        self._task: asyncio.Task | None = None
+
+        self.peers = 0
+        self.pings = 0
+        self.dead = 0
+        self.last_lag_s = 0.0
+
+    @classmethod
+    def from_config(cls, config: dict) -> "KeepaliveScheduler":
+        return cls(
+            interval_s=float(config.get("ping_interval_s", 10.0)),
+            max_missed=int(config.get("ping_max_missed", 3)),
+        )
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, ws, on_dead, on_tick=None) -> Peer:
+        """
+        Start pinging ``ws``. ``on_dead()`` is called (once) when it stops
+        answering; ``on_tick(now)``, if given, after each of its pings.
+        """
+        self._ensure_started()
+        peer = Peer(ws, on_dead, on_tick, time.monotonic() + self.interval_s)
+        heapq.heappush(self._heap, (peer.deadline, next(self._ids), peer))
+        self.peers += 1
+        return peer
+
+    def remove(self, peer: Peer):
+        # Lazy: the heap entry is skipped when it comes due.
+        if peer.active:
+            peer.active = False
+            self.peers -= 1
+
+    async def _ping(self, peer: Peer, now: float):
+        if peer.missed >= self.max_missed:
+            self._bury(peer, f"missed {peer.missed} pings")
+            return
+        peer.missed += 1
+        try:
+            await asyncio.wait_for(
+                peer.ws.send_json({"type": "ping", "ts": time.time()}), timeout=self.send_timeout_s
+            )
+        except Exception as exc:
+            self._bury(peer, f"ping failed: {type(exc).__name__}")
+            return
+        self.pings += 1
+        if peer.on_tick is not None:
+            peer.on_tick(now)
+
+    def _bury(self, peer: Peer, reason: str):
+        if not peer.active:
+            return
+        self.remove(peer)
+        self.dead += 1
+        dead_peers.inc()
+        logger.info(f"closing dead websocket peer: {reason}")
+        peer.on_dead()
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            next_at = self._heap[0][0] if self._heap else now + self.lag_probe_s
+            planned = max(now, min(next_at, now + self.lag_probe_s))
+            await asyncio.sleep(planned - now)
+
+            now = time.monotonic()
+            self.last_lag_s = max(0.0, now - planned)
+            loop_lag_seconds.observe(self.last_lag_s)
+
+            due = []
+            while self._heap and self._heap[0][0] <= now + self.slack_s:
+                _, _, peer = heapq.heappop(self._heap)
+                if not peer.active:
+                    continue
+                due.append(peer)
+                peer.deadline = now + self.interval_s
+                heapq.heappush(self._heap, (peer.deadline, next(self._ids), peer))
+            if due:
+                await asyncio.gather(*[self._ping(peer, now) for peer in due])
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"peers": self.peers, "pings": self.pings, "dead": self.dead, "loop_lag_s": self.last_lag_s}
@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from app.backend.db import get_session
+from app.backend.db.models import GestureCard, PracticeSession
+from app.backend.ml.easy_sign.runtime import LabelSubset
+
+
+class LessonLabelCache:
+    """
+    LRU of lesson_id -> LabelSubset with the model classes of that lesson's
+    gesture cards. Lookups on a miss hit the database, so call ``get`` from a
+    worker thread, not from the event loop.
+
+    ``invalidate`` only hears about catalog writes made in this process, so
+    entries also expire after ``ttl_s`` to pick up cards added by the bot or
+    the REST API. Lessons without cards are not cached at all: their cards
+    may be added any moment, and until then they score every class.
+    """
+
+    def __init__(self, labels: dict[int, str], maxsize: int = 256, ttl_s: float = 300.0):
+        self.labels = labels
+        self.maxsize = maxsize
+        self.ttl_s = float(ttl_s)
+        self._items: "OrderedDict[int, tuple[float, LabelSubset]]" = OrderedDict()
+        self._lock = Lock()
+        self._generation = 0
+
+    def get(self, lesson_id: int) -> LabelSubset:
+        with self._lock:
+            entry = self._items.get(lesson_id)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._items.move_to_end(lesson_id)
+                    return entry[1]
+                del self._items[lesson_id]
+            generation = self._generation
+
+        db = get_session()
+        try:
+            cards = (
+                db.query(GestureCard.card_id, GestureCard.gesture_name)
+                .filter_by(lesson_id=lesson_id)
+                .all()
+            )
+        finally:
+            db.close()
+        subset = LabelSubset.from_cards(self.labels, cards)
+        if len(subset) == 0:
+            return subset
+
+        with self._lock:
+            # A write that happened while querying may not be in ``cards``.
+            if generation == self._generation:
+                self._items[lesson_id] = (time.monotonic() + self.ttl_s, subset)
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+        return subset
+
+    def invalidate(self, lesson_id: int | None = None):
+        with self._lock:
+            self._generation += 1
+            if lesson_id is None:
+                self._items.clear()
+            else:
+                self._items.pop(lesson_id, None)
+
+
+def lesson_for_session(session_id: int) -> int | None:
+    db = get_session()
+    try:
+        row = db.query(PracticeSession.lesson_id).filter_by(session_id=session_id).first()
+    finally:
+        db.close()
+    return row[0] if row else None
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from collections import deque
+
+
+class RateController:
+    """
+    Per-connection upload rate negotiation.
+
+    Once per ``interval_s`` the controller looks at how many frames arrived,
+    how many were dropped before decode and the global inference load. When
+    frames pile up (drop ratio above ``drop_high``) or the server is loaded,
+    the target fps falls to just below what this connection actually got
+    processed; when things are calm it climbs back by ``fps_step``. Once the
+    fps is at its floor and pressure persists, JPEG quality is lowered a
+    notch. ``update`` returns the new settings when they changed, else None.
+    """
+
+    QUALITIES = (0.55, 0.45, 0.35)
+
+    def __init__(self, size: int = 224, max_fps: float = 25.0, min_fps: float = 6.0,
+                 fps_step: float = 2.0, drop_high: float = 0.2, drop_low: float = 0.05,
+                 load_high: float = 0.75, load_low: float = 0.5, interval_s: float = 1.0):
+        self.size = int(size)
+        self.max_fps = float(max_fps)
+        self.min_fps = min(float(min_fps), self.max_fps)
+        self.fps_step = float(fps_step)
+        self.drop_high = float(drop_high)
+        self.drop_low = float(drop_low)
+        self.load_high = float(load_high)
+        self.load_low = float(load_low)
+        self.interval_s = float(interval_s)
+
+        self.fps = self.max_fps
+        self._quality = 0
+        self._last_at = time.monotonic()
+        self._last_in = 0
+        self._last_dropped = 0
+        self._last_done = 0
+
+    @classmethod
+    def from_config(cls, config: dict, size: int = 224) -> "RateController":
+        return cls(
+            size=size,
+            max_fps=float(config.get("client_max_fps", 25)),
+            min_fps=float(config.get("client_min_fps", 6)),
+        )
+
+    @property
+    def quality(self) -> float:
+        return self.QUALITIES[self._quality]
+
+    def settings(self) -> dict:
+        return {"type": "rate", "fps": round(self.fps, 1), "quality": self.quality, "size": self.size}
+
+    def update(self, frames_in: int, frames_dropped: int, frames_done: int, load: float) -> dict | None:
+        """
+        ``frames_in``, ``frames_dropped`` and ``frames_done`` are the running
+        totals of this connection; ``load`` is the scheduler load in [0, 1].
+        """
+        now = time.monotonic()
+        elapsed = now - self._last_at
+        if elapsed < self.interval_s:
+            return None
+
+        received = frames_in - self._last_in
+        dropped = frames_dropped - self._last_dropped
+        done = frames_done - self._last_done
+        self._last_at = now
+        self._last_in = frames_in
+        self._last_dropped = frames_dropped
+        self._last_done = frames_done
+        if received <= 0:
+            return None
+
+        before = (self.fps, self._quality)
+        drop_ratio = dropped / received
+
+        if drop_ratio > self.drop_high or load > self.load_high:
+            if self.fps > self.min_fps:
+                self.fps = max(self.min_fps, min(self.fps - self.fps_step, 0.9 * done / elapsed))
+            elif self._quality < len(self.QUALITIES) - 1:
+                self._quality += 1
+        elif drop_ratio < self.drop_low and load < self.load_low:
+            if self._quality > 0:
+                self._quality -= 1
+            else:
+                self.fps = min(self.max_fps, self.fps + self.fps_step)
+
+        if (self.fps, self._quality) == before:
+            return None
+        return self.settings()
+
+
+class AdmissionControl:
+    """
+    Caps the number of concurrently served sockets at ``max_sessions``.
+
+    Up to ``max_waiting`` extra sockets wait for a free slot, for at most
+    ``wait_s`` seconds each; anything beyond that is refused right away.
+    ``max_sessions=0`` admits everyone.
+    """
+
+    def __init__(self, max_sessions: int = 0, max_waiting: int = 0, wait_s: float = 15.0):
+        self.max_sessions = max(0, int(max_sessions))
+        self.max_waiting = max(0, int(max_waiting))
+        self.wait_s = float(wait_s)
+
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+        self.refused = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def try_acquire(self) -> bool:
+        if self.max_sessions == 0 or (self.active < self.max_sessions and not self._waiters):
+            self.active += 1
+            return True
+        return False
+
+    def can_wait(self) -> bool:
+        return len(self._waiters) < self.max_waiting
+
+    async def wait(self) -> bool:
+        """
+        Wait for a slot. Returns False (and counts a refusal) on timeout.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self.wait_s)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed over just as we gave up.
+                self.release()
+            else:
+                fut.cancel()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self.refused += 1
+            return False
+        finally:
+            try:
+                self._waiters.remove(fut)
+            except ValueError:
+                pass
+
+    def refuse(self):
+        self.refused += 1
+
+    def release(self):
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                # The slot passes straight to the oldest waiter.
+                fut.set_result(True)
+                return
+        self.active = max(0, self.active - 1)
+
+    def stats(self) -> dict:
+        return {"active": self.active, "waiting": self.waiting, "refused": self.refused}
@@ -0,0 +1,252 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain Python numbers and lists updated
+without locks: recording is a dict lookup, a bisect and a couple of
+additions, cheap enough to leave on for every frame. Updates made from
+worker threads may very rarely lose an increment, which is acceptable for
+monitoring.
+"""
+import asyncio
+import os
+import resource
+import sys
+import time
+from bisect import bisect_left
+from contextvars import Context, ContextVar
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+# Seconds; covers sub-millisecond postprocessing up to multi-second e2e latency.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """
+    Counter incremented directly, or read from ``fn`` at scrape time (for
+    totals kept elsewhere, such as CPU time).
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple = (), fn=None):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, labels: tuple = ()):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        if self.fn is not None:
+            yield self.name, self.fn()
+            return
+        for labels, value in self._values.items():
+            yield self.name + _labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    """
+    Gauge set directly, or read from ``fn`` at scrape time.
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, labels: tuple = ()):
+        self._values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (last one is +Inf), sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, labels: tuple = ()):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield self.name + "_bucket" + _labels(self.labelnames + ("le",), labels + (le,)), cumulative
+            yield self.name + "_sum" + _labels(self.labelnames, labels), total
+            yield self.name + "_count" + _labels(self.labelnames, labels), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def _add(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, doc: str, labelnames: tuple = (), fn=None) -> Counter:
+        return self._add(Counter(name, doc, labelnames, fn))
+
+    def gauge(self, name: str, doc: str, labelnames: tuple = (), fn=None) -> Gauge:
+        return self._add(Gauge(name, doc, labelnames, fn))
+
+    def histogram(self, name: str, doc: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, doc, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.doc}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_seconds = registry.histogram(
+    "gestu_http_request_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+db_query_seconds = registry.histogram(
+    "gestu_db_query_seconds", "Database statement latency by the route that issued it.", ("route",)
+)
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # ru_maxrss: peak, not current; KiB on Linux, bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+registry.counter("process_cpu_seconds_total", "User and system CPU time of this process.", fn=time.process_time)
+registry.gauge("process_resident_memory_bytes", "Resident memory of this process.", fn=_rss_bytes)
+
+
+# --- per-route context -----------------------------------------------------
+
+_scope: ContextVar[dict | None] = ContextVar("gestu_metrics_scope", default=None)
+
+
+def current_route() -> str:
+    """
+    Route template of the current request, ``"<unmatched>"`` for a request
+    no route matched (raw paths would make one series per URL) and ``"-"``
+    outside of any request.
+    """
+    scope = _scope.get()
+    if scope is None:
+        return "-"
+    return getattr(scope.get("route"), "path", None) or "<unmatched>"
+
+
+def background_task(coro) -> asyncio.Task:
+    """
+    Start ``coro`` as a task outside of the current request's scope, so a
+    long-lived task started lazily by a request does not report its database
+    time under that request's route.
+    """
+    return Context().run(asyncio.create_task, coro)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times HTTP requests per route template and makes the
+    request scope visible to the database timing hooks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        token = _scope.set(scope)
+        if scope["type"] == "websocket":
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                _scope.reset(token)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_seconds.observe(
+                time.perf_counter() - t0, (scope["method"], current_route(), status[0])
+            )
+            _scope.reset(token)
+
+
+def instrument_engine(engine):
+    """
+    Time every statement of ``engine`` (a sync Engine, or the ``sync_engine``
+    of an AsyncEngine) and attribute it to the current route.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("gestu_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("gestu_query_start")
+        if started:
+            db_query_seconds.observe(time.perf_counter() - started.pop(), (current_route(),))
+
+
+def install(app, engines=()):
+    """
+    Add the middleware and the ``/metrics`` endpoint to ``app`` and time the
+    given engines.
+    """
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
+    for engine in engines:
+        instrument_engine(getattr(engine, "sync_engine", engine))
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
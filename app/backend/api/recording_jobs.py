@@ -0,0 +1,309 @@
+"""
+Offline scoring of recorded practice attempts.
+
+Learners on a bad connection can record an attempt and upload the video
+instead of streaming frames over /ws/gesture. Each upload becomes a job in a
+bounded queue; ``workers`` job runners (one by default) stream frames out of
+the file with OpenCV, slide the model window over them with step ``stride``
+and score ``batch_size`` windows per call of the inference backend the live
+sockets use (the shared Predictor in thread mode, the pool or remote workers
+otherwise), so the gateway never loads a model of its own for them. Frames go through the
+same ROI crop as live frames when the model config enables it. Every window
+whose top class is a card of the session's lesson becomes a GestureDetection
+row of that practice session, timestamped by its position in the video. The
+rows are written in one transaction once the whole video is scored, so a job
+that fails part-way stores nothing and can simply be uploaded again.
+
+Jobs share that backend with the live sockets, so they give way to them: before each batch a runner waits (up to
+``yield_max_s``) while the live InferenceScheduler has clips queued or
+batches running.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import insert
+
+from app.backend.db import get_async_session
+from app.backend.db.models import GestureDetection
+from app.backend.db.progress import add_detections
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+from app.backend.ml.easy_sign.recordings import UnreadableVideo, iter_video_frames
+from app.backend.ml.easy_sign.roi import RoiTracker
+from app.backend.ml.easy_sign.runtime import LabelSubset
+from app.backend.api.metrics import background_task, registry
+
+logger = logging.getLogger("gesture_ws")
+
+jobs_total = registry.counter("gestu_recording_jobs_total", "Finished recording jobs.", ("status",))
+job_seconds = registry.histogram(
+    "gestu_recording_job_seconds", "Wall time of a recording job, from start to finish.",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class RecordingJob:
+    __slots__ = (
+        "job_id", "telegram_id", "session_id", "subset", "path", "started_at",
+        "status", "frames", "windows", "detections", "error", "queued_at", "finished_at",
+    )
+
+    def __init__(self, telegram_id: int, session_id: int, subset: LabelSubset, path: Path,
+                 started_at: datetime):
+        self.job_id = uuid.uuid4().hex
+        self.telegram_id = telegram_id
+        self.session_id = session_id
+        self.subset = subset
+        self.path = path
+        self.started_at = started_at
+        self.status = "queued"
+        self.frames = 0
+        self.windows = 0
+        self.detections = 0
+        self.error: str | None = None
+        self.queued_at = time.time()
+        self.finished_at: float | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "session_id": self.session_id,
+            "status": self.status,
+            "frames": self.frames,
+            "windows": self.windows,
+            "detections": self.detections,
+            "error": self.error,
+        }
+
+
+class RecordingJobs:
+    """
+    Bounded queue of recording jobs and the runners working it off.
+
+    ``submit`` never waits: when ``max_queued`` jobs are already waiting it
+    raises JobQueueFull. Each job gets ``batch_size`` windows from
+    ``backend.new_buffer`` that its batches are copied into;
+    ``roi_factory``, if given, is called once per job for the RoiTracker
+    cropping its frames. Finished jobs are remembered (the last
+    ``keep_finished``) so clients can poll their status.
+    """
+
+    def __init__(self, backend, scheduler=None, window_size: int = 32, input_size: int = 224,
+                 workers: int = 1, max_queued: int = 16, stride: int = 8, batch_size: int = 4,
+                 yield_max_s: float = 0.5, keep_finished: int = 256, roi_factory=None,
+                 clip_dtype=np.uint8):
+        self.backend = backend
+        self.roi_factory = roi_factory
+        self.scheduler = scheduler
+        self.window_size = int(window_size)
+        self.input_size = int(input_size)
+        self.workers = max(1, int(workers))
+        self.max_queued = max(1, int(max_queued))
+        self.stride = max(1, int(stride))
+        self.batch_size = max(1, int(batch_size))
+        self.yield_max_s = max(0.0, float(yield_max_s))
+        self.keep_finished = int(keep_finished)
+        self.clip_dtype = np.dtype(clip_dtype)
+
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, RecordingJob]" = OrderedDict()
+
+        self.done = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls, config: dict, backend, scheduler=None) -> "RecordingJobs":
+        section = config.get("recordings") or {}
+        return cls(
+            backend,
+            scheduler,
+            window_size=int(config.get("window_size", 32)),
+            input_size=int(config.get("input_size", 224)),
+            workers=int(section.get("workers", 1)),
+            max_queued=int(section.get("max_queued", 16)),
+            stride=int(section.get("stride", 8)),
+            batch_size=int(section.get("batch_size", 4)),
+            yield_max_s=float(section.get("yield_max_s", 0.5)),
+            roi_factory=lambda: RoiTracker.from_config(config),
+            clip_dtype=config.get("clip_buffer_dtype", "uint8"),
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == "running")
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(background_task(self._worker()))
+
+    def submit(self, job: RecordingJob) -> int:
+        """
+        Queue ``job``; returns its position in the queue (1 = next).
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.max_queued} recordings are already waiting")
+        self._jobs[job.job_id] = job
+        self._forget_old()
+        return self._queue.qsize()
+
+    def get(self, job_id: str) -> RecordingJob | None:
+        return self._jobs.get(job_id)
+
+    def _forget_old(self):
+        finished = [jid for jid, job in self._jobs.items() if job.finished_at is not None]
+        for jid in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[jid]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            await self._run(job)
+
+    async def _yield_to_live(self):
+        if self.scheduler is None:
+            return
+        deadline = time.monotonic() + self.yield_max_s
+        while self.scheduler.busy and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    def _next_windows(self, frames, buf: ClipBuffer, windows: list, job: RecordingJob, state: dict) -> list:
+        """
+        Decode until ``batch_size`` windows are ready or the video ends,
+        copying them into ``windows`` in order. Returns their timestamps.
+        """
+        stamps = []
+        for ts, frame in frames:
+            buf.append(frame)
+            job.frames += 1
+            state["since"] += 1
+            if buf.full and state["since"] >= self.stride:
+                state["since"] = 0
+                windows[len(stamps)].copy_from(buf)
+                stamps.append(ts)
+                if len(stamps) == self.batch_size:
+                    break
+        return stamps
+
+    async def _predict(self, windows: list, subset: LabelSubset) -> list:
+        # Held like the scheduler holds socket windows: a pool or remote
+        # worker may still read them after a cancellation.
+        for window in windows:
+            window.hold()
+        try:
+            return await self.backend.predict_batch(windows, [subset] * len(windows))
+        finally:
+            for window in windows:
+                window.unhold()
+
+    async def _write(self, rows: list[dict]):
+        if not rows:
+            return
+        async with get_async_session() as db:
+            await db.execute(insert(GestureDetection), rows)
+            await add_detections(db, rows)
+            await db.commit()
+
+    async def _run(self, job: RecordingJob):
+        job.status = "running"
+        t0 = time.perf_counter()
+        frames = None
+        windows = []
+        try:
+            roi = self.roi_factory() if self.roi_factory is not None else None
+            frames = iter_video_frames(job.path, self.input_size, roi)
+            buf = ClipBuffer(self.window_size, self.input_size, dtype=self.clip_dtype)
+            windows = [
+                self.backend.new_buffer(self.window_size, self.input_size, dtype=self.clip_dtype)
+                for _ in range(self.batch_size)
+            ]
+            state = {"since": 0}
+            rows = []
+            while True:
+                stamps = await asyncio.to_thread(self._next_windows, frames, buf, windows, job, state)
+                if not stamps:
+                    break
+                await self._yield_to_live()
+                results = await self._predict(windows[:len(stamps)], job.subset)
+                job.windows += len(stamps)
+
+                for ts, pred in zip(stamps, results):
+                    if not pred or not pred.get("card_ids"):
+                        continue
+                    rows.append({
+                        "session_id": job.session_id,
+                        "gesture_card_id": pred["card_ids"][0],
+                        "detection_accuracy": pred["confidence"][0],
+                        "detected_at": job.started_at + timedelta(seconds=ts),
+                    })
+
+            if job.frames == 0:
+                raise UnreadableVideo("no frames in the recording")
+            await self._write(rows)
+            job.detections = len(rows)
+            job.status = "done"
+            self.done += 1
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "server shutting down"
+            raise
+        except UnreadableVideo as exc:
+            # The upload is no video OpenCV can read: the client's fault.
+            job.status = "failed"
+            job.error = "not a readable video"
+            self.failed += 1
+            logger.warning(f"recording job {job.job_id}: {exc}")
+        except Exception:
+            job.status = "failed"
+            job.error = "internal error"
+            self.failed += 1
+            logger.exception(f"recording job {job.job_id} failed")
+        finally:
+            if frames is not None:
+                frames.close()
+            for window in windows:
+                window.release()
+            job.finished_at = time.time()
+            jobs_total.inc(labels=(job.status,))
+            job_seconds.observe(time.perf_counter() - t0)
+            try:
+                os.unlink(job.path)
+            except FileNotFoundError:
+                pass
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status = "failed"
+            job.error = "server shutting down"
+            try:
+                os.unlink(job.path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        return {"queued": self.pending, "running": self.running, "done": self.done, "failed": self.failed}
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.backend.api.detection_writer import session_owned_by
+from app.backend.api.lesson_labels import lesson_for_session
+from app.backend.api.recording_jobs import JobQueueFull, RecordingJob
+from app.backend.api.telegram_auth import InitDataError
+from app.backend.api.ws import CFG, lesson_labels, recordings, verifier
+
+router = APIRouter(prefix="/api/v1", tags=["recordings"])
+
+_section = CFG.get("recordings") or {}
+MAX_BYTES = int(float(_section.get("max_mb", 200)) * 1024 * 1024)
+SPOOL_DIR = Path(_section.get("spool_dir") or Path(tempfile.gettempdir()) / "gestu-recordings")
+RETRY_AFTER_S = 30
+
+
+def _telegram_id(init_data: str | None) -> int:
+    if not init_data:
+        raise HTTPException(status_code=401, detail="No init data")
+    try:
+        return verifier.verify(init_data)["id"]
+    except InitDataError as exc:
+        raise HTTPException(status_code=401, detail=str(exc))
+
+
+def _lesson_subset(session_id: int, telegram_id: int):
+    if not session_owned_by(session_id, telegram_id):
+        return None
+    return lesson_labels.get(lesson_for_session(session_id))
+
+
+@router.post("/sessions/{session_id}/recording", status_code=202)
+async def upload_recording(
+    session_id: int,
+    request: Request,
+    started_at: datetime | None = None,
+    x_init_data: str | None = Header(default=None, alias="X-Telegram-Init-Data"),
+):
+    """
+    Score a recorded attempt of a practice session. The body is the video
+    file itself; ``started_at`` is when recording began (defaults to now)
+    and dates the stored detections. Returns a job to poll.
+    """
+    telegram_id = _telegram_id(x_init_data)
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > MAX_BYTES:
+        raise HTTPException(413, f"Recording larger than {MAX_BYTES // (1024 * 1024)} MB")
+
+    subset = await asyncio.to_thread(_lesson_subset, session_id, telegram_id)
+    if subset is None:
+        raise HTTPException(404, "Session not found")
+    if len(subset) == 0:
+        raise HTTPException(422, "The session's lesson has no cards the model can recognize")
+
+    SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=SPOOL_DIR, suffix=".video")
+    received = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > MAX_BYTES:
+                    raise HTTPException(413, f"Recording larger than {MAX_BYTES // (1024 * 1024)} MB")
+                f.write(chunk)
+        if received == 0:
+            raise HTTPException(422, "Empty recording")
+
+        job = RecordingJob(telegram_id, session_id, subset, Path(name), started_at or datetime.utcnow())
+        position = recordings.submit(job)
+    except JobQueueFull:
+        os.unlink(name)
+        return JSONResponse(
+            {"detail": "Too many recordings waiting, try again later"},
+            status_code=503,
+            headers={"Retry-After": str(RETRY_AFTER_S)},
+        )
+    except BaseException:
+        os.unlink(name)
+        raise
+    return {**job.to_dict(), "position": position}
+
+
+@router.get("/recordings/{job_id}")
+def recording_status(job_id: str, x_init_data: str | None = Header(default=None, alias="X-Telegram-Init-Data")):
+    telegram_id = _telegram_id(x_init_data)
+    job = recordings.get(job_id)
+    if job is None or job.telegram_id != telegram_id:
+        raise HTTPException(404, "Recording not found")
+    return job.to_dict()
@@ -1,23 +1,126 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from api.deps import get_db, get_current_user
-from db.models import GestureDetection
-from app.backend.api.schemas import DetectionsBulkIn
+from db.models import GestureDetection, PracticeSession
+from db.progress import add_detections
+from app.backend.api.schemas import DetectionIn, DetectionsBulkIn
 
 
 router = APIRouter(prefix="/api/v1", tags=["detections"])
 
+STREAM_CHUNK_ROWS = 1000
+# A DetectionIn line is ~150 bytes; anything far longer is not one.
+STREAM_MAX_LINE_BYTES = 4096
+COPY_MIN_ROWS = 500
+DETECTION_COLUMNS = ("session_id", "gesture_card_id", "detection_accuracy", "detected_at")
 
-@router.post("/detections/bulk")
-def post_detections(payload: DetectionsBulkIn, db: Session = Depends(get_db), user = Depends(get_current_user)):
-    for d in payload.items:
-        det = GestureDetection(
-            session_id=d.session_id,
-            gesture_card_id=d.gesture_card_id,
-            detection_accuracy=d.detection_accuracy,
-            detected_at=d.detected_at or datetime.utcnow()
+
+async def _check_sessions(db: AsyncSession, user_id: int, session_ids: set[int]):
+    owned = set((await db.execute(
+        select(PracticeSession.session_id)
+        .where(PracticeSession.session_id.in_(session_ids), PracticeSession.user_id == user_id)
+    )).scalars())
+    missing = session_ids - owned
+    if missing:
+        raise HTTPException(404, f"Session not found: {min(missing)}")
+
+
+async def _insert_rows(db: AsyncSession, rows: list[dict]):
+    """
+    Multi-row insert of detection rows: COPY on Postgres/asyncpg for large
+    batches, a single executemany INSERT everywhere else. The progress
+    rollup is updated in the same transaction.
+    """
+    if not rows:
+        return
+    if db.bind.dialect.name == "postgresql" and db.bind.dialect.driver == "asyncpg" and len(rows) >= COPY_MIN_ROWS:
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            GestureDetection.__tablename__,
+            records=[tuple(r[c] for c in DETECTION_COLUMNS) for r in rows],
+            columns=DETECTION_COLUMNS,
         )
-        db.add(det)
-    db.commit()
+    else:
+        await db.execute(insert(GestureDetection), rows)
+    await add_detections(db, rows)
+
+
+def _row(d: DetectionIn, now: datetime) -> dict:
+    return {
+        "session_id": d.session_id,
+        "gesture_card_id": d.gesture_card_id,
+        "detection_accuracy": d.detection_accuracy,
+        "detected_at": d.detected_at or now,
+    }
+
+
+@router.post("/detections/bulk")
+async def post_detections(payload: DetectionsBulkIn, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    if not payload.items:
+        return {"inserted": 0}
+    await _check_sessions(db, user.user_id, {d.session_id for d in payload.items})
+
+    now = datetime.utcnow()
+    await _insert_rows(db, [_row(d, now) for d in payload.items])
+    await db.commit()
     return {"inserted": len(payload.items)}
+
+
+@router.post("/detections/stream")
+async def post_detections_stream(request: Request, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    """
+    Same as /detections/bulk, but the body is NDJSON (one DetectionIn per
+    line) and is inserted in chunks while it is being received. A line
+    longer than STREAM_MAX_LINE_BYTES is refused with 413, so a body
+    without newlines cannot pile up in memory.
+    """
+    now = datetime.utcnow()
+    owned: set[int] = set()
+    rows: list[dict] = []
+    inserted = 0
+    line_no = 0
+    tail = b""
+
+    async def flush():
+        nonlocal inserted
+        new = {r["session_id"] for r in rows} - owned
+        if new:
+            await _check_sessions(db, user.user_id, new)
+            owned.update(new)
+        await _insert_rows(db, rows)
+        inserted += len(rows)
+        rows.clear()
+
+    def too_long():
+        return HTTPException(413, f"Line {line_no + 1} is longer than {STREAM_MAX_LINE_BYTES} bytes")
+
+    async def feed(line: bytes):
+        nonlocal line_no
+        if len(line) > STREAM_MAX_LINE_BYTES:
+            raise too_long()
+        line_no += 1
+        if not line.strip():
+            return
+        try:
+            rows.append(_row(DetectionIn.model_validate_json(line), now))
+        except ValidationError as exc:
+            raise HTTPException(422, f"Line {line_no}: {exc.errors()[0]['msg']}")
+        if len(rows) >= STREAM_CHUNK_ROWS:
+            await flush()
+
+    async for chunk in request.stream():
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            await feed(line)
+        if len(tail) > STREAM_MAX_LINE_BYTES:
+            raise too_long()
+    await feed(tail)
+    await flush()
+
+    await db.commit()
+    return {"inserted": inserted}
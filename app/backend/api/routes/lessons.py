@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from api.deps import get_db, get_current_user
+from api.catalog_cache import catalog, cached_json
 from db.models import Lesson, GestureCard
-from app.backend.api.schemas import LessonOut, GestureCardOut
+from app.backend.api.schemas import LessonOut, GestureCardOut, LessonWithCardsOut
 
 router = APIRouter(prefix="/api/v1", tags=["lessons"])
 
+_lessons_json = TypeAdapter(list[LessonOut])
+_cards_json = TypeAdapter(list[GestureCardOut])
+_catalog_json = TypeAdapter(list[LessonWithCardsOut])
+
 
 @router.get("/health")
 def health():
@@ -13,10 +21,35 @@ def health():
 
 
 @router.get("/lessons", response_model=list[LessonOut])
-def list_lessons(db: Session = Depends(get_db), user = Depends(get_current_user)):
-    return db.query(Lesson).order_by(Lesson.lesson_order).all()
+async def list_lessons(request: Request, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    async def build():
+        rows = (await db.execute(select(Lesson).order_by(Lesson.lesson_order))).scalars().all()
+        return _lessons_json.dump_json(_lessons_json.validate_python(rows, from_attributes=True))
+
+    return cached_json(request, *await catalog.get("lessons", build))
 
 
 @router.get("/lessons/{lesson_id}/cards", response_model=list[GestureCardOut])
-def list_cards(lesson_id: int, db: Session = Depends(get_db), user = Depends(get_current_user)):
-    return db.query(GestureCard).filter_by(lesson_id=lesson_id).all()
+async def list_cards(lesson_id: int, request: Request, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    async def build():
+        rows = (await db.execute(select(GestureCard).filter_by(lesson_id=lesson_id))).scalars().all()
+        # Raising keeps unknown ids out of the cache.
+        if not rows and await db.get(Lesson, lesson_id) is None:
+            raise HTTPException(404, "Lesson not found")
+        return _cards_json.dump_json(_cards_json.validate_python(rows, from_attributes=True))
+
+    return cached_json(request, *await catalog.get(("cards", lesson_id), build))
+
+
+@router.get("/catalog", response_model=list[LessonWithCardsOut])
+async def get_catalog(request: Request, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    """
+    All lessons with their gesture cards in one response.
+    """
+    async def build():
+        rows = (await db.execute(
+            select(Lesson).options(selectinload(Lesson.gesture_cards)).order_by(Lesson.lesson_order)
+        )).scalars().all()
+        return _catalog_json.dump_json(_catalog_json.validate_python(rows, from_attributes=True))
+
+    return cached_json(request, *await catalog.get("catalog", build))
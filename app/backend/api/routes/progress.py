@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.deps import get_db, get_current_user
+from db.models import CardProgressDaily, GestureCard
+from app.backend.api.schemas import ProgressOut, LessonProgressOut, CardProgressOut, DailyProgressOut
+
+# Everything here reads card_progress_daily only, never gesture_detections.
+router = APIRouter(prefix="/api/v1", tags=["progress"])
+
+P = CardProgressDaily
+_attempts = func.sum(P.attempts)
+_stats = (_attempts, func.sum(P.accuracy_sum), func.max(P.best_accuracy))
+
+
+def _stats_dict(attempts, acc_sum, best) -> dict:
+    attempts = int(attempts or 0)
+    return {
+        "attempts": attempts,
+        "mean_accuracy": acc_sum / attempts if attempts else None,
+        "best_accuracy": best,
+    }
+
+
+@router.get("/progress", response_model=ProgressOut)
+async def get_progress(db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    """
+    The user's overall accuracy and a per-lesson breakdown.
+    """
+    total = (await db.execute(
+        select(*_stats, func.count(func.distinct(P.gesture_card_id)), func.count(func.distinct(P.day)), func.max(P.day))
+        .where(P.user_id == user.user_id)
+    )).one()
+    lessons = (await db.execute(
+        select(GestureCard.lesson_id, *_stats, func.count(func.distinct(P.gesture_card_id)))
+        .join(GestureCard, GestureCard.card_id == P.gesture_card_id)
+        .where(P.user_id == user.user_id)
+        .group_by(GestureCard.lesson_id)
+        .order_by(GestureCard.lesson_id)
+    )).all()
+    return ProgressOut(
+        **_stats_dict(*total[:3]),
+        cards_practiced=total[3],
+        days_practiced=total[4],
+        last_day=total[5],
+        lessons=[
+            LessonProgressOut(lesson_id=r[0], **_stats_dict(*r[1:4]), cards_practiced=r[4])
+            for r in lessons
+        ],
+    )
+
+
+@router.get("/progress/cards", response_model=list[CardProgressOut])
+async def get_card_progress(lesson_id: int | None = None, db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    query = (
+        select(P.gesture_card_id, GestureCard.gesture_name, GestureCard.lesson_id, *_stats, func.max(P.day))
+        .join(GestureCard, GestureCard.card_id == P.gesture_card_id)
+        .where(P.user_id == user.user_id)
+        .group_by(P.gesture_card_id, GestureCard.gesture_name, GestureCard.lesson_id)
+        .order_by(GestureCard.lesson_id, P.gesture_card_id)
+    )
+    if lesson_id is not None:
+        query = query.where(GestureCard.lesson_id == lesson_id)
+    return [
+        CardProgressOut(gesture_card_id=r[0], gesture_name=r[1], lesson_id=r[2], **_stats_dict(*r[3:6]), last_day=r[6])
+        for r in (await db.execute(query)).all()
+    ]
+
+
+@router.get("/progress/daily", response_model=list[DailyProgressOut])
+async def get_daily_progress(days: int = Query(30, ge=1, le=366), db: AsyncSession = Depends(get_db), user = Depends(get_current_user)):
+    """
+    Attempts and accuracy per day over the last ``days`` days (UTC), oldest
+    first; days without practice are omitted.
+    """
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    rows = (await db.execute(
+        select(P.day, *_stats)
+        .where(P.user_id == user.user_id, P.day >= since)
+        .group_by(P.day)
+        .order_by(P.day)
+    )).all()
+    return [DailyProgressOut(day=r[0], **_stats_dict(*r[1:4])) for r in rows]
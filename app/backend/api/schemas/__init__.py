@@ -1,4 +1,5 @@
-from .lesson import LessonOut
+from .lesson import LessonOut, LessonWithCardsOut
 from .gesture_card import GestureCardOut
 from .session import SessionStartIn, SessionStartOut, SessionFinishIn
 from .detection import DetectionIn, DetectionsBulkIn
+from .progress import ProgressOut, LessonProgressOut, CardProgressOut, DailyProgressOut
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
+from .gesture_card import GestureCardOut
 
 
 class LessonOut(BaseModel):
@@ -10,3 +11,7 @@ class LessonOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class LessonWithCardsOut(LessonOut):
+    gesture_cards: List[GestureCardOut] = []
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Optional, List
+
+
+class ProgressStats(BaseModel):
+    attempts: int = 0
+    mean_accuracy: Optional[float] = None
+    best_accuracy: Optional[float] = None
+
+
+class LessonProgressOut(ProgressStats):
+    lesson_id: int
+    cards_practiced: int = 0
+
+
+class ProgressOut(ProgressStats):
+    cards_practiced: int = 0
+    days_practiced: int = 0
+    last_day: Optional[date] = None
+    lessons: List[LessonProgressOut] = []
+
+
+class CardProgressOut(ProgressStats):
+    gesture_card_id: int
+    gesture_name: str
+    lesson_id: int
+    last_day: date
+
+
+class DailyProgressOut(ProgressStats):
+    day: date
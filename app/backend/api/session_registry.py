@@ -0,0 +1,74 @@
+import time
+
+
+class SessionRegistry:
+    """
+    Live /ws/gesture sessions and the memory their frame windows hold.
+
+    A session calls ``reserve`` before it allocates its window. If that
+    would take the total over ``budget_bytes``, the windows of sessions that
+    have not sent a frame for ``evict_idle_s`` are released first, longest
+    idle first; if that is not enough the reservation fails and the caller
+    turns the socket away. A budget of 0 means no limit.
+
+    Sessions are duck-typed: they need ``nbytes``, ``busy``, ``holds_window``,
+    ``last_frame_at`` (monotonic seconds) and ``release_window()``.
+    """
+
+    def __init__(self, budget_bytes: int = 0, evict_idle_s: float = 2.0):
+        self.budget_bytes = max(0, int(budget_bytes))
+        self.evict_idle_s = float(evict_idle_s)
+        self._sessions: set = set()
+
+        self.evicted = 0
+        self.refused = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def add(self, session):
+        self._sessions.add(session)
+
+    def discard(self, session):
+        self._sessions.discard(session)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(s.nbytes for s in self._sessions)
+
+    @property
+    def windows(self) -> int:
+        return sum(1 for s in self._sessions if s.holds_window)
+
+    def reserve(self, session, nbytes: int) -> bool:
+        if not self.budget_bytes:
+            return True
+        total = self.nbytes
+        if total + nbytes <= self.budget_bytes:
+            return True
+
+        now = time.monotonic()
+        idle = sorted(
+            (s for s in self._sessions
+             if s is not session and s.holds_window and not s.busy
+             and now - s.last_frame_at >= self.evict_idle_s),
+            key=lambda s: s.last_frame_at,
+        )
+        for other in idle:
+            total -= other.nbytes
+            other.release_window()
+            self.evicted += 1
+            if total + nbytes <= self.budget_bytes:
+                return True
+        self.refused += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self),
+            "windows": self.windows,
+            "bytes": self.nbytes,
+            "budget_bytes": self.budget_bytes,
+            "evicted": self.evicted,
+            "refused": self.refused,
+        }
@@ -0,0 +1,86 @@
+"""
+Startup timing and readiness of the gesture server (api_main.py).
+
+Each startup phase (heavy imports, config, model load, first inference) is
+timed and exported as ``gestu_startup_seconds{phase=...}``. The model is
+loaded and warmed up in the background after the server starts listening:
+``/health`` answers as soon as the process serves requests, ``/ready``
+returns 503 until the warm-up has finished (or while a readiness check,
+such as "some inference worker is reachable", fails).
+"""
+import time
+from contextlib import contextmanager
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.backend.api.metrics import registry
+
+startup_seconds = registry.gauge("gestu_startup_seconds", "Duration of each startup phase.", ("phase",))
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.info: dict = {}
+        self.error: str | None = None
+        self._ready = False
+        self._checks: dict = {}
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = seconds
+        startup_seconds.set(seconds, (name,))
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def add_check(self, name: str, fn):
+        """
+        ``fn()`` must stay truthy for the server to be reported ready.
+        """
+        self._checks[name] = fn
+
+    def mark_ready(self):
+        self.record("total", time.perf_counter() - self.started_at)
+        self._ready = True
+
+    def fail(self, exc: BaseException):
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def failing(self) -> list[str]:
+        return [name for name, fn in self._checks.items() if not fn()]
+
+    @property
+    def ready(self) -> bool:
+        return self._ready and self.error is None and not self.failing()
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            **self.info,
+            "phases": {name: round(s, 4) for name, s in self.phases.items()},
+            "failing": self.failing(),
+            "error": self.error,
+        }
+
+
+timer = StartupTimer()
+
+router = APIRouter(tags=["startup"])
+
+
+@router.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    report = timer.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
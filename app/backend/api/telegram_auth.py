@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import json
+import time
+import urllib.parse
+from collections import OrderedDict
+from threading import Lock
+
+
+class InitDataError(ValueError):
+    pass
+
+
+class InitDataVerifier:
+    """
+    Verifies Telegram Mini App ``initData`` and remembers the result.
+
+    The HMAC secret derived from the bot token is computed once. Verified
+    identities are cached by the SHA-256 of the raw init data for ``ttl_s``,
+    but never past ``auth_date + max_age_s``; init data older than
+    ``max_age_s`` is rejected (0 disables the age check).
+    """
+
+    def __init__(self, bot_token: str, ttl_s: float = 300.0, max_age_s: float = 86400.0,
+                 maxsize: int = 10000):
+        self.bot_token = bot_token
+        self.ttl_s = float(ttl_s)
+        self.max_age_s = float(max_age_s)
+        self.maxsize = int(maxsize)
+        self._secret = hashlib.sha256(bot_token.encode()).digest()
+        self._cache: "OrderedDict[bytes, tuple[float, dict]]" = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _check(self, init_data_raw: str, now: float) -> tuple[dict, float]:
+        parsed = dict(urllib.parse.parse_qsl(init_data_raw, keep_blank_values=True))
+        if 'hash' not in parsed:
+            raise InitDataError("Missing hash")
+        received_hash = parsed.pop('hash')
+
+        data_check_string = "\n".join(f"{k}={parsed[k]}" for k in sorted(parsed.keys()))
+        h = hmac.new(self._secret, msg=data_check_string.encode(), digestmod=hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(h, received_hash):
+            raise InitDataError("Bad signature")
+
+        user_json = parsed.get("user")
+        if not user_json:
+            raise InitDataError("No user")
+
+        expires_at = now + self.ttl_s
+        if self.max_age_s > 0:
+            try:
+                auth_date = float(parsed["auth_date"])
+            except (KeyError, ValueError):
+                raise InitDataError("No auth_date")
+            if now - auth_date > self.max_age_s:
+                raise InitDataError("Init data expired")
+            expires_at = min(expires_at, auth_date + self.max_age_s)
+
+        return json.loads(user_json), expires_at
+
+    def verify(self, init_data_raw: str) -> dict:
+        key = hashlib.sha256(init_data_raw.encode()).digest()
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._cache[key]
+            self.misses += 1
+
+        user, expires_at = self._check(init_data_raw, now)
+
+        with self._lock:
+            self._cache[key] = (expires_at, user)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return user
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+
+class UserIdCache:
+    """
+    In-process LRU of telegram_id -> user_id so authenticated requests from a
+    known user skip the users table entirely.
+    """
+
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = int(maxsize)
+        self._items: "OrderedDict[int, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> int | None:
+        user_id = self._items.get(telegram_id)
+        if user_id is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(telegram_id)
+        self.hits += 1
+        return user_id
+
+    def put(self, telegram_id: int, user_id: int):
+        self._items[telegram_id] = user_id
+        self._items.move_to_end(telegram_id)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
@@ -1,16 +1,30 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import asyncio
-import base64
 import json
 import time
 from pathlib import Path
-from collections import deque
 import numpy as np
-import cv2
 import os
 import logging
 
-from app.backend.ml.easy_sign.runtime import Predictor
+from app.backend.ml.easy_sign.runtime import load_labels, resolve_variant
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+from app.backend.ml.easy_sign.feature_cache import FeatureCache, make_predictor
+from app.backend.ml.easy_sign.frames import FRAME_HEADER, parse_frame_header
+from app.backend.ml.easy_sign.stride import StrideGate
+from app.backend.ml.easy_sign.smoothing import build_decoder
+from app.backend.ml.easy_sign.roi import RoiTracker
+from app.backend.api.inference import InferenceScheduler, ThreadBackend
+from app.backend.api.lesson_labels import LessonLabelCache, lesson_for_session
+from app.backend.api.metrics import registry
+from app.backend.api.startup import timer
+from app.backend.api.load_control import AdmissionControl, RateController
+from app.backend.api.detection_writer import DetectionWriter, session_owned_by
+from app.backend.api.recording_jobs import RecordingJobs
+from app.backend.api.session_registry import SessionRegistry
+from app.backend.api.keepalive import KeepaliveScheduler
+from app.backend.api.telegram_auth import InitDataError, InitDataVerifier
+from app.backend.db.requests import on_catalog_change
 
 router = APIRouter()
 
@@ -22,161 +36,530 @@ if not logger.handlers:
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 CFG_PATH = BACKEND_DIR / "ml" / "easy_sign" / "config.json"
 
-with open(CFG_PATH, "r", encoding="utf-8") as f:
-    CFG = json.load(f)
+with timer.phase("config"):
+    with open(CFG_PATH, "r", encoding="utf-8") as f:
+        CFG = json.load(f)
 
-CFG.setdefault("provider", "CPUExecutionProvider")
+    CFG.setdefault("provider", "CPUExecutionProvider")
+    CFG = resolve_variant(CFG)
 
-predictor = Predictor(CFG)
 WINDOW_SIZE = int(CFG.get("window_size", 32))
-
-
-def decode_frame_bgr224(data_url: str) -> np.ndarray:
-    _, encoded = data_url.split(",", 1)
-    img_bytes = base64.b64decode(encoded)
-    img = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
-    if img is None:
-        raise ValueError
-    img = cv2.resize(img, (224, 224), interpolation=cv2.INTER_LINEAR)
-    return img
+INPUT_SIZE = int(CFG.get("input_size", 224))
+CLIP_DTYPE = np.dtype(CFG.get("clip_buffer_dtype", "uint8"))
+
+# "thread": one Predictor in this process; "process": decode + inference in a
+# pool of worker processes, each with its own model (see process_pool.py);
+# "remote": decode here, inference on standalone workers reached over Unix
+# sockets (see worker_server.py and remote_pool.py).
+WORKER_MODE = os.getenv("GESTU_WORKER_MODE", CFG.get("worker_mode", "thread"))
+
+# Feature-cache mode (backbone/head split, see feature_cache.py) keeps
+# per-socket backbone features next to the Predictor, so it needs thread mode.
+FEATURE_CACHE = bool((CFG.get("feature_cache") or {}).get("enabled"))
+if FEATURE_CACHE and WORKER_MODE != "thread":
+    raise ValueError(f"feature_cache needs worker_mode \"thread\", not {WORKER_MODE!r}; disable it or switch modes")
+CHUNK_FRAMES = int((CFG.get("feature_cache") or {}).get("chunk_frames", 8))
+
+# No backend loads the model here: ThreadBackend does so on warm-up (see
+# api_main.py) or on the first batch, pool and remote workers in their own
+# processes.
+if WORKER_MODE == "process":
+    from app.backend.ml.easy_sign.process_pool import ProcessBackend
+
+    backend = ProcessBackend(CFG, processes=int(CFG.get("worker_processes", 2)))
+elif WORKER_MODE == "remote":
+    from app.backend.ml.easy_sign.remote_pool import RemoteBackend
+
+    backend = RemoteBackend.from_config(CFG)
+else:
+    backend = ThreadBackend(factory=lambda: make_predictor(CFG))
+
+lesson_labels = LessonLabelCache(load_labels(CFG), ttl_s=float(CFG.get("lesson_labels_ttl_s", 300.0)))
+on_catalog_change(lesson_labels.invalidate)
+
+scheduler = InferenceScheduler(
+    backend,
+    max_batch_size=int(CFG.get("batch_max_size", 8)),
+    max_wait_ms=float(CFG.get("batch_max_wait_ms", 20.0)),
+)
+
+# Confirmed detections of sockets bound to a practice session are stored
+# server-side, in batches, instead of being posted back by the client.
+writer = DetectionWriter(
+    flush_rows=int(CFG.get("detection_flush_rows", 200)),
+    flush_interval_s=float(CFG.get("detection_flush_interval_s", 1.0)),
+    max_rows=int(CFG.get("detection_queue_max", 10000)),
+)
+
+
+# Uploaded practice recordings, scored in the background on the same backend
+# as the sockets (see recording_jobs.py and recordings.py).
+recordings = RecordingJobs.from_config(CFG, backend, scheduler)
+
+admission = AdmissionControl(
+    max_sessions=int(CFG.get("max_sessions", 0)),
+    max_waiting=int(CFG.get("max_waiting_sessions", 0)),
+    wait_s=float(CFG.get("admission_wait_s", 15.0)),
+)
+BUSY_RETRY_AFTER_S = 5
+
+# Pings for all sockets come from one task (see keepalive.py).
+keepalive = KeepaliveScheduler.from_config(CFG)
+
+# Each session's frame window is allocated on its first frame and released
+# after SESSION_IDLE_RELEASE_S without frames; the registry keeps the windows
+# of all sessions under "sessions_memory_budget_mb" (0 = no limit).
+MAX_FRAME_BYTES = int(CFG.get("max_frame_bytes", 1 << 20))
+SESSION_IDLE_RELEASE_S = float(CFG.get("session_idle_release_s", 30.0))
+WINDOW_BYTES = ClipBuffer.ring_nbytes(WINDOW_SIZE, INPUT_SIZE, dtype=CLIP_DTYPE)
+if WORKER_MODE == "thread":
+    # ThreadBackend also materializes the window as a float32 model input.
+    WINDOW_BYTES += ClipBuffer.ring_nbytes(WINDOW_SIZE, INPUT_SIZE)
+sessions = SessionRegistry(budget_bytes=int(float(CFG.get("sessions_memory_budget_mb", 0)) * 1024 * 1024))
+
+frames_received = registry.counter("gestu_ws_frames_received_total", "Frames received on /ws/gesture.")
+frames_dropped_total = registry.counter(
+    "gestu_ws_frames_dropped_total", "Frames replaced by a newer one before they were decoded."
+)
+decode_errors = registry.counter("gestu_ws_decode_errors_total", "Frames that failed to decode.")
+detections_total = registry.counter("gestu_ws_detections_total", "Words sent to clients.")
+decode_seconds = registry.histogram("gestu_ws_decode_seconds", "Frame decode time, including the hop to the worker.")
+frame_to_word_seconds = registry.histogram(
+    "gestu_ws_frame_to_word_seconds", "From receiving the frame that completed a word to sending the word."
+)
+registry.gauge("gestu_ws_active_sockets", "Sockets being served.", fn=lambda: admission.active)
+registry.gauge("gestu_ws_waiting_sockets", "Sockets waiting for a slot.", fn=lambda: admission.waiting)
+registry.gauge("gestu_ws_refused_sockets", "Sockets refused since start.", fn=lambda: admission.refused)
+registry.gauge("gestu_ws_session_bytes", "Memory held by all sessions' frame windows.", fn=lambda: sessions.nbytes)
+registry.gauge("gestu_ws_windows", "Sessions currently holding a frame window.", fn=lambda: sessions.windows)
+registry.gauge("gestu_ws_windows_evicted", "Idle windows released to stay under the memory budget.", fn=lambda: sessions.evicted)
+idle_releases = registry.counter("gestu_ws_idle_releases_total", "Frame windows released after the session went idle.")
+registry.gauge("gestu_ws_keepalive_peers", "Sockets in the keepalive schedule.", fn=lambda: keepalive.peers)
+registry.gauge("gestu_infer_queue_depth", "Clips queued for inference.", fn=lambda: scheduler.pending)
+registry.gauge("gestu_recording_jobs_queued", "Uploaded recordings waiting to be scored.", fn=lambda: recordings.pending)
+if WORKER_MODE == "remote":
+    registry.gauge("gestu_infer_workers_healthy", "Reachable inference workers.", fn=lambda: backend.healthy)
+    registry.gauge("gestu_infer_failovers", "Batches retried on another worker.", fn=lambda: backend.failovers)
+
+verifier = InitDataVerifier(
+    os.getenv("TOKEN", ""),
+    ttl_s=float(os.getenv("AUTH_CACHE_TTL_S", "300")),
+    max_age_s=float(os.getenv("AUTH_MAX_AGE_S", "86400")),
+)
+
+
+BINARY_SUBPROTOCOL = "gestu.frames.v1"
+
+
+def negotiate_protocol(ws: WebSocket) -> tuple[bool, str | None]:
+    """
+    Binary frames are enabled when the client offers the ``gestu.frames.v1``
+    subprotocol or connects with ``?proto=binary``. Anything else stays on the
+    JSON data-URL protocol.
+    """
+    offered = ws.scope.get("subprotocols") or []
+    if BINARY_SUBPROTOCOL in offered:
+        return True, BINARY_SUBPROTOCOL
+    return ws.query_params.get("proto") == "binary", None
+
+
+def _int_param(ws: WebSocket, name: str) -> int | None:
+    try:
+        return int(ws.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def resolve_subset(lesson_id: int | None, session_id: int | None, card_id: int | None):
+    """
+    Label subset for ``?lesson_id=`` (or the lesson of ``?session_id=``), with
+    ``?card_id=`` as the expected card. None when no lesson is given.
+    """
+    if lesson_id is None and session_id is not None:
+        lesson_id = lesson_for_session(session_id)
+    if lesson_id is None:
+        return None
+    subset = lesson_labels.get(lesson_id)
+    if len(subset) == 0:
+        return None
+    return subset.with_expected(card_id)
+
+
+def bind_session(session_id: int | None, init_data: str | None) -> int | None:
+    """
+    ``session_id`` if ``init_data`` (the Telegram Mini App initData, sent in
+    an ``auth`` message since browsers cannot set headers on a WebSocket and
+    query strings end up in access logs) is valid and belongs to the owner
+    of that practice session, else None.
+    """
+    if session_id is None or not init_data:
+        return None
+    try:
+        user = verifier.verify(init_data)
+    except InitDataError:
+        return None
+    return session_id if session_owned_by(session_id, user["id"]) else None
+
+
+async def admit(ws: WebSocket) -> bool:
+    """
+    Take a session slot, waiting in line if the server is full. A socket that
+    gets no slot is told so and closed with 1013 (try again later).
+    """
+    if admission.try_acquire():
+        return True
+    if admission.can_wait():
+        await ws.send_json({"type": "busy", "status": "queued", "position": admission.waiting + 1})
+        if await admission.wait():
+            return True
+    else:
+        admission.refuse()
+    await ws.send_json({"type": "busy", "status": "refused", "retry_after_s": BUSY_RETRY_AFTER_S})
+    await ws.close(code=1013, reason="server busy")
+    return False
 
 
 @router.websocket("/ws/gesture")
 async def gesture_ws(ws: WebSocket):
-    await ws.accept()
-
-    alive = True
-
-    infer_every_s = 0.6
-    last_infer = 0.0
-
-    ping_interval_s = 10.0
-    last_ping = 0.0
-
-    q: asyncio.Queue[str] = asyncio.Queue(maxsize=1)
-    frames = deque(maxlen=WINDOW_SIZE)
-
-    last_sent_word = ""
-    last_sent_at = 0.0
-    cooldown_s = 0.8
-
-    last_preds = deque(maxlen=3)
-
-    frames_in = 0
-    frames_dropped = 0
-    decode_ok = 0
-    decode_err = 0
-    infer_n = 0
-    last_debug = 0.0
-
-    async def receiver():
-        nonlocal alive, frames_in, frames_dropped
-        try:
-            while True:
-                msg = await ws.receive_json()
-                if msg.get("type") != "frame":
-                    continue
-                data = msg.get("data")
-                if not isinstance(data, str):
-                    continue
-                frames_in += 1
-                if q.full():
-                    frames_dropped += 1
-                    try:
-                        q.get_nowait()
-                    except Exception:
-                        pass
-                q.put_nowait(data)
-        except WebSocketDisconnect:
-            alive = False
-            raise
-
-    async def pinger():
-        nonlocal last_ping, alive
-        while alive:
-            await asyncio.sleep(1.0)
-            now = time.monotonic()
-            if (now - last_ping) >= ping_interval_s:
-                last_ping = now
-                await ws.send_json({"type": "ping", "ts": time.time()})
-
-    recv_task = asyncio.create_task(receiver())
-    ping_task = asyncio.create_task(pinger())
+    binary_mode, subprotocol = negotiate_protocol(ws)
+    await ws.accept(subprotocol=subprotocol)
+    try:
+        if not await admit(ws):
+            return
+    except (WebSocketDisconnect, RuntimeError):
+        return
 
+    session = None
     try:
-        while alive:
+        session = await GestureSession.start(ws, binary_mode)
+        sessions.add(session)
+        await session.run()
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("gesture socket failed")
+        try:
+            await ws.send_json({"type": "error", "reason": "internal_error"})
+            await ws.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        admission.release()
+        if session is not None:
+            sessions.discard(session)
+            await session.close()
+
+
+class GestureSession:
+    """
+    State of one /ws/gesture connection, driven by a single loop in ``run``.
+
+    The loop waits for whichever comes first: the next message or the frame
+    being processed. A frame that arrives while another one is being decoded
+    or scored replaces the one waiting, so at most one frame is pending and
+    the socket needs no receiver task of its own. Pings come from the shared
+    KeepaliveScheduler, which also calls ``on_tick`` after each ping and
+    ``kill`` when the client stopped answering.
+
+    The frame window is allocated on the first frame, once the session
+    registry admits it under the memory budget, released again on the first
+    tick after SESSION_IDLE_RELEASE_S without frames, and allocated anew
+    when frames come back.
+
+    A client that practices a ``?session_id=`` binds the socket to it by
+    sending ``{"type": "auth", "init_data": ...}``, normally as its first
+    message; only the first auth message counts.
+    """
+
+    __slots__ = (
+        "ws", "binary_mode", "subset", "session_id", "auth", "bound_session", "rate", "gate", "roi", "decoder",
+        "frames", "window", "pending", "alive", "dead", "busy", "recv", "peer", "last_frame_at", "last_debug",
+        "frames_in", "frames_dropped", "decode_ok", "decode_err", "infer_n",
+    )
+
+    def __init__(self, ws: WebSocket, binary_mode: bool, rate: RateController, subset, session_id: int | None):
+        self.ws = ws
+        self.binary_mode = binary_mode
+        self.subset = subset
+        self.session_id = session_id
+        # initData of an auth message not checked yet; "" once one was.
+        self.auth: str | None = None
+        self.bound_session = None
+        self.rate = rate
+        self.gate = StrideGate.from_config(CFG)
+        self.roi = RoiTracker.from_config(CFG)
+        self.decoder = build_decoder(CFG, lesson_labels.labels, subset)
+
+        self.frames = None
+        # What goes to the scheduler: the buffer itself, or its feature cache.
+        self.window = None
+        self.pending: tuple[int | None, str | bytes, float] | None = None
+        self.alive = True
+        self.dead = False
+        self.busy = False
+        self.recv: asyncio.Future | None = None
+        self.peer = None
+
+        self.last_frame_at = time.monotonic()
+        self.last_debug = 0.0
+
+        self.frames_in = 0
+        self.frames_dropped = 0
+        self.decode_ok = 0
+        self.decode_err = 0
+        self.infer_n = 0
+
+    @classmethod
+    async def start(cls, ws: WebSocket, binary_mode: bool) -> "GestureSession":
+        rate = RateController.from_config(CFG, size=INPUT_SIZE)
+        await ws.send_json({
+            "type": "hello",
+            "protocol": "binary" if binary_mode else "json",
+            "header": FRAME_HEADER.format if binary_mode else None,
+            "rate": rate.settings(),
+        })
+
+        session_id = _int_param(ws, "session_id")
+        subset = await asyncio.to_thread(
+            resolve_subset, _int_param(ws, "lesson_id"), session_id, _int_param(ws, "card_id")
+        )
+        return cls(ws, binary_mode, rate, subset, session_id)
+
+    async def authenticate(self):
+        init_data, self.auth = self.auth, ""
+        self.bound_session = await asyncio.to_thread(bind_session, self.session_id, init_data)
+        await self.ws.send_json({
+            "type": "session", "session_id": self.session_id, "bound": self.bound_session is not None,
+        })
+
+    @property
+    def holds_window(self) -> bool:
+        return self.frames is not None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory held for this socket: the window (at least what was reserved
+        for it), cached features and the pending frame.
+        """
+        total = 0
+        if self.frames is not None:
+            total += max(self.frames.nbytes, WINDOW_BYTES)
+        if isinstance(self.window, FeatureCache):
+            total += self.window.nbytes
+        if self.pending is not None:
+            total += len(self.pending[1])
+        return total
+
+    def allocate_window(self) -> bool:
+        if not sessions.reserve(self, WINDOW_BYTES):
+            return False
+        self.frames = backend.new_buffer(WINDOW_SIZE, INPUT_SIZE, dtype=CLIP_DTYPE)
+        self.window = FeatureCache(self.frames, CHUNK_FRAMES) if FEATURE_CACHE else self.frames
+        return True
+
+    def release_window(self):
+        if self.frames is None:
+            return
+        self.frames.release()
+        self.frames = None
+        self.window = None
+        self.gate.reset()
+        self.decoder.reset()
+        if self.roi is not None:
+            self.roi.reset()
+
+    def on_message(self, message: dict):
+        self.peer.seen()
+        raw = message.get("bytes")
+        if raw is not None:
+            if not self.binary_mode:
+                return
             try:
-                data_url = await asyncio.wait_for(q.get(), timeout=2.0)
-            except asyncio.TimeoutError:
-                continue
-
+                seq = parse_frame_header(raw).seq
+            except ValueError:
+                return
+            data = raw
+        else:
             try:
-                frame = await asyncio.to_thread(decode_frame_bgr224, data_url)
-                decode_ok += 1
-            except Exception:
-                decode_err += 1
-                continue
-
-            frames.append(frame)
-
-            now = time.monotonic()
-
-            if DEBUG_WS and (now - last_debug) > 1.0:
-                last_debug = now
-                logger.info(
-                    f"frames_in={frames_in} dropped={frames_dropped} "
-                    f"decode_ok={decode_ok} decode_err={decode_err} "
-                    f"buf={len(frames)}/{WINDOW_SIZE} infer={infer_n}"
-                )
-
-            if len(frames) < WINDOW_SIZE:
-                continue
-            if (now - last_infer) < infer_every_s:
-                continue
-
-            last_infer = now
-
-            pred = await asyncio.to_thread(predictor.predict, list(frames))
-            infer_n += 1
-
-            if not pred:
-                continue
-
-            word = pred["labels"].get(0, "")
-            conf = float(pred["confidence"].get(0, 0.0))
-
-            if conf < 0.6:
-                continue
-
-            last_preds.append(word)
-            if len(last_preds) < 3:
-                continue
-            if not all(w == word for w in last_preds):
-                continue
-
-            if (now - last_sent_at) < cooldown_s and word == last_sent_word:
-                continue
-
-            last_sent_word = word
-            last_sent_at = now
+                msg = json.loads(message.get("text") or "")
+            except ValueError:
+                return
+            if not isinstance(msg, dict):
+                return
+            if msg.get("type") == "pong":
+                self.peer.pong(msg.get("ts"))
+                return
+            if msg.get("type") == "auth":
+                if self.auth is None and isinstance(msg.get("init_data"), str):
+                    self.auth = msg["init_data"]
+                return
+            if msg.get("type") != "frame":
+                return
+            data = msg.get("data")
+            if not isinstance(data, str):
+                return
+            seq = msg.get("seq")
+
+        self.frames_in += 1
+        frames_received.inc()
+        self.last_frame_at = time.monotonic()
+        if len(data) > MAX_FRAME_BYTES:
+            self.decode_err += 1
+            decode_errors.inc()
+            return
+        if self.pending is not None:
+            self.frames_dropped += 1
+            frames_dropped_total.inc()
+        self.pending = (seq, data, time.perf_counter())
+
+    def on_tick(self, now: float):
+        if self.frames is not None and not self.busy and now - self.last_frame_at >= SESSION_IDLE_RELEASE_S:
+            self.release_window()
+            idle_releases.inc()
+
+    def kill(self):
+        """
+        Stop the session from outside its loop (dead peer).
+        """
+        self.alive = False
+        self.dead = True
+        if self.recv is not None:
+            self.recv.cancel()
+
+    async def run(self):
+        self.peer = keepalive.add(self.ws, self.kill, self.on_tick)
+        self.recv = asyncio.ensure_future(self.ws.receive())
+        work = None
+        try:
+            while self.alive:
+                waiting = {self.recv} if work is None else {self.recv, work}
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if self.dead:
+                    await self._close_dead()
+                    return
+                if not self.alive:
+                    return
+
+                if self.recv in done:
+                    message = self.recv.result()
+                    if message["type"] == "websocket.disconnect":
+                        return
+                    self.on_message(message)
+                    self.recv = asyncio.ensure_future(self.ws.receive())
+                    if self.auth:
+                        await self.authenticate()
+
+                if work is not None and work.done():
+                    work.result()
+                    work = None
+                if work is None and self.pending is not None:
+                    work = asyncio.ensure_future(self.process(*self.pending))
+                    self.pending = None
+        finally:
+            futures = [f for f in (self.recv, work) if f is not None]
+            for f in futures:
+                f.cancel()
+            await asyncio.gather(*futures, return_exceptions=True)
+
+    async def _close_dead(self):
+        # The peer may be gone for good; do not wait long for the close frame.
+        try:
+            await asyncio.wait_for(self.ws.close(code=1001, reason="keepalive timeout"), timeout=2.0)
+        except Exception:
+            pass
 
-            if DEBUG_WS:
-                logger.info(f"DETECTED word={word} conf={conf:.3f}")
+    async def process(self, seq: int | None, data: str | bytes, received_at: float):
+        if self.frames is None and not self.allocate_window():
+            await self.ws.send_json({"type": "busy", "status": "refused", "retry_after_s": BUSY_RETRY_AFTER_S})
+            await self.ws.close(code=1013, reason="server busy")
+            self.alive = False
+            return
 
-            await ws.send_json({"word": word, "confidence": conf})
+        self.busy = True
+        try:
+            await self._process(seq, data, received_at)
+        finally:
+            self.busy = False
 
-            tail = list(frames)[-8:]
-            frames.clear()
-            frames.extend(tail)
-            last_preds.clear()
+    async def _process(self, seq: int | None, data: str | bytes, received_at: float):
+        frames = self.frames
+        t0 = time.perf_counter()
+        try:
+            await backend.decode_into(frames, data, self.roi)
+            self.decode_ok += 1
+        except Exception:
+            self.decode_err += 1
+            decode_errors.inc()
+            return
+        decode_seconds.observe(time.perf_counter() - t0)
+
+        update = self.rate.update(
+            self.frames_in, self.frames_dropped, self.decode_ok + self.decode_err, scheduler.load
+        )
+        if update is not None:
+            await self.ws.send_json(update)
+
+        now = time.monotonic()
+
+        if DEBUG_WS and (now - self.last_debug) > 1.0:
+            self.last_debug = now
+            logger.info(
+                f"frames_in={self.frames_in} dropped={self.frames_dropped} "
+                f"decode_ok={self.decode_ok} decode_err={self.decode_err} "
+                f"buf={len(frames)}/{WINDOW_SIZE} infer={self.infer_n} "
+                f"stride={self.gate.current_stride(scheduler.load)} skipped={self.gate.skipped} "
+                f"fps={self.rate.fps:.1f} quality={self.rate.quality} bytes={self.nbytes}"
+            )
+
+        if not self.gate.should_run(frames, scheduler.load):
+            return
 
-    except WebSocketDisconnect:
-        pass
-    finally:
-        alive = False
-        recv_task.cancel()
-        ping_task.cancel()
         try:
-            await asyncio.gather(recv_task, ping_task)
+            pred = await scheduler.predict(self.window, self.subset)
         except Exception:
-            pass
+            # Logged by the scheduler; the socket stays open for the next clip.
+            await self.ws.send_json({"type": "error", "reason": "inference_failed"})
+            return
+        self.infer_n += 1
+
+        if not pred:
+            return
+
+        if pred.get("expected_confidence") is not None:
+            await self.ws.send_json({
+                "type": "score",
+                "card_id": int(self.subset.card_ids[self.subset.expected]),
+                "confidence": pred["expected_confidence"],
+            })
+
+        confirmed = self.decoder.update(pred, now)
+        if confirmed is None:
+            return
+        word, conf, card_id = confirmed
+
+        if DEBUG_WS:
+            logger.info(f"DETECTED word={word} conf={conf:.3f}")
+
+        reply = {"word": word, "confidence": conf}
+        if card_id is not None:
+            reply["card_id"] = card_id
+        if seq is not None:
+            reply["seq"] = seq
+        if self.bound_session is not None and reply.get("card_id") is not None:
+            writer.submit(self.bound_session, reply["card_id"], conf)
+            reply["stored"] = True
+        await self.ws.send_json(reply)
+        detections_total.inc()
+        frame_to_word_seconds.observe(time.perf_counter() - received_at)
+
+        self.window.keep_last(8)
+        self.gate.reset()
+
+    async def close(self):
+        self.alive = False
+        if self.peer is not None:
+            keepalive.remove(self.peer)
+        self.release_window()
+        if self.bound_session is not None:
+            await writer.flush(self.bound_session)
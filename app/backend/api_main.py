@@ -1,5 +1,67 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.backend.api.ws import router as ws_router
+from app.backend.api.startup import router as startup_router, timer
 
-app = FastAPI()
+# Heavy imports are timed one by one; ws pulls in all of them anyway.
+with timer.phase("import_cv2"):
+    import cv2  # noqa: F401
+with timer.phase("import_onnxruntime"):
+    import onnxruntime  # noqa: F401
+with timer.phase("import_einops"):
+    import einops  # noqa: F401
+with timer.phase("import_app"):
+    from app.backend.api.ws import (
+        router as ws_router, scheduler, writer, recordings, keepalive, backend, CFG, WORKER_MODE,
+    )
+    from app.backend.api.recordings import router as recordings_router
+    from app.backend.api import metrics
+    from app.backend.db import engine, async_engine
+
+logger = logging.getLogger("gesture_ws")
+
+timer.info.update({"worker_mode": WORKER_MODE, "model_variant": CFG.get("model_variant")})
+if WORKER_MODE == "remote":
+    timer.add_check("inference_workers", lambda: backend.healthy > 0)
+
+
+async def warm_up():
+    """
+    Load the model and run a dummy clip in the background, so the server
+    listens (and answers /health) right away and /ready flips once the
+    first real clip would not pay the cold start.
+    """
+    try:
+        for phase, seconds in (await backend.warmup()).items():
+            timer.record(phase, seconds)
+    except Exception as exc:
+        logger.exception("model warm-up failed")
+        timer.fail(exc)
+        return
+    timer.mark_ready()
+    logger.info(f"ready: {timer.report()['phases']}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = None
+    if CFG.get("warmup_on_start", True):
+        task = asyncio.create_task(warm_up())
+    else:
+        timer.mark_ready()
+    yield
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    await keepalive.close()
+    await recordings.close()
+    await scheduler.close()
+    await writer.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.include_router(startup_router)
 app.include_router(ws_router)
+app.include_router(recordings_router)
+metrics.install(app, (engine, async_engine))
@@ -1,14 +1,57 @@
+import os
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 Base = declarative_base()
 
-DATABASE_URL = "sqlite:///gesture_language.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///gesture_language.db")
+SQL_ECHO = os.getenv("GESTU_SQL_ECHO", "0") == "1"
+
+_SYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgresql+asyncpg": "postgresql+psycopg2",
+    "postgresql+psycopg_async": "postgresql+psycopg2",
+}
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def _with_driver(url: str, drivers: dict) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{drivers.get(scheme, scheme)}{sep}{rest}"
+
 
-engine = create_engine(DATABASE_URL, echo=True)
+def _pool_kwargs(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+    }
+
+
+SYNC_DATABASE_URL = _with_driver(DATABASE_URL, _SYNC_DRIVERS)
+ASYNC_DATABASE_URL = _with_driver(DATABASE_URL, _ASYNC_DRIVERS)
+
+engine = create_engine(SYNC_DATABASE_URL, echo=SQL_ECHO, **_pool_kwargs(SYNC_DATABASE_URL))
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=SQL_ECHO, **_pool_kwargs(ASYNC_DATABASE_URL))
 
 Session = sessionmaker(bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
 
 def get_session():
-    return Session()
\ No newline at end of file
+    return Session()
+
+
+def get_async_session():
+    return AsyncSessionLocal()
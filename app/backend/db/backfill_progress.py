@@ -0,0 +1,93 @@
+"""
+Rebuild card_progress_daily from gesture_detections.
+
+Creates the rollup table and the detection indexes on databases that predate
+them, then scans the detections in primary-key order, ``--chunk`` rows per
+transaction, so a large table is never loaded at once and the live app keeps
+writing meanwhile. Detections written after the scan started are already in
+the rollup through the ingestion paths and are left alone. On PostgreSQL the
+detections table is briefly locked while the rollup is cleared, so writers
+that are mid-transaction at that moment are not counted twice.
+
+Run from the repository root:
+
+    PYTHONPATH=.:app/backend python -m db.backfill_progress --chunk 5000
+"""
+import argparse
+import time
+
+from sqlalchemy import delete, func, select, text
+
+from . import Base, engine, get_session
+from .models import CardProgressDaily, GestureDetection
+from .progress import add_detections_sync
+
+_COLUMNS = (
+    GestureDetection.detection_id,
+    GestureDetection.session_id,
+    GestureDetection.gesture_card_id,
+    GestureDetection.detection_accuracy,
+    GestureDetection.detected_at,
+)
+
+
+def ensure_schema():
+    Base.metadata.create_all(engine)
+    for table in (GestureDetection.__table__, CardProgressDaily.__table__):
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def backfill(chunk: int = 5000) -> int:
+    """
+    Returns the number of detections folded into the rollup.
+    """
+    db = get_session()
+    try:
+        # Clearing the rollup and fixing the upper bound in one transaction:
+        # rows above ``last_id`` are added by their writers, rows up to it
+        # by this scan, none by both.
+        if db.bind.dialect.name == "postgresql":
+            # Writers insert detections and add them to the rollup in one
+            # transaction. SHARE mode waits for those in flight to commit,
+            # so their ids are at most ``last_id`` and their rollup rows get
+            # cleared, and holds new ones off until the commit below.
+            # SQLite needs nothing: its writers are serialized anyway.
+            db.execute(text(f"LOCK TABLE {GestureDetection.__tablename__} IN SHARE MODE"))
+        db.execute(delete(CardProgressDaily))
+        last_id = db.execute(select(func.max(GestureDetection.detection_id))).scalar() or 0
+        db.commit()
+
+        done = 0
+        after = 0
+        while after < last_id:
+            rows = db.execute(
+                select(*_COLUMNS)
+                .where(GestureDetection.detection_id > after, GestureDetection.detection_id <= last_id)
+                .order_by(GestureDetection.detection_id)
+                .limit(chunk)
+            ).mappings().all()
+            if not rows:
+                break
+            add_detections_sync(db, rows)
+            db.commit()
+            after = rows[-1]["detection_id"]
+            done += len(rows)
+        return done
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk", type=int, default=5000)
+    args = parser.parse_args()
+
+    ensure_schema()
+    t0 = time.perf_counter()
+    done = backfill(max(1, args.chunk))
+    print(f"{done} detections rolled up in {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Text, Date, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from . import Base
 
@@ -46,6 +46,10 @@ class PracticeSession(Base):
     session_end = Column(DateTime, nullable=True)
     result = Column(String(100), nullable=True)
 
+    __table_args__ = (
+        Index('ix_practice_sessions_user_lesson', 'user_id', 'lesson_id'),
+    )
+
     user = relationship('User', back_populates='sessions')
     lesson = relationship('Lesson', back_populates='sessions')
 
@@ -59,10 +63,30 @@ class GestureDetection(Base):
     detected_at = Column(DateTime(), server_default=func.now())
     detection_accuracy = Column(Float, nullable=False)
 
+    __table_args__ = (
+        Index('ix_gesture_detections_session', 'session_id'),
+        Index('ix_gesture_detections_card_detected', 'gesture_card_id', 'detected_at'),
+    )
+
     session = relationship('PracticeSession', back_populates='detections')
     gesture_card = relationship('GestureCard', back_populates='detections')
 
 
+class CardProgressDaily(Base):
+    """
+    Detections rolled up per user, card and (UTC) day; kept up to date by
+    db/progress.py as detections are written.
+    """
+    __tablename__ = 'card_progress_daily'
+
+    user_id = Column(Integer, ForeignKey('users.user_id'), primary_key=True)
+    gesture_card_id = Column(Integer, ForeignKey('gesture_cards.card_id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    accuracy_sum = Column(Float, nullable=False, default=0.0)
+    best_accuracy = Column(Float, nullable=False, default=0.0)
+
+
 Lesson.gesture_cards = relationship('GestureCard', order_by=GestureCard.card_id, back_populates='lesson')
 User.sessions = relationship('PracticeSession', back_populates='user')
 Lesson.sessions = relationship('PracticeSession', back_populates='lesson')
@@ -0,0 +1,118 @@
+"""
+Progress rollup: detections aggregated per user x card x day into
+card_progress_daily (attempts, accuracy sum, best accuracy).
+
+Every code path that writes GestureDetection rows also calls
+``add_detections`` in the same transaction, so the rollup never drifts from
+the detections and the progress endpoints read a few hundred rollup rows
+instead of a user's whole history. backfill_progress.py rebuilds it from the
+existing detections.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import case, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models import CardProgressDaily, PracticeSession
+
+# Rows per multi-row upsert, well under SQLite's bound-parameter limit.
+UPSERT_ROWS = 1000
+
+
+def aggregate(rows, users: dict[int, int]) -> list[dict]:
+    """
+    Fold detection rows (dicts with session_id, gesture_card_id,
+    detection_accuracy, detected_at) into rollup rows. ``users`` maps
+    session_id to user_id; rows of unknown sessions are skipped. Days are
+    UTC days: naive timestamps are taken as UTC, aware ones converted.
+    """
+    totals: dict[tuple, list] = {}
+    now = datetime.utcnow()
+    for r in rows:
+        user_id = users.get(r["session_id"])
+        if user_id is None:
+            continue
+        detected_at = r.get("detected_at") or now
+        if detected_at.tzinfo is not None:
+            detected_at = detected_at.astimezone(timezone.utc)
+        key = (user_id, r["gesture_card_id"], detected_at.date())
+        accuracy = float(r["detection_accuracy"])
+        t = totals.get(key)
+        if t is None:
+            totals[key] = [1, accuracy, accuracy]
+        else:
+            t[0] += 1
+            t[1] += accuracy
+            t[2] = max(t[2], accuracy)
+    return [
+        {"user_id": user_id, "gesture_card_id": card_id, "day": day,
+         "attempts": n, "accuracy_sum": acc_sum, "best_accuracy": best}
+        for (user_id, card_id, day), (n, acc_sum, best) in totals.items()
+    ]
+
+
+def _upsert(dialect: str, values: list[dict]):
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(CardProgressDaily).values(values)
+    table = CardProgressDaily.__table__.c
+    new = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "gesture_card_id", "day"],
+        set_={
+            "attempts": table.attempts + new.attempts,
+            "accuracy_sum": table.accuracy_sum + new.accuracy_sum,
+            "best_accuracy": case((new.best_accuracy > table.best_accuracy, new.best_accuracy),
+                                  else_=table.best_accuracy),
+        },
+    )
+
+
+def _merge(db, existing: CardProgressDaily | None, v: dict):
+    # Dialects without ON CONFLICT: read-modify-write through the ORM.
+    if existing is None:
+        db.add(CardProgressDaily(**v))
+        return
+    existing.attempts += v["attempts"]
+    existing.accuracy_sum += v["accuracy_sum"]
+    existing.best_accuracy = max(existing.best_accuracy, v["best_accuracy"])
+
+
+def _session_users(session_ids) -> select:
+    return select(PracticeSession.session_id, PracticeSession.user_id).where(
+        PracticeSession.session_id.in_(session_ids)
+    )
+
+
+async def add_detections(db, rows: list[dict]):
+    """
+    Add freshly written detection rows to the rollup. Runs in the caller's
+    transaction (AsyncSession); the caller commits.
+    """
+    if not rows:
+        return
+    users = dict((await db.execute(_session_users({r["session_id"] for r in rows}))).all())
+    values = aggregate(rows, users)
+    dialect = db.bind.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        for v in values:
+            _merge(db, await db.get(CardProgressDaily, (v["user_id"], v["gesture_card_id"], v["day"])), v)
+        return
+    for i in range(0, len(values), UPSERT_ROWS):
+        await db.execute(_upsert(dialect, values[i:i + UPSERT_ROWS]))
+
+
+def add_detections_sync(db, rows: list[dict]):
+    """
+    ``add_detections`` for a synchronous Session.
+    """
+    if not rows:
+        return
+    users = dict(db.execute(_session_users({r["session_id"] for r in rows})).all())
+    values = aggregate(rows, users)
+    dialect = db.bind.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        for v in values:
+            _merge(db, db.get(CardProgressDaily, (v["user_id"], v["gesture_card_id"], v["day"])), v)
+        return
+    for i in range(0, len(values), UPSERT_ROWS):
+        db.execute(_upsert(dialect, values[i:i + UPSERT_ROWS]))
@@ -1,5 +1,20 @@
 from . import get_session
-from .models import User, Lesson
+from .models import User, Lesson, GestureCard
+
+
+# Called with the affected lesson_id (None when the lesson list itself
+# changed) after every catalog write below, so in-process caches can drop it.
+_catalog_listeners = []
+
+
+def on_catalog_change(listener):
+    _catalog_listeners.append(listener)
+    return listener
+
+
+def _catalog_changed(lesson_id=None):
+    for listener in _catalog_listeners:
+        listener(lesson_id)
 
 
 def add_user(username: str):
@@ -16,6 +31,16 @@ def add_lesson(title: str, description: str, content_url: str, lesson_order: int
     session.add(new_lesson)
     session.commit()
     session.close()
+    _catalog_changed()
+
+
+def add_gesture_card(lesson_id: int, gesture_name: str, gesture_image_url: str):
+    session = get_session()
+    new_card = GestureCard(lesson_id=lesson_id, gesture_name=gesture_name, gesture_image_url=gesture_image_url)
+    session.add(new_card)
+    session.commit()
+    session.close()
+    _catalog_changed(lesson_id)
 
 
 def get_all_lessons():
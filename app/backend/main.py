@@ -4,12 +4,15 @@ import asyncio
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.filters import CommandStart
-from bot.handlers import start
-from db import engine, Base
+
+# db builds its engines from DATABASE_URL and DB_* at import time.
+load_dotenv()
+
+from bot.handlers import start  # noqa: E402
+from db import engine, Base  # noqa: E402
 
 
 async def main():
-    load_dotenv()
     Base.metadata.create_all(engine)
     bot = Bot(token=os.getenv('TOKEN'))
     dp = Dispatcher()
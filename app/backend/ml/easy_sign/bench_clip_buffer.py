@@ -0,0 +1,80 @@
+"""
+Compare the old deque + np.asarray clip path with ClipBuffer.
+
+Run from the repository root:
+
+    python -m app.backend.ml.easy_sign.bench_clip_buffer --cycles 200
+"""
+import argparse
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+from einops import rearrange
+
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+
+
+def deque_path(frames: deque) -> np.ndarray:
+    clip = np.asarray(list(frames), dtype=np.float32) / 255.0
+    return np.ascontiguousarray(rearrange(clip, "t h w c -> 1 c t h w"))
+
+
+def run(name, append, build, frames_in, cycles, stride):
+    tracemalloc.start()
+    append_s = 0.0
+    build_s = 0.0
+    n = 0
+
+    for i in range(cycles * stride):
+        t0 = time.perf_counter()
+        append(frames_in[i % len(frames_in)])
+        append_s += time.perf_counter() - t0
+
+        if (i + 1) % stride == 0:
+            t0 = time.perf_counter()
+            clip = build()
+            build_s += time.perf_counter() - t0
+            assert clip.shape[0] == 1 and clip.flags.c_contiguous
+            n += 1
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:>18}: append {append_s / (cycles * stride) * 1e6:8.1f} us/frame  "
+        f"clip {build_s / n * 1e3:7.2f} ms/call  "
+        f"traced peak {peak / 2 ** 20:7.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--window", type=int, default=32)
+    parser.add_argument("--size", type=int, default=224)
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument("--stride", type=int, default=8, help="new frames between two clips")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames_in = [
+        rng.integers(0, 256, (args.size, args.size, 3), dtype=np.uint8)
+        for _ in range(args.window * 2)
+    ]
+
+    window = deque(maxlen=args.window)
+    for f in frames_in[:args.window]:
+        window.append(f)
+    run("deque+asarray", window.append, lambda: deque_path(window), frames_in, args.cycles, args.stride)
+
+    for dtype in (np.float32, np.uint8):
+        buf = ClipBuffer(args.window, args.size, dtype=dtype)
+        for f in frames_in[:args.window]:
+            buf.append(f)
+        run(f"ClipBuffer {np.dtype(dtype).name}", buf.append, buf.clip, frames_in, args.cycles, args.stride)
+        print(f"{'':>18}  resident buffers {buf.nbytes / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare full-resolution decode + resize with the reduced-scale decode path
+(decode_into) for typical phone camera resolutions.
+
+Run from the repository root:
+
+    python -m app.backend.ml.easy_sign.bench_decode --iters 200
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+from app.backend.ml.easy_sign.frames import FRAME_HEADER, decode_into, pack_frame
+
+RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080), (3840, 2160))
+
+
+def camera_frame(width: int, height: int, quality: int) -> bytes:
+    """
+    Smooth synthetic frame (gradients plus a few blobs) encoded as JPEG, so
+    the entropy decoder sees something closer to a camera image than noise.
+    """
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    img = np.stack([x / width * 255, y / height * 255, (x + y) / (width + height) * 255], axis=-1)
+    rng = np.random.default_rng(width)
+    for _ in range(12):
+        cx, cy = int(rng.integers(0, width)), int(rng.integers(0, height))
+        color = [int(c) for c in rng.integers(0, 256, 3)]
+        cv2.circle(img, (cx, cy), int(min(width, height) * 0.08), color, -1)
+    img = cv2.GaussianBlur(img.astype(np.uint8), (0, 0), 2)
+    ok, enc = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    assert ok
+    return enc.tobytes()
+
+
+def full_path(frames: ClipBuffer, message: bytes):
+    # Behaviour before reduced decoding: full-size imdecode, fresh resize.
+    payload = np.frombuffer(message, np.uint8, offset=FRAME_HEADER.size)
+    img = cv2.imdecode(payload, cv2.IMREAD_COLOR)
+    frames.append(cv2.resize(img, (frames.size, frames.size), interpolation=cv2.INTER_LINEAR))
+
+
+def run(name, decode, message, size, iters):
+    frames = ClipBuffer(32, size)
+    decode(frames, message)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        decode(frames, message)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:>12}: {elapsed / iters * 1e3:7.2f} ms/frame  traced peak {peak / 2 ** 20:6.1f} MiB")
+    return elapsed / iters
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iters", type=int, default=100)
+    parser.add_argument("--size", type=int, default=224)
+    parser.add_argument("--quality", type=int, default=85, help="JPEG quality of the test frames")
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    for width, height in RESOLUTIONS:
+        message = pack_frame(camera_frame(width, height, args.quality), 0, 0.0)
+        print(f"{width}x{height} ({len(message) / 1024:.0f} KiB)")
+        full = run("full", full_path, message, args.size, args.iters)
+        reduced = run("decode_into", decode_into, message, args.size, args.iters)
+        print(f"{'':>12}  {full / reduced:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+Replay recorded videos (or a synthetic moving scene) as JPEG frame streams
+through the full gesture pipeline and report sustained throughput, tail
+latency, CPU and memory.
+
+Two targets:
+
+* ``inproc`` drives decode -> ClipBuffer -> StrideGate -> InferenceScheduler
+  -> word decoder directly, the same path /ws/gesture takes.
+* ``ws`` starts ``uvicorn app.backend.api_main:app`` (or uses ``--url``) and
+  streams binary frames over real sockets; server-side stage timings are
+  taken from its /metrics endpoint.
+
+Run from the repository root:
+
+    python -m app.backend.ml.easy_sign.bench_replay --target inproc --clients 1 4 8 --fps 25 --seconds 20
+    python -m app.backend.ml.easy_sign.bench_replay --target ws --videos recordings/ --out replay.json
+
+Results for every client count are written as JSON with ``--out``, so runs
+from two commits can be diffed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.backend.ml.easy_sign.frames import pack_frame
+from app.backend.ml.easy_sign.recordings import find_recordings, iter_video_frames
+
+CFG_PATH = Path(__file__).resolve().parent / "config.json"
+
+
+# --- frame sources ---------------------------------------------------------
+
+def _encode(img: np.ndarray, quality: int) -> bytes:
+    ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encode failed")
+    return jpg.tobytes()
+
+
+def synthetic_stream(n: int, size: int = 224, quality: int = 55) -> list[bytes]:
+    """
+    A blurred noise background with a bright square sweeping across it, so
+    the motion gate sees movement like it would with a signing hand.
+    """
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 256, (size, size, 3), dtype=np.uint8), (15, 15), 0)
+    out = []
+    for i in range(n):
+        img = background.copy()
+        x = int((size - 48) * (0.5 + 0.5 * np.sin(i / 6.0)))
+        cv2.rectangle(img, (x, size // 3), (x + 48, size // 3 + 48), (230, 200, 180), -1)
+        out.append(_encode(img, quality))
+    return out
+
+
+def video_stream(folder: str, max_frames: int, size: int = 224, quality: int = 55) -> list[bytes]:
+    """
+    JPEG frames of the recordings under ``folder``, resized like the Mini App
+    canvas does before upload.
+    """
+    out = []
+    for path in find_recordings(folder):
+        for _, frame in iter_video_frames(path, size):
+            out.append(_encode(frame, quality))
+            if len(out) >= max_frames:
+                return out
+    if not out:
+        raise SystemExit(f"no recordings found under {folder}")
+    return out
+
+
+# --- statistics ------------------------------------------------------------
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "n": 0}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000.0, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "n": len(values)}
+
+
+def histogram_percentiles(buckets: list[tuple[float, float]]) -> dict:
+    """
+    Percentiles from cumulative Prometheus buckets [(le, count), ...],
+    interpolated linearly inside the bucket.
+    """
+    if not buckets or buckets[-1][1] == 0:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "n": 0}
+    total = buckets[-1][1]
+    out = {}
+    for q in (50, 95, 99):
+        rank = total * q / 100.0
+        prev_le, prev_n = 0.0, 0.0
+        for le, n in buckets:
+            if n >= rank:
+                if le == float("inf"):
+                    value = prev_le
+                else:
+                    frac = (rank - prev_n) / (n - prev_n) if n > prev_n else 0.0
+                    value = prev_le + (le - prev_le) * frac
+                out[f"p{q}_ms"] = value * 1000.0
+                break
+            prev_le, prev_n = le, n
+    out["n"] = int(total)
+    return out
+
+
+def parse_histograms(text: str) -> dict:
+    """
+    {metric name: [(le, cumulative count), ...]} for unlabelled histograms in
+    a Prometheus text exposition.
+    """
+    out: dict[str, list] = {}
+    for line in text.splitlines():
+        if line.startswith("#") or "_bucket{" not in line:
+            continue
+        head, value = line.rsplit(" ", 1)
+        name, labels = head.split("{", 1)
+        if not labels.startswith('le="'):
+            continue
+        le = labels[4:labels.index('"', 4)]
+        out.setdefault(name[:-len("_bucket")], []).append(
+            (float("inf") if le == "+Inf" else float(le), float(value))
+        )
+    return out
+
+
+def parse_value(text: str, name: str) -> float | None:
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split(" ", 1)[1])
+    return None
+
+
+def diff_histograms(before: dict, after: dict) -> dict:
+    result = {}
+    for name, buckets in after.items():
+        prev = dict(before.get(name, []))
+        result[name] = histogram_percentiles([(le, n - prev.get(le, 0.0)) for le, n in buckets])
+    return result
+
+
+def rss_peak_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+# --- in-process target -----------------------------------------------------
+
+async def inproc_client(backend, scheduler, cfg, labels, frames, fps, deadline, stats, offset):
+    from app.backend.ml.easy_sign.roi import RoiTracker
+    from app.backend.ml.easy_sign.smoothing import build_decoder
+    from app.backend.ml.easy_sign.stride import StrideGate
+
+    buf = backend.new_buffer(int(cfg["window_size"]), int(cfg.get("input_size", 224)))
+    gate = StrideGate.from_config(cfg)
+    roi = RoiTracker.from_config(cfg)
+    decoder = build_decoder(cfg, labels)
+    period = 1.0 / fps
+    next_at = time.perf_counter()
+    i = offset
+    try:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            arrived = next_at
+            next_at += period
+
+            t0 = time.perf_counter()
+            await backend.decode_into(buf, frames[i % len(frames)], roi)
+            stats["decode"].append(time.perf_counter() - t0)
+            stats["frames"] += 1
+            i += 1
+
+            if not gate.should_run(buf, scheduler.load):
+                continue
+            pred = await scheduler.predict(buf)
+            done = time.perf_counter()
+            stats["frame_to_result"].append(done - arrived)
+            if decoder.update(pred, time.monotonic()) is not None:
+                stats["words"] += 1
+                stats["frame_to_word"].append(done - arrived)
+                buf.keep_last(8)
+                gate.reset()
+    finally:
+        buf.release()
+
+
+async def run_inproc(cfg, frames, n_clients, args) -> dict:
+    from app.backend.api.inference import InferenceScheduler, ThreadBackend
+    from app.backend.ml.easy_sign.runtime import Predictor, load_labels
+
+    if args.worker_mode == "process":
+        from app.backend.ml.easy_sign.process_pool import ProcessBackend
+
+        backend = ProcessBackend(cfg, processes=int(cfg.get("worker_processes", 2)))
+        await backend.warmup()
+    elif args.worker_mode == "remote":
+        from app.backend.ml.easy_sign.remote_pool import RemoteBackend
+
+        # Workers are started separately (worker_server.py --workers N).
+        backend = RemoteBackend.from_config(cfg)
+        await backend.warmup()
+    else:
+        backend = ThreadBackend(Predictor(cfg))
+    scheduler = InferenceScheduler(backend, cfg.get("batch_max_size", 8), cfg.get("batch_max_wait_ms", 20))
+
+    labels = load_labels(cfg)
+    frames = [pack_frame(jpg, seq, 0.0) for seq, jpg in enumerate(frames)]
+    stats = {"frames": 0, "words": 0, "decode": [], "frame_to_result": [], "frame_to_word": []}
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    deadline = time.monotonic() + args.seconds
+    await asyncio.gather(*[
+        inproc_client(backend, scheduler, cfg, labels, frames, args.fps, deadline, stats, k * 7)
+        for k in range(n_clients)
+    ])
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    await scheduler.close()
+
+    return {
+        "target": "inproc",
+        "worker_mode": args.worker_mode,
+        "clients": n_clients,
+        "seconds": elapsed,
+        "frames_per_s": stats["frames"] / elapsed,
+        "target_frames_per_s": n_clients * args.fps,
+        "inferences": len(stats["frame_to_result"]),
+        "batches": scheduler.batches,
+        "words": stats["words"],
+        "decode": percentiles(stats["decode"]),
+        "frame_to_result": percentiles(stats["frame_to_result"]),
+        "frame_to_word": percentiles(stats["frame_to_word"]),
+        # CPU of this process only; worker processes are not included.
+        "cpu_cores_per_client": cpu / elapsed / n_clients,
+        "rss_peak_mb": rss_peak_mb(),
+    }
+
+
+# --- WebSocket target ------------------------------------------------------
+
+async def ws_client(session, url, frames, fps, deadline, stats, offset):
+    import aiohttp
+
+    sent_at: dict[int, float] = {}
+    async with session.ws_connect(url, protocols=["gestu.frames.v1"], max_msg_size=0) as ws:
+        async def reader():
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json.loads(msg.data)
+                kind = data.get("type")
+                if kind == "busy":
+                    stats["busy"] += 1
+                elif kind == "rate":
+                    stats["rate_changes"] += 1
+                elif "word" in data:
+                    stats["words"] += 1
+                    t = sent_at.get(data.get("seq"))
+                    if t is not None:
+                        stats["frame_to_word"].append(time.perf_counter() - t)
+
+        reader_task = asyncio.create_task(reader())
+        period = 1.0 / fps
+        next_at = time.perf_counter()
+        i = offset
+        seq = 0
+        try:
+            while time.monotonic() < deadline and not ws.closed:
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+                next_at += period
+                seq += 1
+                sent_at[seq] = time.perf_counter()
+                if len(sent_at) > 4096:
+                    sent_at.pop(next(iter(sent_at)))
+                await ws.send_bytes(pack_frame(frames[i % len(frames)], seq, time.time() * 1000.0))
+                stats["frames"] += 1
+                i += 1
+        finally:
+            await ws.close()
+            reader_task.cancel()
+            await asyncio.gather(reader_task, return_exceptions=True)
+
+
+async def run_ws(base_url, frames, n_clients, args) -> dict:
+    import aiohttp
+
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/gesture"
+    stats = {"frames": 0, "words": 0, "busy": 0, "rate_changes": 0, "frame_to_word": []}
+    async with aiohttp.ClientSession() as session:
+        before_text = await (await session.get(base_url + "/metrics")).text()
+        t0 = time.perf_counter()
+        deadline = time.monotonic() + args.seconds
+        await asyncio.gather(*[
+            ws_client(session, ws_url, frames, args.fps, deadline, stats, k * 7)
+            for k in range(n_clients)
+        ])
+        elapsed = time.perf_counter() - t0
+        await asyncio.sleep(0.5)
+        after_text = await (await session.get(base_url + "/metrics")).text()
+
+    server = diff_histograms(parse_histograms(before_text), parse_histograms(after_text))
+    cpu_before = parse_value(before_text, "process_cpu_seconds_total")
+    cpu_after = parse_value(after_text, "process_cpu_seconds_total")
+    return {
+        "target": "ws",
+        "clients": n_clients,
+        "seconds": elapsed,
+        "frames_per_s": stats["frames"] / elapsed,
+        "target_frames_per_s": n_clients * args.fps,
+        "words": stats["words"],
+        "busy_messages": stats["busy"],
+        "rate_changes": stats["rate_changes"],
+        "frame_to_word": percentiles(stats["frame_to_word"]),
+        "server": {
+            "decode": server.get("gestu_ws_decode_seconds"),
+            "queue_wait": server.get("gestu_infer_queue_wait_seconds"),
+            "run": server.get("gestu_infer_run_seconds"),
+            "postprocess": server.get("gestu_infer_postprocess_seconds"),
+            "frame_to_word": server.get("gestu_ws_frame_to_word_seconds"),
+        },
+        # Server process only; with --worker-mode process the pool workers are not included.
+        "cpu_cores_per_client": (
+            (cpu_after - cpu_before) / elapsed / n_clients if cpu_before is not None and cpu_after is not None else None
+        ),
+        "rss_mb": (parse_value(after_text, "process_resident_memory_bytes") or 0) / 2 ** 20,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = dict(os.environ, GESTU_WORKER_MODE=args.worker_mode)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.backend.api_main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc, base_url
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit("uvicorn exited during startup")
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("uvicorn did not start")
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+# --- main ------------------------------------------------------------------
+
+def print_row(r: dict):
+    lat = r.get("frame_to_result") or (r.get("server") or {}).get("run") or {}
+    print(
+        f"{r['target']:>6} clients={r['clients']:>3}  "
+        f"frames/s {r['frames_per_s']:7.1f}/{r['target_frames_per_s']:<6.0f} "
+        f"latency p50 {lat.get('p50_ms') or 0:7.1f} p95 {lat.get('p95_ms') or 0:7.1f} "
+        f"p99 {lat.get('p99_ms') or 0:7.1f} ms  words {r['words']}  "
+        f"cpu/client {r.get('cpu_cores_per_client') or 0:.2f}  "
+        f"rss {r.get('rss_peak_mb') or r.get('rss_mb') or 0:.0f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=["inproc", "ws"], default="inproc")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--videos", type=str, default=None, help="folder with recordings; synthetic frames if omitted")
+    parser.add_argument("--max-frames", type=int, default=600)
+    parser.add_argument("--quality", type=int, default=55, help="JPEG quality of replayed frames")
+    parser.add_argument("--worker-mode", choices=["thread", "process", "remote"], default="thread")
+    parser.add_argument("--variant", type=str, default=None, help="model variant (inproc)")
+    parser.add_argument("--threshold", type=float, default=None, help="override the model threshold (inproc)")
+    parser.add_argument("--decoder", choices=["repeat", "ema", "window"], default=None,
+                        help="override the word decoder type (inproc)")
+    parser.add_argument("--url", type=str, default=None, help="existing server, e.g. http://127.0.0.1:8000 (ws)")
+    parser.add_argument("--out", type=str, default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    with open(CFG_PATH, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    if args.threshold is not None:
+        cfg["threshold"] = args.threshold
+    if args.decoder is not None:
+        cfg["decoder"] = {**(cfg.get("decoder") or {}), "type": args.decoder}
+
+    if args.videos:
+        frames = video_stream(args.videos, args.max_frames, quality=args.quality)
+    else:
+        frames = synthetic_stream(min(args.max_frames, 120), quality=args.quality)
+
+    results = []
+    if args.target == "inproc":
+        from app.backend.ml.easy_sign.runtime import resolve_variant
+
+        cfg = resolve_variant(cfg, args.variant)
+        for n in args.clients:
+            r = asyncio.run(run_inproc(cfg, frames, n, args))
+            results.append(r)
+            print_row(r)
+    else:
+        for n in args.clients:
+            proc, base_url = (None, args.url.rstrip("/")) if args.url else start_server(args)
+            try:
+                r = asyncio.run(run_ws(base_url, frames, n, args))
+            finally:
+                if proc is not None:
+                    stop_server(proc)
+            results.append(r)
+            print_row(r)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "args": vars(args),
+                "frames": len(frames),
+                "model_variant": cfg.get("model_variant"),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Thread vs worker-process backends under a growing number of simulated sockets.
+
+Each simulated socket sends binary JPEG frames at ``--fps`` through the same
+decode -> ClipBuffer -> InferenceScheduler path as /ws/gesture and asks for a
+prediction every ``--stride`` frames once the window is full.
+
+Run from the repository root:
+
+    python -m app.backend.ml.easy_sign.bench_workers --sockets 1 4 8 16 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.backend.api.inference import InferenceScheduler, ThreadBackend
+from app.backend.ml.easy_sign.frames import pack_frame
+from app.backend.ml.easy_sign.process_pool import ProcessBackend
+from app.backend.ml.easy_sign.runtime import Predictor
+
+CFG_PATH = Path(__file__).resolve().parent / "config.json"
+
+
+def make_frames(n: int) -> list[bytes]:
+    rng = np.random.default_rng(0)
+    out = []
+    for i in range(n):
+        img = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+        img = cv2.GaussianBlur(img, (15, 15), 0)
+        ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 55])
+        out.append(pack_frame(jpg.tobytes(), i, time.time() * 1000.0))
+    return out
+
+
+async def client(backend, scheduler, window, frames, fps, stride, deadline, stats):
+    buf = backend.new_buffer(window)
+    period = 1.0 / fps
+    next_at = time.monotonic()
+    i = 0
+    try:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+            next_at += period
+            t0 = time.perf_counter()
+            await backend.decode_into(buf, frames[i % len(frames)])
+            stats["decode"].append(time.perf_counter() - t0)
+            stats["frames"] += 1
+            i += 1
+            if buf.full and i % stride == 0:
+                t0 = time.perf_counter()
+                await scheduler.predict(buf)
+                stats["infer"].append(time.perf_counter() - t0)
+    finally:
+        buf.release()
+
+
+def pct(values, q):
+    return float(np.percentile(values, q) * 1000.0) if values else None
+
+
+async def run_once(mode, cfg, n_sockets, args, frames):
+    if mode == "process":
+        backend = ProcessBackend(cfg, processes=args.processes)
+        await backend.warmup()
+    else:
+        backend = ThreadBackend(Predictor(cfg))
+    scheduler = InferenceScheduler(backend, cfg.get("batch_max_size", 8), cfg.get("batch_max_wait_ms", 20))
+
+    stats = {"frames": 0, "decode": [], "infer": []}
+    t0 = time.perf_counter()
+    deadline = time.monotonic() + args.seconds
+    await asyncio.gather(*[
+        client(backend, scheduler, int(cfg["window_size"]), frames, args.fps, args.stride, deadline, stats)
+        for _ in range(n_sockets)
+    ])
+    elapsed = time.perf_counter() - t0
+    await scheduler.close()
+
+    return {
+        "mode": mode,
+        "sockets": n_sockets,
+        "frames_per_s": stats["frames"] / elapsed,
+        "target_frames_per_s": n_sockets * args.fps,
+        "inferences": len(stats["infer"]),
+        "decode_p50_ms": pct(stats["decode"], 50),
+        "decode_p95_ms": pct(stats["decode"], 95),
+        "infer_p50_ms": pct(stats["infer"], 50),
+        "infer_p95_ms": pct(stats["infer"], 95),
+        "batches": scheduler.batches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sockets", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--modes", nargs="+", default=["thread", "process"])
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--stride", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--out", type=str, default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    with open(CFG_PATH, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    cfg["threshold"] = 0.0
+
+    frames = make_frames(16)
+    results = []
+    for mode in args.modes:
+        for n in args.sockets:
+            r = asyncio.run(run_once(mode, cfg, n, args, frames))
+            results.append(r)
+            print(
+                f"{r['mode']:>7} sockets={r['sockets']:>3}  "
+                f"frames/s {r['frames_per_s']:7.1f}/{r['target_frames_per_s']:<7.0f} "
+                f"decode p95 {r['decode_p95_ms'] or 0:6.1f} ms  "
+                f"infer p50 {r['infer_p50_ms'] or 0:7.1f} ms p95 {r['infer_p95_ms'] or 0:7.1f} ms  "
+                f"batches {r['batches']}"
+            )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import threading
+
+import numpy as np
+
+_scratch = threading.local()
+
+
+def scratch_clip(shape: tuple) -> np.ndarray:
+    """
+    Per-thread float32 (1,) + ``shape`` array that ``ClipBuffer.clip`` builds
+    the model input in when no ``out`` is given.
+    """
+    clip = getattr(_scratch, "clip", None)
+    if clip is None or clip.shape[1:] != shape:
+        clip = _scratch.clip = np.empty((1,) + shape, dtype=np.float32)
+    return clip
+
+
+class ClipBuffer:
+    """
+    Sliding window of the last ``window_size`` frames stored channel-first.
+
+    Frames are written into a preallocated ring of shape (c, t, h, w) as they
+    arrive, so producing the model input needs no per-call allocation: the
+    window is copied, in chronological order, into the caller's ``out`` (a
+    slot of a batch tensor) or into a per-thread scratch clip. Only a float32
+    ring that happens to start at slot 0 is returned as a view instead.
+    Nothing but the ring is kept per buffer.
+
+    With ``dtype=np.uint8`` (the serving default) raw pixels are kept, 4x
+    less memory per session, and normalization happens while building the
+    clip. With ``dtype=np.float32`` frames are normalized to [0, 1] on write.
+
+    ``buffer`` lets the ring live in externally owned memory (e.g. a shared
+    memory segment) instead of a private numpy allocation.
+    """
+
+    def __init__(self, window_size: int = 32, size: int = 224, channels: int = 3, dtype=np.float32,
+                 buffer=None):
+        self.window_size = int(window_size)
+        self.size = int(size)
+        self.channels = int(channels)
+        self.dtype = np.dtype(dtype)
+
+        self._ring = None
+        self._head = 0
+        self._count = 0
+        # Frames ever appended; never rewound, so callers can address frames
+        # by absolute index (see FeatureCache).
+        self.appended = 0
+        # Batches and decodes still reading or writing the ring (see hold()).
+        self._holds = 0
+        self._release_pending = False
+
+        if buffer is not None:
+            self._ring = np.ndarray(self.ring_shape, dtype=self.dtype, buffer=buffer)
+
+    @property
+    def ring_shape(self) -> tuple:
+        return (self.channels, self.window_size, self.size, self.size)
+
+    @staticmethod
+    def ring_nbytes(window_size: int, size: int = 224, channels: int = 3, dtype=np.float32) -> int:
+        return channels * window_size * size * size * np.dtype(dtype).itemsize
+
+    @property
+    def next_slot(self) -> int:
+        return self._head
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.window_size
+
+    @property
+    def nbytes(self) -> int:
+        return self._ring.nbytes if self._ring is not None else 0
+
+    def _ensure_ring(self):
+        if self._ring is None:
+            self._ring = np.zeros(self.ring_shape, dtype=self.dtype)
+
+    def write(self, slot: int, frame: np.ndarray):
+        """
+        Write a (h, w, c) uint8 frame into ring slot ``slot`` without moving
+        the write position.
+        """
+        self._ensure_ring()
+        dst = self._ring[:, slot]
+        chw = frame.transpose(2, 0, 1)
+
+        if self.dtype == np.uint8:
+            np.copyto(dst, chw)
+        else:
+            np.multiply(chw, np.float32(1.0 / 255.0), out=dst, casting="unsafe")
+
+    def advance(self):
+        self._head = (self._head + 1) % self.window_size
+        self._count = min(self._count + 1, self.window_size)
+        self.appended += 1
+
+    def append(self, frame: np.ndarray):
+        """
+        Write a (h, w, c) uint8 frame into the next slot of the ring.
+        """
+        self.write(self._head, frame)
+        self.advance()
+
+    def clip(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Return the window as a contiguous float32 (1, c, t, h, w) array in
+        chronological order. Without ``out`` the result lives in this thread's
+        scratch clip (or is a view of the ring), so it is only valid until the
+        next append or the thread's next clip() call.
+
+        When ``out`` is given the window is always copied into it.
+        """
+        self._ensure_ring()
+        h = self._head
+        tail = self.window_size - h
+
+        if out is None:
+            if h == 0 and self.dtype == np.float32:
+                return self._ring[np.newaxis]
+
+            out = scratch_clip(self.ring_shape)
+
+        result = out
+        out = out[0]
+        if self.dtype == np.uint8:
+            scale = np.float32(1.0 / 255.0)
+            np.multiply(self._ring[:, h:], scale, out=out[:, :tail], casting="unsafe")
+            np.multiply(self._ring[:, :h], scale, out=out[:, tail:], casting="unsafe")
+        else:
+            out[:, :tail] = self._ring[:, h:]
+            out[:, tail:] = self._ring[:, :h]
+        return result
+
+    def frames(self, start: int, n: int, out: np.ndarray) -> np.ndarray:
+        """
+        Copy ``n`` stored frames in chronological order, starting with the
+        frame of absolute index ``start`` (counted in ``appended``), into
+        ``out``, a float32 (c, n, h, w) array. The frames must still be held.
+        """
+        self._ensure_ring()
+        if start < self.appended - self._count or start + n > self.appended:
+            raise IndexError("frames are no longer in the window")
+        first = (self._head - (self.appended - start)) % self.window_size
+        slots = (first + np.arange(n)) % self.window_size
+        if self.dtype == np.uint8:
+            np.multiply(self._ring[:, slots], np.float32(1.0 / 255.0), out=out, casting="unsafe")
+        else:
+            np.take(self._ring, slots, axis=1, out=out)
+        return out
+
+    def thumbnail(self, step: int = 14, age: int = 0) -> np.ndarray | None:
+        """
+        Strided low-resolution copy of a stored frame, ``age`` frames back
+        from the newest one, scaled to [0, 1]. Cheap enough to call per frame.
+        """
+        if self._ring is None or age >= self._count:
+            return None
+        slot = (self._head - 1 - age) % self.window_size
+        thumb = self._ring[:, slot, ::step, ::step].astype(np.float32)
+        if self.dtype == np.uint8:
+            thumb *= np.float32(1.0 / 255.0)
+        return thumb
+
+    def keep_last(self, n: int):
+        """
+        Forget everything except the ``n`` most recent frames. Nothing is moved:
+        the kept frames already sit right behind the write position.
+        """
+        self._count = min(self._count, max(0, int(n)))
+
+    def copy_from(self, other: "ClipBuffer"):
+        """
+        Make this buffer's window a copy of ``other``'s, which must have the
+        same shape and dtype.
+        """
+        self._ensure_ring()
+        np.copyto(self._ring, other._ring)
+        self._head = other._head
+        self._count = other._count
+
+    def clear(self):
+        self._count = 0
+
+    def hold(self):
+        """
+        Keep the ring alive while a decode or a batch uses it off the event
+        loop. A release() in the meantime only takes effect once every hold
+        has been dropped, so closing a socket never pulls the window out
+        from under a batch that also carries other sockets' clips.
+        """
+        self._holds += 1
+
+    def unhold(self):
+        self._holds -= 1
+        if self._holds <= 0 and self._release_pending:
+            self._release_pending = False
+            self._free()
+
+    def release(self):
+        """
+        Drop the backing arrays, or mark them to be dropped once the last
+        hold is gone. They are allocated again on the next append.
+        """
+        if self._holds > 0:
+            self._release_pending = True
+            return
+        self._free()
+
+    def _free(self):
+        self._ring = None
+        self._head = 0
+        self._count = 0
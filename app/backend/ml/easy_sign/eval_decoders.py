@@ -0,0 +1,154 @@
+"""
+Replay recorded videos through the word decoders and compare how many model
+runs each one needs per confirmed word, and how often it confirms the right
+word.
+
+    python -m app.backend.ml.easy_sign.eval_decoders --videos recordings/
+    python -m app.backend.ml.easy_sign.eval_decoders --videos recordings/ --words "кот,собака,привет" --out decoders.json
+
+Every video is scored once, one model run per ``--stride`` frames like
+/ws/gesture does, and the resulting sequence of predictions is fed to each
+decoder setting (timestamps are stream time, so cooldowns behave as live).
+The window is not trimmed after a confirmed word here, unlike on the socket.
+
+A video stored under a folder named after a label (``recordings/кот/1.mp4``)
+counts that label as its expected word; "hit" is the share of such videos
+where the expected word was confirmed and "wrong" the number of other words
+confirmed in them.
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from app.backend.ml.easy_sign.recordings import find_recordings, iter_video_clips
+from app.backend.ml.easy_sign.roi import RoiTracker
+from app.backend.ml.easy_sign.runtime import LabelSubset, Predictor
+from app.backend.ml.easy_sign.smoothing import build_decoder, decoder_settings
+
+CFG_PATH = Path(__file__).resolve().parent / "config.json"
+
+
+def replay(predictor: Predictor, video: Path, window: int, stride: int, subset) -> list[tuple[float, dict]]:
+    roi = RoiTracker.from_config(predictor.config)
+    preds = []
+    for ts, clip in iter_video_clips(video, window, predictor.input_size, stride, roi):
+        logits = predictor.run(clip)
+        preds.append((ts, predictor.postprocess(logits[0], subset)))
+    return preds
+
+
+def evaluate(cfg: dict, labels: dict, subset, runs: list) -> dict:
+    """
+    ``runs`` holds (expected word or None, [(ts, pred), ...]) per video.
+    """
+    words = calls = 0
+    first_calls, first_s = [], []
+    hits = expected = wrong = 0
+
+    for want, preds in runs:
+        decoder = build_decoder(cfg, labels, subset)
+        emitted = []
+        calls += len(preds)
+        for i, (ts, pred) in enumerate(preds):
+            confirmed = decoder.update(pred, ts)
+            if confirmed is None:
+                continue
+            if not emitted:
+                first_calls.append(i + 1)
+                first_s.append(ts - preds[0][0])
+            emitted.append(confirmed[0])
+        words += len(emitted)
+
+        if want is not None:
+            expected += 1
+            hits += want in (w.lower() for w in emitted)
+            wrong += sum(w.lower() != want for w in emitted)
+
+    return {
+        "words": words,
+        "model_runs": calls,
+        "runs_per_word": calls / words if words else None,
+        "runs_to_first_word": float(np.mean(first_calls)) if first_calls else None,
+        "seconds_to_first_word": float(np.mean(first_s)) if first_s else None,
+        "hit": hits / expected if expected else None,
+        "wrong": wrong,
+    }
+
+
+def candidates(base: dict, args) -> list[dict]:
+    out = [{**base, "type": "repeat"}]
+    for th in args.thresholds:
+        for alpha in args.alphas:
+            out.append({**base, "type": "ema", "alpha": alpha, "on_threshold": th})
+        for w in args.windows:
+            out.append({**base, "type": "window", "window": w, "on_threshold": th})
+    return out
+
+
+def describe(d: dict) -> str:
+    if d["type"] == "repeat":
+        return f"repeat x{d['repeats']} >= {d['min_confidence']}"
+    if d["type"] == "ema":
+        return f"ema a={d['alpha']} on={d['on_threshold']} off={d['off_threshold']}"
+    return f"window {d['window']} on={d['on_threshold']} off={d['off_threshold']}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, default=str(CFG_PATH))
+    parser.add_argument("--variant", type=str, default=None)
+    parser.add_argument("--videos", type=str, required=True, help="folder with recorded videos")
+    parser.add_argument("--stride", type=int, default=None, help="frames between model runs (default: infer_stride)")
+    parser.add_argument("--words", type=str, default=None, help="comma separated lesson words to score against")
+    parser.add_argument("--alphas", type=float, nargs="+", default=[0.3, 0.5, 0.7])
+    parser.add_argument("--windows", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7])
+    parser.add_argument("--out", type=str, default=None)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    # Any smoothing type makes the predictor keep probability vectors.
+    cfg["decoder"] = {**(cfg.get("decoder") or {}), "type": "ema"}
+    predictor = Predictor(cfg, args.variant)
+    labels = predictor.labels
+    window = int(predictor.config.get("window_size", 32))
+    stride = args.stride or int(predictor.config.get("infer_stride", 8))
+
+    subset = None
+    if args.words:
+        words = [w.strip() for w in args.words.split(",") if w.strip()]
+        subset = LabelSubset.from_cards(labels, list(enumerate(words)))
+        print(f"{len(subset)}/{len(words)} lesson words match a label")
+
+    known = {label.lower() for label in labels.values()}
+    runs = []
+    for video in find_recordings(args.videos):
+        want = video.parent.name.lower()
+        runs.append((want if want in known else None, replay(predictor, video, window, stride, subset)))
+    if not runs:
+        raise SystemExit(f"no recordings found in {args.videos}")
+    print(f"{len(runs)} videos, {sum(len(p) for _, p in runs)} model runs, stride {stride}")
+
+    base = decoder_settings(predictor.config)
+    results = []
+    for settings in candidates(base, args):
+        row = {"decoder": settings, **evaluate({"decoder": settings}, labels, subset, runs)}
+        results.append(row)
+        print(
+            f"{describe(settings):>32}: words {row['words']:4d}  "
+            f"runs/word {row['runs_per_word'] or float('nan'):6.1f}  "
+            f"first after {row['runs_to_first_word'] or float('nan'):4.1f} runs "
+            f"({row['seconds_to_first_word'] or float('nan'):4.2f} s)  "
+            f"hit {row['hit'] if row['hit'] is not None else float('nan'):.2f}  wrong {row['wrong']}"
+        )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Latency and agreement with the fp32 model for every configured model variant.
+
+    python -m app.backend.ml.easy_sign.eval_variants --clips recordings/ --out variants.json
+    python -m app.backend.ml.easy_sign.eval_variants --clips recordings/ --words "кот,собака,привет"
+
+Agreement is measured on the top-1 class of the reference variant: "top1" is
+the share of clips where the variant picks the same class, "top5" the share
+where that class is among the variant's five best. With --words only clips
+whose reference top-1 label is one of those words are counted.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.backend.ml.easy_sign.recordings import load_clips
+from app.backend.ml.easy_sign.runtime import Predictor, resolve_variant
+
+CFG_PATH = Path(__file__).resolve().parent / "config.json"
+
+
+def score(predictor: Predictor, clips: list[np.ndarray]) -> tuple[np.ndarray, list[float]]:
+    logits, times = [], []
+    for clip in clips:
+        t0 = time.perf_counter()
+        out = predictor.run(clip)
+        times.append(time.perf_counter() - t0)
+        logits.append(out[0])
+    return np.stack(logits), times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, default=str(CFG_PATH))
+    parser.add_argument("--clips", type=str, required=True, help="folder with recorded videos / .npy clips")
+    parser.add_argument("--reference", type=str, default="fp32")
+    parser.add_argument("--variants", nargs="*", default=None)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--words", type=str, default=None, help="comma separated lesson words")
+    parser.add_argument("--out", type=str, default=None)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    window = int(cfg.get("window_size", 32))
+    names = args.variants or list((cfg.get("model_variants") or {}).keys())
+    if args.reference not in names:
+        names.insert(0, args.reference)
+
+    clips_by_size = {}
+
+    def clips_for(size, variant_cfg):
+        roi = variant_cfg.get("roi") or {}
+        key = (size, json.dumps(roi, sort_keys=True) if roi.get("enabled") else None)
+        if key not in clips_by_size:
+            clips_by_size[key] = load_clips(
+                args.clips, window, size, stride=window // 2, limit=args.limit, config=variant_cfg
+            )
+        return clips_by_size[key]
+
+    ref = Predictor(cfg, args.reference)
+    ref_logits, _ = score(ref, clips_for(ref.input_size, ref.config))
+    if len(ref_logits) == 0:
+        raise SystemExit(f"no clips found in {args.clips}")
+    ref_top1 = np.argmax(ref_logits, axis=1)
+
+    mask = np.ones(len(ref_top1), dtype=bool)
+    if args.words:
+        wanted = {w.strip().lower() for w in args.words.split(",") if w.strip()}
+        mask = np.array([ref.labels[int(i)].lower() in wanted for i in ref_top1])
+        print(f"{int(mask.sum())}/{len(mask)} clips have a lesson word as reference top-1")
+
+    results = []
+    for name in names:
+        try:
+            variant_cfg = resolve_variant(cfg, name)
+            predictor = ref if name == args.reference else Predictor(variant_cfg)
+        except Exception as exc:
+            print(f"{name:>14}: skipped ({exc})")
+            continue
+
+        clips = clips_for(predictor.input_size, variant_cfg)
+        logits, times = score(predictor, clips)
+        top5 = np.argsort(logits, axis=1)[:, -5:]
+        n = min(len(logits), len(ref_top1))
+        top1_hit = (np.argmax(logits[:n], axis=1) == ref_top1[:n])[mask[:n]]
+        top5_hit = np.array([ref_top1[i] in top5[i] for i in range(n)])[mask[:n]]
+
+        row = {
+            "variant": name,
+            "model": variant_cfg["path_to_model"],
+            "input_size": predictor.input_size,
+            "roi": bool((variant_cfg.get("roi") or {}).get("enabled")),
+            "clips": int(mask[:n].sum()),
+            "latency_p50_ms": float(np.percentile(times, 50) * 1000.0),
+            "latency_p95_ms": float(np.percentile(times, 95) * 1000.0),
+            "top1_agreement": float(top1_hit.mean()) if top1_hit.size else None,
+            "top5_agreement": float(top5_hit.mean()) if top5_hit.size else None,
+        }
+        results.append(row)
+        print(
+            f"{name:>14}: p50 {row['latency_p50_ms']:7.1f} ms  p95 {row['latency_p95_ms']:7.1f} ms  "
+            f"top1 {row['top1_agreement'] or 0:.3f}  top5 {row['top5_agreement'] or 0:.3f}"
+        )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
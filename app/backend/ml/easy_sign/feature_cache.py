@@ -0,0 +1,235 @@
+"""
+Feature-cache mode: the video model split into a backbone that runs on short
+chunks of frames and a temporal head that runs over the concatenated chunk
+features (see split_model.py for producing the two ONNX files).
+
+A sliding window re-scored every ``chunk_frames`` frames then only pushes the
+newest chunk through the backbone; the features of older chunks come from a
+small per-socket cache. How close this is to the monolithic model depends on
+how much the backbone mixes information across chunk boundaries; check with
+validate_split.py before enabling it.
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .clip_buffer import ClipBuffer
+from .runtime import Predictor, resolve_variant
+
+
+class FeatureCache:
+    """
+    Backbone features of the chunks making up one socket's current window.
+
+    Chunks are ``chunk`` frames long and end on frame indices (counted by
+    ``buffer.appended``) of the same phase, so the chunks computed for one
+    run are reused by the following ones. The head always covers the newest
+    complete chunk boundary, which may trail the newest frame by up to
+    ``chunk - 1`` frames. At most ``window // chunk`` entries are kept.
+    """
+
+    def __init__(self, buffer: ClipBuffer, chunk: int = 8):
+        if buffer.window_size % chunk:
+            raise ValueError(f"window of {buffer.window_size} frames is not a multiple of chunk {chunk}")
+        self.buffer = buffer
+        self.chunk = int(chunk)
+        self.chunks = buffer.window_size // self.chunk
+
+        self._features: dict[int, np.ndarray] = {}
+        self._phase: int | None = None
+        self._wanted: list[int] = []
+
+        self.computed = 0
+        self.reused = 0
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    @property
+    def full(self) -> bool:
+        return self.buffer.full
+
+    def _boundaries(self, latest: int) -> list[int]:
+        return [latest - k * self.chunk for k in reversed(range(self.chunks))]
+
+    def plan(self) -> list[int] | None:
+        """
+        Chunk end indices whose features still have to be computed for the
+        current window, or None when the window does not have enough frames.
+        """
+        n = self.buffer.appended
+        oldest = n - len(self.buffer)
+
+        def held(b):
+            return b - self.chunk >= oldest and b <= n
+
+        if self._phase is not None:
+            latest = n - (n - self._phase) % self.chunk
+            wanted = self._boundaries(latest)
+            if all(b in self._features or held(b) for b in wanted):
+                self._wanted = wanted
+                self._features = {b: f for b, f in self._features.items() if b in wanted}
+                return [b for b in wanted if b not in self._features]
+
+        # First run, or frames we never computed features for are gone:
+        # start over, aligned on the newest frame.
+        self._features.clear()
+        self._phase = n % self.chunk
+        wanted = self._boundaries(n)
+        if not all(held(b) for b in wanted):
+            self._phase = None
+            return None
+        self._wanted = wanted
+        return wanted
+
+    def chunk_frames(self, end: int, out: np.ndarray) -> np.ndarray:
+        return self.buffer.frames(end - self.chunk, self.chunk, out)
+
+    def put(self, end: int, features: np.ndarray):
+        self._features[end] = features
+
+    def window_features(self, axis: int) -> np.ndarray:
+        return np.concatenate([self._features[b] for b in self._wanted], axis=axis)
+
+    def keep_last(self, n: int):
+        """
+        ClipBuffer.keep_last that also forgets the cached features.
+        """
+        self.buffer.keep_last(n)
+        self._features.clear()
+        self._phase = None
+
+    @property
+    def nbytes(self) -> int:
+        return sum(f.nbytes for f in self._features.values())
+
+
+class TwoStagePredictor(Predictor):
+    """
+    Predictor running a backbone/head pair instead of one model.
+
+    Plain clips (``run``/``predict_batch`` with arrays) are cut into chunks,
+    pushed through the backbone as one batch and the features concatenated
+    along ``time_axis`` for the head, so they score exactly like the cached
+    path. ``predict_batch`` also accepts FeatureCache objects, for which
+    only the missing chunks go through the backbone; every chunk of the
+    batch, across all sockets, runs in one backbone call.
+    """
+
+    def _init_model(self):
+        fc = self.config.get("feature_cache") or {}
+        base_dir = Path(__file__).resolve().parent
+        self.chunk_frames = int(fc.get("chunk_frames", 8))
+        self.time_axis = int(fc.get("time_axis", 2))
+
+        backbone_path = base_dir / fc["backbone_model"]
+        head_path = base_dir / fc["head_model"]
+        self.backbone = self._open_session(backbone_path)
+        self.head = self._open_session(head_path)
+
+        model_input = self.backbone.get_inputs()[0]
+        self._check_input_size(model_input, backbone_path)
+        self.input_name = model_input.name
+        self.features_name = self.backbone.get_outputs()[0].name
+        self.head_input_name = self.head.get_inputs()[0].name
+        self.output_name = self.head.get_outputs()[0].name
+        self.dynamic_batch = not isinstance(self.head.get_inputs()[0].shape[0], int)
+        self._backbone_dynamic = not isinstance(model_input.shape[0], int)
+        self._chunks: np.ndarray | None = None
+
+    def run_backbone(self, chunks: np.ndarray) -> np.ndarray:
+        if self._backbone_dynamic or len(chunks) == 1:
+            return self.backbone.run([self.features_name], {self.input_name: chunks})[0]
+        return np.concatenate([
+            self.backbone.run([self.features_name], {self.input_name: chunks[i:i + 1]})[0]
+            for i in range(len(chunks))
+        ], axis=0)
+
+    def run_head(self, features: np.ndarray) -> np.ndarray:
+        if self.dynamic_batch or len(features) == 1:
+            return self.head.run([self.output_name], {self.head_input_name: features})[0]
+        return np.concatenate([
+            self.head.run([self.output_name], {self.head_input_name: features[i:i + 1]})[0]
+            for i in range(len(features))
+        ], axis=0)
+
+    def run(self, clip: np.ndarray) -> np.ndarray:
+        b, c, t, h, w = clip.shape
+        k = t // self.chunk_frames
+        chunks = clip[:, :, :k * self.chunk_frames].reshape(b, c, k, self.chunk_frames, h, w)
+        chunks = np.ascontiguousarray(chunks.transpose(0, 2, 1, 3, 4, 5)).reshape(b * k, c, self.chunk_frames, h, w)
+        features = self.run_backbone(chunks)
+        features = features.reshape((b, k) + features.shape[1:])
+        # (b, k, ...) -> chunk features side by side along the time axis.
+        features = np.concatenate([features[:, i] for i in range(k)], axis=self.time_axis)
+        return self.run_head(features)
+
+    def _chunk_batch(self, n: int, buffer: ClipBuffer) -> np.ndarray:
+        shape = (n, buffer.channels, self.chunk_frames, buffer.size, buffer.size)
+        if self._chunks is None or self._chunks.shape[0] < n or self._chunks.shape[1:] != shape[1:]:
+            self._chunks = np.empty(shape, dtype=np.float32)
+        return self._chunks[:n]
+
+    def run_cached(self, caches: list[FeatureCache], timings: dict | None = None) -> dict[int, np.ndarray]:
+        """
+        Bring every cache up to date and run the head over the ready ones.
+        Returns logits keyed by position in ``caches``.
+        """
+        t0 = time.perf_counter()
+        plans = [cache.plan() for cache in caches]
+        jobs = [(cache, end) for cache, plan in zip(caches, plans) if plan for end in plan]
+        if jobs:
+            chunks = self._chunk_batch(len(jobs), jobs[0][0].buffer)
+            for i, (cache, end) in enumerate(jobs):
+                cache.chunk_frames(end, chunks[i])
+            features = self.run_backbone(chunks)
+            for i, (cache, end) in enumerate(jobs):
+                cache.put(end, features[i:i + 1].copy())
+        t1 = time.perf_counter()
+
+        ready = [i for i, plan in enumerate(plans) if plan is not None]
+        for i in ready:
+            caches[i].computed += len(plans[i])
+            caches[i].reused += caches[i].chunks - len(plans[i])
+        logits = {}
+        if ready:
+            head_in = np.concatenate([caches[i].window_features(self.time_axis) for i in ready], axis=0)
+            logits = dict(zip(ready, self.run_head(head_in)))
+
+        if timings is not None:
+            timings["backbone"] = t1 - t0
+            timings["head"] = time.perf_counter() - t1
+        return logits
+
+    def predict_batch(self, clips, subsets: list | None = None, timings: dict | None = None) -> list:
+        if len(clips) == 0 or not isinstance(clips[0], FeatureCache):
+            return super().predict_batch(clips, subsets, timings)
+
+        t0 = time.perf_counter()
+        stages = {}
+        logits = self.run_cached(clips, stages)
+        t1 = time.perf_counter()
+
+        if subsets is None:
+            subsets = [None] * len(clips)
+        results = [
+            self.postprocess(logits[i], subsets[i]) if i in logits else None
+            for i in range(len(clips))
+        ]
+        if timings is not None:
+            timings.update(stages)
+            timings["run"] = t1 - t0
+            timings["postprocess"] = time.perf_counter() - t1
+        return results
+
+
+def make_predictor(config: dict, variant: str | None = None) -> Predictor:
+    """
+    TwoStagePredictor when the (variant's) "feature_cache" section is
+    enabled, else the monolithic Predictor.
+    """
+    resolved = resolve_variant(config, variant)
+    if (resolved.get("feature_cache") or {}).get("enabled"):
+        return TwoStagePredictor(resolved)
+    return Predictor(resolved)
@@ -0,0 +1,201 @@
+import asyncio
+import base64
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+
+FRAME_SIZE = 224
+
+# Binary frame message: fixed little-endian header followed by the payload.
+#   version u8, kind u8, width u16, height u16, seq u32, ts_ms f64
+FRAME_HEADER = struct.Struct("<BBHHId")
+FRAME_VERSION = 1
+
+KIND_ENCODED = 1    # JPEG/WebP bytes, width/height are ignored
+KIND_RAW_BGR = 2    # width*height*3 raw pixels
+KIND_RAW_RGBA = 3   # width*height*4 raw pixels, as returned by canvas getImageData()
+
+
+class FrameHeader:
+    __slots__ = ("version", "kind", "width", "height", "seq", "ts_ms")
+
+    def __init__(self, version, kind, width, height, seq, ts_ms):
+        self.version = version
+        self.kind = kind
+        self.width = width
+        self.height = height
+        self.seq = seq
+        self.ts_ms = ts_ms
+
+
+def pack_frame(payload: bytes, seq: int, ts_ms: float, kind: int = KIND_ENCODED,
+               width: int = 0, height: int = 0) -> bytes:
+    return FRAME_HEADER.pack(FRAME_VERSION, kind, width, height, seq, ts_ms) + payload
+
+
+def parse_frame_header(message: bytes) -> FrameHeader:
+    if len(message) < FRAME_HEADER.size:
+        raise ValueError("frame message shorter than header")
+    header = FrameHeader(*FRAME_HEADER.unpack_from(message))
+    if header.version != FRAME_VERSION:
+        raise ValueError(f"unsupported frame version {header.version}")
+    return header
+
+
+# JPEG start-of-frame markers (baseline, progressive, ...); C4/C8/CC are not SOF.
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# DCT-domain downscaling, largest factor first.
+_REDUCED = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+_scratch = threading.local()
+
+
+def jpeg_size(data) -> tuple[int, int] | None:
+    """
+    (width, height) from the SOF segment of a JPEG, or None if ``data`` is not
+    a JPEG or the header is cut short. Only the marker segments are walked.
+    """
+    data = memoryview(data).cast("B")
+    n = len(data)
+    if n < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = (data[i + 2] << 8) | data[i + 3]
+        if marker in _JPEG_SOF:
+            if i + 9 > n:
+                return None
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + length
+    return None
+
+
+def imdecode_at_least(payload: np.ndarray, size: int, fraction: float = 1.0) -> np.ndarray:
+    """
+    Decode an encoded image, letting libjpeg downscale in the DCT domain by
+    the largest factor (8, 4 or 2) that still leaves ``fraction`` of the short
+    side at least ``size`` pixels. Non-JPEG payloads decode at full size.
+    """
+    flag = cv2.IMREAD_COLOR
+    dims = jpeg_size(payload)
+    if dims is not None:
+        short = min(dims) * fraction
+        for factor, reduced in _REDUCED:
+            if short / factor >= size:
+                flag = reduced
+                break
+    img = cv2.imdecode(payload, flag)
+    if img is None:
+        raise ValueError
+    return img
+
+
+def scratch_frame(size: int) -> np.ndarray:
+    """
+    Per-thread (size, size, 3) uint8 buffer that decoded frames are resized
+    into before they are copied into a ClipBuffer.
+    """
+    buf = getattr(_scratch, "frame", None)
+    if buf is None or buf.shape[0] != size:
+        buf = _scratch.frame = np.empty((size, size, 3), dtype=np.uint8)
+    return buf
+
+
+def _fit(img: np.ndarray, size: int, roi=None, out: np.ndarray | None = None) -> np.ndarray:
+    if roi is not None:
+        return roi.crop(img, size, out)
+    if img.shape[0] == size and img.shape[1] == size:
+        return img
+    return cv2.resize(img, (size, size), dst=out, interpolation=cv2.INTER_LINEAR)
+
+
+def _decode(payload: np.ndarray, size: int, roi=None, out: np.ndarray | None = None) -> np.ndarray:
+    fraction = roi.min_box if roi is not None else 1.0
+    return _fit(imdecode_at_least(payload, size, fraction), size, roi, out)
+
+
+def decode_frame_bgr224(data_url: str, size: int = FRAME_SIZE, roi=None,
+                        out: np.ndarray | None = None) -> np.ndarray:
+    _, encoded = data_url.split(",", 1)
+    img_bytes = base64.b64decode(encoded)
+    return _decode(np.frombuffer(img_bytes, np.uint8), size, roi, out)
+
+
+def decode_frame_bytes_bgr224(message: bytes, size: int = FRAME_SIZE, roi=None,
+                              out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Decode a binary frame message (header + payload) into a ``size`` x ``size``
+    BGR frame (224 unless the model variant uses a smaller input). The payload
+    is read in place with np.frombuffer, without copying, and JPEGs larger than
+    needed are decoded at a reduced scale. With ``roi`` (a RoiTracker) the
+    frame is cropped to the signer instead of resized whole. ``out`` is an
+    optional (size, size, 3) uint8 array to resize into.
+    """
+    header = parse_frame_header(message)
+    payload = np.frombuffer(message, np.uint8, offset=FRAME_HEADER.size)
+
+    if header.kind == KIND_ENCODED:
+        return _decode(payload, size, roi, out)
+
+    if header.kind in (KIND_RAW_BGR, KIND_RAW_RGBA):
+        channels = 3 if header.kind == KIND_RAW_BGR else 4
+        expected = header.width * header.height * channels
+        if expected == 0 or payload.size != expected:
+            raise ValueError("raw frame size does not match header")
+        img = payload.reshape(header.height, header.width, channels)
+        if channels == 4:
+            img = cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
+        return _fit(img, size, roi, out)
+
+    raise ValueError(f"unknown frame kind {header.kind}")
+
+
+def decode_into(frames, data: str | bytes, roi=None):
+    """
+    Decode a JSON data URL (str) or a binary frame message (bytes) and append
+    it to ``frames``, a ClipBuffer, optionally cropped by ``roi``. The resized
+    frame goes through this thread's scratch buffer, so nothing frame-sized is
+    allocated per call; ClipBuffer.append then normalizes it straight into its
+    channel-first ring slot.
+    """
+    out = scratch_frame(frames.size)
+    if isinstance(data, str):
+        frames.append(decode_frame_bgr224(data, frames.size, roi, out))
+    else:
+        frames.append(decode_frame_bytes_bgr224(data, frames.size, roi, out))
+
+
+async def decode_held(frames, data: str | bytes, roi=None):
+    """
+    decode_into on a worker thread. ``frames`` is held until the thread is
+    done with it, even when the caller is cancelled first (socket closed).
+    """
+    loop = asyncio.get_running_loop()
+
+    def run():
+        try:
+            decode_into(frames, data, roi)
+        finally:
+            loop.call_soon_threadsafe(frames.unhold)
+
+    frames.hold()
+    await asyncio.to_thread(run)
@@ -0,0 +1,142 @@
+"""
+Generate reduced-precision and reduced-resolution variants of model.onnx and
+register them in config.json under "model_variants".
+
+    python -m app.backend.ml.easy_sign.make_variants --variants int8_dynamic fp16
+    python -m app.backend.ml.easy_sign.make_variants --variants int8_static --calib-dir recordings/
+    python -m app.backend.ml.easy_sign.make_variants --variants fp32_160
+
+Static INT8 needs a folder of recorded practice videos for calibration.
+fp32_160 rewrites the input's height and width to 160 and re-runs shape
+inference; it fails if the graph hardcodes the 224 px spatial size (e.g. in
+a Reshape), in which case the model has to be re-exported at 160 px from
+the training checkpoint. Each entry in config.json names its command under
+"generate".
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from app.backend.ml.easy_sign.recordings import load_clips
+from app.backend.ml.easy_sign.tune_session import replace_key
+
+BASE_DIR = Path(__file__).resolve().parent
+CFG_PATH = BASE_DIR / "config.json"
+
+
+class ClipCalibrationReader:
+    def __init__(self, input_name: str, clips: list[np.ndarray]):
+        self.input_name = input_name
+        self._it = iter(clips)
+
+    def get_next(self):
+        clip = next(self._it, None)
+        return None if clip is None else {self.input_name: clip}
+
+
+def make_int8_dynamic(src: Path, dst: Path, args):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+
+
+def make_int8_static(src: Path, dst: Path, args):
+    import onnx
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    if not args.calib_dir:
+        raise SystemExit("int8_static needs --calib-dir with recorded clips")
+    clips = load_clips(args.calib_dir, args.window, args.input_size, stride=args.window, limit=args.calib_clips)
+    if not clips:
+        raise SystemExit(f"no calibration clips found in {args.calib_dir}")
+
+    prepared = dst.with_suffix(".pre.onnx")
+    quant_pre_process(str(src), str(prepared))
+    input_name = onnx.load(str(prepared), load_external_data=False).graph.input[0].name
+    quantize_static(
+        str(prepared),
+        str(dst),
+        ClipCalibrationReader(input_name, clips),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    prepared.unlink(missing_ok=True)
+
+
+def make_fp16(src: Path, dst: Path, args):
+    import onnx
+    from onnxruntime.transformers.float16 import convert_float_to_float16
+
+    model = convert_float_to_float16(onnx.load(str(src)), keep_io_types=True)
+    onnx.save(model, str(dst))
+
+
+def make_fp32_160(src: Path, dst: Path, args):
+    import onnx
+    import onnxruntime as rt
+
+    size = 160
+    model = onnx.load(str(src))
+    for dim in model.graph.input[0].type.tensor_type.shape.dim[-2:]:
+        dim.dim_value = size
+    # Intermediate shapes were inferred for the old size.
+    del model.graph.value_info[:]
+    try:
+        model = onnx.shape_inference.infer_shapes(model, strict_mode=True)
+        onnx.checker.check_model(model)
+        session = rt.InferenceSession(model.SerializeToString(), providers=["CPUExecutionProvider"])
+        session.run(None, {session.get_inputs()[0].name: np.zeros((1, 3, args.window, size, size), np.float32)})
+    except Exception as exc:
+        raise SystemExit(
+            f"{src.name} does not run at {size}x{size} ({exc}); re-export it at {size} px from the checkpoint"
+        )
+    onnx.save(model, str(dst))
+    return {"input_size": size}
+
+
+MAKERS = {
+    "int8_dynamic": make_int8_dynamic,
+    "int8_static": make_int8_static,
+    "fp16": make_fp16,
+    "fp32_160": make_fp32_160,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, default=str(CFG_PATH))
+    parser.add_argument("--variants", nargs="+", choices=sorted(MAKERS), default=["int8_dynamic"])
+    parser.add_argument("--calib-dir", type=str, default=None)
+    parser.add_argument("--calib-clips", type=int, default=64)
+    parser.add_argument("--window", type=int, default=32)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        text = f.read()
+    cfg = json.loads(text)
+    args.input_size = int(cfg.get("input_size", 224))
+
+    src = BASE_DIR / cfg["path_to_model"]
+    variants = cfg.setdefault("model_variants", {})
+
+    for name in args.variants:
+        dst = src.with_name(f"{src.stem}.{name}.onnx")
+        print(f"{name}: {src.name} -> {dst.name}")
+        extra = MAKERS[name](src, dst, args) or {}
+        entry = dict(variants.get(name) or {})
+        entry["path_to_model"] = str(dst.relative_to(BASE_DIR)) if dst.is_relative_to(BASE_DIR) else str(dst)
+        entry.update(extra)
+        variants[name] = entry
+
+        text = replace_key(text, "model_variants", variants)
+        with open(args.config, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Worker-process mode for decode and inference.
+
+Every worker loads its own Predictor once, in the pool initializer. Frames
+and clips never cross the process boundary as pickled arrays: each socket
+owns a shared memory segment holding its ClipBuffer ring followed by an
+inbox for the encoded frame. Workers decode straight from the inbox into the
+ring and gather clips from the ring; only segment names, slot indices, label
+subsets and the small result dicts are pickled.
+"""
+import asyncio
+import multiprocessing as mp
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .clip_buffer import ClipBuffer
+from .frames import decode_frame_bgr224, decode_frame_bytes_bgr224, scratch_frame
+from .runtime import Predictor
+
+INBOX_BYTES = 1 << 20
+MAX_ATTACHED = 64
+WARMUP_TIMEOUT_S = 600.0
+
+
+class SharedClipBuffer(ClipBuffer):
+    """
+    ClipBuffer whose ring lives in a shared memory segment that pool workers
+    attach to by name.
+    """
+
+    def __init__(self, window_size: int = 32, size: int = 224, channels: int = 3, dtype=np.float32,
+                 inbox_bytes: int = INBOX_BYTES, on_release=None):
+        ring_bytes = self.ring_nbytes(window_size, size, channels, dtype)
+        self.shm = SharedMemory(create=True, size=ring_bytes + inbox_bytes)
+        # Called with the segment name once it is unlinked, so the backend
+        # can tell workers to drop their mapping of it.
+        self.on_release = on_release
+        self.inbox = self.shm.buf[ring_bytes:]
+        super().__init__(window_size, size, channels, dtype, buffer=self.shm.buf[:ring_bytes])
+
+    def layout(self) -> tuple:
+        return self.shm.name, self.window_size, self.size, self.channels, self.dtype.str
+
+    def handle(self) -> tuple:
+        return self.layout() + (self._head,)
+
+    def put_inbox(self, payload: bytes) -> int:
+        n = len(payload)
+        if n > len(self.inbox):
+            raise ValueError("frame larger than shared inbox")
+        self.inbox[:n] = payload
+        return n
+
+    def _ensure_ring(self):
+        if self._ring is None:
+            raise RuntimeError("shared clip buffer was released")
+
+    def _free(self):
+        if self.shm is None:
+            return
+        self._ring = None
+        self.inbox.release()
+        name = self.shm.name
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = None
+        if self.on_release is not None:
+            self.on_release(name)
+
+
+class ReleaseLog:
+    """
+    Names of released segments in a small shared ring, written by the event
+    loop and read by pool workers at the start of every call, so a worker
+    drops its mapping of a segment soon after the socket owning it is gone
+    instead of keeping it until its LRU evicts it.
+    """
+
+    SLOTS = 256
+    NAME_BYTES = 64
+
+    def __init__(self, name: str | None = None):
+        size = 8 + self.SLOTS * self.NAME_BYTES
+        self.shm = SharedMemory(name=name, create=name is None, size=size)
+        self._count = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf[:8])
+        self._names = np.ndarray((self.SLOTS,), dtype=f"S{self.NAME_BYTES}", buffer=self.shm.buf[8:size])
+        if name is None:
+            self._count[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def append(self, segment: str):
+        n = int(self._count[0])
+        self._names[n % self.SLOTS] = segment.encode("ascii")
+        self._count[0] = n + 1
+
+    def since(self, seen: int) -> tuple[int, list[str] | None]:
+        """
+        Names appended after the first ``seen`` ones, and the new count.
+        None instead of the names when the ring has wrapped past them.
+        """
+        n = int(self._count[0])
+        if n - seen > self.SLOTS:
+            return n, None
+        return n, [self._names[i % self.SLOTS].decode("ascii") for i in range(seen, n)]
+
+    def close(self, unlink: bool = False):
+        del self._count, self._names
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+# --- worker side -----------------------------------------------------------
+
+_predictor: Predictor | None = None
+_segments: "OrderedDict[str, SharedMemory]" = OrderedDict()
+_batch: np.ndarray | None = None
+_standalone = False
+_load_seconds = 0.0
+_release_log: ReleaseLog | None = None
+_release_seen = 0
+_warmup_barrier = None
+
+
+def _init_worker(config: dict, standalone: bool = False, release_log: str | None = None,
+                 warmup_barrier=None):
+    """
+    ``standalone`` is for workers that are not children of the process owning
+    the segments (see worker_server.py). ``release_log`` names the gateway's
+    ReleaseLog. ``warmup_barrier`` is shared by all workers of a pool (see
+    ProcessBackend.warmup).
+    """
+    global _predictor, _standalone, _load_seconds, _release_log, _warmup_barrier
+    t0 = time.perf_counter()
+    _predictor = Predictor(config)
+    _load_seconds = time.perf_counter() - t0
+    _standalone = standalone
+    _warmup_barrier = warmup_barrier
+    if release_log is not None:
+        _release_log = ReleaseLog(release_log)
+
+
+def _detach(name: str):
+    shm = _segments.pop(name, None)
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def _forget(names):
+    """
+    Drop the mappings of segments the gateway has released.
+    """
+    for name in names:
+        _detach(name)
+
+
+def _forget_released():
+    global _release_seen
+    if _release_log is None:
+        return
+    _release_seen, names = _release_log.since(_release_seen)
+    # Missed some: drop every mapping, the live ones are attached again.
+    _forget(list(_segments) if names is None else names)
+
+
+def _attach(name: str) -> SharedMemory:
+    shm = _segments.get(name)
+    if shm is not None:
+        _segments.move_to_end(name)
+        return shm
+
+    # Spawned workers share the parent's resource tracker, so attaching here
+    # does not add a second owner; the socket that created the segment unlinks it.
+    shm = SharedMemory(name=name)
+    if _standalone:
+        # A standalone worker has a tracker of its own, which would unlink
+        # the gateway's segments when the worker exits.
+        resource_tracker.unregister(shm._name, "shared_memory")
+    _segments[name] = shm
+
+    while len(_segments) > MAX_ATTACHED:
+        _detach(next(iter(_segments)))
+    return shm
+
+
+def _view(name, window_size, size, channels, dtype, head=0) -> ClipBuffer:
+    shm = _attach(name)
+    ring_bytes = ClipBuffer.ring_nbytes(window_size, size, channels, dtype)
+    buf = ClipBuffer(window_size, size, channels, dtype, buffer=shm.buf[:ring_bytes])
+    buf._head = head
+    return buf
+
+
+def _worker_warmup() -> dict:
+    timings = {"model_load": _load_seconds, "first_inference": _predictor.warmup()}
+    if _warmup_barrier is not None:
+        # Not done until every worker has a warm-up call of its own, so no
+        # worker can take a second one while another has none.
+        _warmup_barrier.wait(WARMUP_TIMEOUT_S)
+    return timings
+
+
+def _worker_decode(layout: tuple, slot: int, nbytes: int, is_text: bool, roi=None):
+    _forget_released()
+    buf = _view(*layout)
+    ring_bytes = ClipBuffer.ring_nbytes(*layout[1:])
+    raw = _segments[layout[0]].buf[ring_bytes:ring_bytes + nbytes]
+    try:
+        out = scratch_frame(buf.size)
+        if is_text:
+            frame = decode_frame_bgr224(bytes(raw).decode("ascii"), buf.size, roi, out)
+        else:
+            frame = decode_frame_bytes_bgr224(raw, buf.size, roi, out)
+        buf.write(slot, frame)
+        del frame
+    finally:
+        raw.release()
+    # The tracker was pickled over; hand its updated state back to the socket.
+    return roi.state() if roi is not None else None
+
+
+def _worker_predict_batch(handles: list, subsets: list, forget=()) -> tuple[list, dict]:
+    global _batch
+    _forget_released()
+    _forget(forget)
+    first = _view(*handles[0])
+    shape = (len(handles),) + first.ring_shape
+    if _batch is None or _batch.shape[0] < shape[0] or _batch.shape[1:] != shape[1:]:
+        _batch = np.empty((max(shape[0], 1),) + shape[1:], dtype=np.float32)
+
+    batch = _batch[:len(handles)]
+    for i, handle in enumerate(handles):
+        _view(*handle).clip(out=batch[i:i + 1])
+    timings = {}
+    return _predictor.predict_batch(batch, subsets, timings), timings
+
+
+# --- event loop side -------------------------------------------------------
+
+class ProcessBackend:
+    """
+    Inference backend running decode and Predictor in ``processes`` worker
+    processes. Up to ``processes`` batches are in flight at once.
+    """
+
+    def __init__(self, config: dict, processes: int = 2):
+        self.processes = max(1, int(processes))
+        self.max_inflight = self.processes
+
+        # Without an explicit thread count every worker's ORT pool would size
+        # itself to all cores; split them between workers instead.
+        config = dict(config)
+        profile = dict(config.get("session_options") or {})
+        if not profile.get("intra_op_num_threads"):
+            profile["intra_op_num_threads"] = max(1, (os.cpu_count() or 1) // self.processes)
+        config["session_options"] = profile
+
+        self.released = ReleaseLog()
+        context = mp.get_context("spawn")
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(config, False, self.released.name, context.Barrier(self.processes)),
+        )
+
+    def new_buffer(self, window_size: int, size: int = 224, dtype=np.float32) -> SharedClipBuffer:
+        return SharedClipBuffer(window_size, size, dtype=dtype, on_release=self.released.append)
+
+    async def warmup(self) -> dict:
+        """
+        Start the workers and run a dummy clip in each, returning once all
+        of them are warm. Returns the slowest worker's seconds per phase.
+        """
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self.pool, _worker_warmup) for _ in range(self.processes)
+        ])
+        return {phase: max(r[phase] for r in results) for phase in results[0]}
+
+    async def decode_into(self, frames: SharedClipBuffer, data: str | bytes, roi=None):
+        is_text = isinstance(data, str)
+        nbytes = frames.put_inbox(data.encode("ascii") if is_text else data)
+        loop = asyncio.get_running_loop()
+        # The worker keeps writing into the segment even if this coroutine is
+        # cancelled, so the hold is dropped when the worker is done.
+        frames.hold()
+        job = self.pool.submit(_worker_decode, frames.layout(), frames.next_slot, nbytes, is_text, roi)
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(frames.unhold))
+        state = await asyncio.wrap_future(job)
+        if roi is not None:
+            roi.restore(state)
+        frames.advance()
+
+    async def predict_batch(self, clips: list, subsets: list, timings: dict | None = None) -> list:
+        results, worker_timings = await asyncio.get_running_loop().run_in_executor(
+            self.pool, _worker_predict_batch, [c.handle() for c in clips], subsets
+        )
+        if timings is not None:
+            timings.update(worker_timings)
+        return results
+
+    async def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.released.close(unlink=True)
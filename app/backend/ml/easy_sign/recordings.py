@@ -0,0 +1,85 @@
+from pathlib import Path
+from typing import Iterator
+
+import cv2
+import numpy as np
+
+from .clip_buffer import ClipBuffer
+from .roi import RoiTracker
+
+VIDEO_SUFFIXES = {".mp4", ".webm", ".mov", ".avi", ".mkv"}
+
+
+class UnreadableVideo(ValueError):
+    pass
+
+
+def iter_video_frames(path: str | Path, size: int = 224, roi=None) -> Iterator[tuple[float, np.ndarray]]:
+    """
+    Stream (timestamp_s, frame) pairs out of a video file one frame at a time,
+    resized (or, with a RoiTracker as ``roi``, cropped) to ``size`` x ``size``
+    BGR. The file is never loaded as a whole.
+    """
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise UnreadableVideo(f"cannot open video {path}")
+    try:
+        while True:
+            ok, img = cap.read()
+            if not ok:
+                break
+            ts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if roi is not None:
+                yield ts, roi.crop(img, size)
+            else:
+                yield ts, cv2.resize(img, (size, size), interpolation=cv2.INTER_LINEAR)
+    finally:
+        cap.release()
+
+
+def iter_video_clips(path: str | Path, window_size: int = 32, size: int = 224,
+                     stride: int = 8, roi=None) -> Iterator[tuple[float, np.ndarray]]:
+    """
+    Slide a ``window_size`` window over a video with step ``stride`` and yield
+    (timestamp_s of the newest frame, (1, c, t, h, w) float32 clip) pairs.
+    Each yielded clip is a fresh array.
+    """
+    buf = ClipBuffer(window_size, size)
+    since = 0
+    for ts, frame in iter_video_frames(path, size, roi):
+        buf.append(frame)
+        since += 1
+        if buf.full and since >= stride:
+            since = 0
+            yield ts, buf.clip().copy()
+
+
+def find_recordings(folder: str | Path) -> list[Path]:
+    return sorted(p for p in Path(folder).rglob("*") if p.suffix.lower() in VIDEO_SUFFIXES)
+
+
+def load_clips(folder: str | Path, window_size: int = 32, size: int = 224, stride: int = 16,
+               limit: int | None = None, config: dict | None = None) -> list[np.ndarray]:
+    """
+    Collect clips from every video under ``folder``. ``.npy`` files holding a
+    (t, h, w, c) uint8 BGR clip are picked up as well. When ``config`` enables
+    "roi", frames are cropped with a fresh RoiTracker per file.
+    """
+    clips = []
+    folder = Path(folder)
+    for npy in sorted(folder.rglob("*.npy")):
+        buf = ClipBuffer(window_size, size)
+        roi = RoiTracker.from_config(config or {})
+        for frame in np.load(npy)[-window_size:]:
+            if roi is not None:
+                buf.append(roi.crop(frame, size))
+            else:
+                buf.append(cv2.resize(frame, (size, size), interpolation=cv2.INTER_LINEAR))
+        if buf.full:
+            clips.append(buf.clip().copy())
+    for video in find_recordings(folder):
+        for _, clip in iter_video_clips(video, window_size, size, stride, RoiTracker.from_config(config or {})):
+            clips.append(clip)
+            if limit and len(clips) >= limit:
+                return clips
+    return clips[:limit] if limit else clips
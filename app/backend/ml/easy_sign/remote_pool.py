@@ -0,0 +1,271 @@
+"""
+Gateway side of the remote worker mode.
+
+The web process only receives and decodes frames; clip windows live in
+shared memory segments (SharedClipBuffer) and batches are handed to
+standalone inference workers (worker_server.py) over Unix sockets. Several
+workers can run on the box and be restarted independently of the gateway.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from .frames import decode_held
+from .process_pool import SharedClipBuffer
+from .worker_server import read_message, send_message
+
+logger = logging.getLogger("gesture_ws")
+
+
+class WorkerUnavailable(RuntimeError):
+    pass
+
+
+class WorkerConnection:
+    """
+    One Unix socket connection to a worker. Requests are pipelined; replies
+    are matched to their request by id. When the connection drops, every
+    pending request fails with WorkerUnavailable and the worker is marked
+    unhealthy until a health check reconnects it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.healthy = False
+        self.inflight = 0
+        self.remote_queued = 0
+        self.failures = 0
+        self.last_health: dict | None = None
+        # Segments released since the last predict call; sent with the next
+        # one so the worker drops its mappings of them.
+        self.released: deque[str] = deque(maxlen=1024)
+
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    @property
+    def load(self) -> tuple:
+        return self.inflight, self.remote_queued
+
+    async def connect(self):
+        async with self._connect_lock:
+            if self.connected:
+                return
+            reader, self._writer = await asyncio.open_unix_connection(self.path)
+            self._reader_task = asyncio.create_task(self._read_replies(reader, self._writer))
+
+    async def _read_replies(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                req_id, ok, payload = await read_message(reader)
+                fut = self._pending.pop(req_id, None)
+                if fut is None or fut.done():
+                    continue
+                if ok:
+                    fut.set_result(payload)
+                else:
+                    fut.set_exception(RuntimeError(f"worker {self.path}: {payload}"))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            # A newer connection may have replaced this one in the meantime.
+            if self._writer is writer:
+                self.mark_down("connection lost")
+
+    def mark_down(self, reason: str):
+        if self.healthy:
+            logger.warning(f"inference worker {self.path} down: {reason}")
+        self.healthy = False
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_exception(WorkerUnavailable(f"worker {self.path}: {reason}"))
+
+    async def call(self, op: str, payload=None, timeout: float | None = None):
+        if not self.connected:
+            raise WorkerUnavailable(f"worker {self.path} is not connected")
+        req_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = fut
+        try:
+            send_message(self._writer, (req_id, op, payload))
+            await self._writer.drain()
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            # A worker stuck in a batch is as good as dead to the caller.
+            self.mark_down(f"{op} timed out")
+            raise WorkerUnavailable(f"worker {self.path}: {op} timed out")
+        except (ConnectionError, OSError) as exc:
+            self.mark_down(str(exc))
+            raise WorkerUnavailable(f"worker {self.path}: {exc}")
+        finally:
+            self._pending.pop(req_id, None)
+
+    async def check(self, timeout: float):
+        try:
+            if not self.connected:
+                await self.connect()
+            health = await self.call("health", timeout=timeout)
+        except (WorkerUnavailable, ConnectionError, OSError, asyncio.TimeoutError) as exc:
+            self.failures += 1
+            self.mark_down(str(exc) or type(exc).__name__)
+            return
+        if not self.healthy:
+            logger.info(f"inference worker {self.path} up (pid {health.get('pid')})")
+        self.healthy = True
+        self.last_health = health
+        self.remote_queued = int(health.get("queued", 0)) + bool(health.get("busy"))
+
+    async def close(self):
+        self.healthy = False
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        self.mark_down("closed")
+
+
+class RemoteBackend:
+    """
+    Inference backend that decodes frames in this process and runs batches
+    on standalone workers over Unix sockets.
+
+    Each batch goes to the healthy worker with the fewest requests in flight
+    from this gateway (ties broken by the queue length the worker reported
+    at its last health check). If the worker fails or times out, the batch
+    is retried on the next one, so a dying worker costs a retry rather than
+    an error. Workers are health-checked every ``health_interval_s`` and
+    reconnected when they come back.
+    """
+
+    def __init__(self, sockets: list[str], health_interval_s: float = 2.0,
+                 health_timeout_s: float = 1.0, request_timeout_s: float = 10.0):
+        if not sockets:
+            raise ValueError("remote worker mode needs at least one inference socket")
+        self.workers = [WorkerConnection(path) for path in sockets]
+        self.max_inflight = len(self.workers)
+        self.health_interval_s = float(health_interval_s)
+        self.health_timeout_s = float(health_timeout_s)
+        self.request_timeout_s = float(request_timeout_s)
+
+        self.failovers = 0
+        self._health_task: asyncio.Task | None = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RemoteBackend":
+        sockets = os.getenv("GESTU_INFERENCE_SOCKETS")
+        sockets = sockets.split(",") if sockets else list(config.get("inference_sockets") or [])
+        return cls(
+            [s.strip() for s in sockets if s.strip()],
+            health_interval_s=float(config.get("inference_health_interval_s", 2.0)),
+            request_timeout_s=float(config.get("inference_request_timeout_s", 10.0)),
+        )
+
+    @property
+    def healthy(self) -> int:
+        return sum(w.healthy for w in self.workers)
+
+    def new_buffer(self, window_size: int, size: int = 224, dtype=np.float32) -> SharedClipBuffer:
+        # Frames are decoded here, so the segment needs no inbox.
+        return SharedClipBuffer(window_size, size, dtype=dtype, inbox_bytes=0, on_release=self._released)
+
+    def _released(self, name: str):
+        for worker in self.workers:
+            worker.released.append(name)
+
+    async def decode_into(self, frames: SharedClipBuffer, data: str | bytes, roi=None):
+        await decode_held(frames, data, roi)
+
+    async def _check_all(self):
+        await asyncio.gather(*[w.check(self.health_timeout_s) for w in self.workers])
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval_s)
+            await self._check_all()
+
+    def _ensure_started(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def warmup(self) -> dict:
+        # Workers load and warm up their model before they start listening.
+        self._ensure_started()
+        await self._check_all()
+        if not self.healthy:
+            logger.warning("no inference worker is reachable yet")
+        return {}
+
+    def _pick(self, exclude: set) -> WorkerConnection | None:
+        candidates = [w for w in self.workers if w.healthy and w not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda w: w.load)
+
+    async def predict_batch(self, clips: list, subsets: list, timings: dict | None = None) -> list:
+        self._ensure_started()
+        handles = [c.handle() for c in clips]
+        tried = set()
+
+        while True:
+            worker = self._pick(tried)
+            if worker is None:
+                if not tried:
+                    # Nothing known healthy: probe once before giving up.
+                    await self._check_all()
+                    worker = self._pick(tried)
+                if worker is None:
+                    raise WorkerUnavailable("no healthy inference worker")
+
+            tried.add(worker)
+            worker.inflight += 1
+            forget = list(worker.released)
+            worker.released.clear()
+            t0 = time.perf_counter()
+            try:
+                results, worker_timings = await worker.call(
+                    "predict", (handles, subsets, forget), timeout=self.request_timeout_s
+                )
+            except WorkerUnavailable as exc:
+                worker.released.extendleft(reversed(forget))
+                self.failovers += 1
+                logger.warning(f"{exc}; retrying batch on another worker")
+                continue
+            finally:
+                worker.inflight -= 1
+
+            if timings is not None:
+                timings.update(worker_timings)
+                timings["remote"] = time.perf_counter() - t0
+            return results
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "failovers": self.failovers,
+            "workers": [
+                {"socket": w.path, "healthy": w.healthy, "inflight": w.inflight,
+                 "queued": w.remote_queued, "failures": w.failures}
+                for w in self.workers
+            ],
+        }
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+        await asyncio.gather(*[w.close() for w in self.workers])
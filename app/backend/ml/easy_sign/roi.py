@@ -0,0 +1,128 @@
+import cv2
+import numpy as np
+
+
+class RoiTracker:
+    """
+    Crops camera frames to the signer's hands and upper body before they go
+    into the clip buffer.
+
+    Detection is deliberately cheap: the frame is shrunk to ``detect_size``
+    pixels on its long side, skin-coloured pixels (YCrCb range) and pixels
+    that changed since the previous frame are combined into one mask, and the
+    robust extent of the mask (2nd-98th percentile of its coordinates) gives
+    the raw box. The box is padded by ``margin``, made square, kept at least
+    ``min_box`` of the short frame side, and smoothed across frames with an
+    exponential moving average so the crop stays steady over a clip window.
+    Without enough mask pixels the previous box is kept; before the first
+    detection the whole frame is used.
+
+    The only state carried between frames is the box and the previous small
+    grayscale frame (see ``state``/``restore``), so the tracker can be shipped
+    to a worker process together with the frame.
+    """
+
+    CR_RANGE = (133, 173)
+    CB_RANGE = (77, 127)
+
+    def __init__(self, detect_size: int = 64, margin: float = 0.2, smoothing: float = 0.8,
+                 min_box: float = 0.5, motion_threshold: int = 18, min_pixels: int = 24):
+        self.detect_size = int(detect_size)
+        self.margin = float(margin)
+        self.smoothing = min(max(float(smoothing), 0.0), 0.99)
+        self.min_box = min(max(float(min_box), 0.05), 1.0)
+        self.motion_threshold = int(motion_threshold)
+        self.min_pixels = int(min_pixels)
+
+        self.box: np.ndarray | None = None   # x0, y0, x1, y1 as fractions of the frame
+        self._prev: np.ndarray | None = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RoiTracker | None":
+        """
+        Tracker built from the "roi" section of the model config, or None when
+        cropping is disabled.
+        """
+        roi = config.get("roi") or {}
+        if not roi.get("enabled"):
+            return None
+        return cls(
+            detect_size=int(roi.get("detect_size", 64)),
+            margin=float(roi.get("margin", 0.2)),
+            smoothing=float(roi.get("smoothing", 0.8)),
+            min_box=float(roi.get("min_box", 0.5)),
+            motion_threshold=int(roi.get("motion_threshold", 18)),
+        )
+
+    def state(self) -> tuple:
+        return self.box, self._prev
+
+    def restore(self, state: tuple):
+        self.box, self._prev = state
+
+    def reset(self):
+        self.box = None
+        self._prev = None
+
+    def _mask(self, small: np.ndarray) -> np.ndarray:
+        ycrcb = cv2.cvtColor(small, cv2.COLOR_BGR2YCrCb)
+        skin = cv2.inRange(
+            ycrcb, (0, self.CR_RANGE[0], self.CB_RANGE[0]), (255, self.CR_RANGE[1], self.CB_RANGE[1])
+        )
+
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        prev, self._prev = self._prev, gray
+        if prev is None or prev.shape != gray.shape:
+            return skin
+        motion = cv2.threshold(cv2.absdiff(gray, prev), self.motion_threshold, 255, cv2.THRESH_BINARY)[1]
+        return cv2.bitwise_or(skin, motion)
+
+    def _detect(self, img: np.ndarray) -> np.ndarray | None:
+        h, w = img.shape[:2]
+        scale = self.detect_size / max(h, w)
+        small = cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+
+        ys, xs = np.nonzero(self._mask(small))
+        if len(xs) < self.min_pixels:
+            return None
+
+        sh, sw = small.shape[:2]
+        x0, x1 = np.percentile(xs, (2, 98)) / sw
+        y0, y1 = np.percentile(ys, (2, 98)) / sh
+        return np.array([x0, y0, x1, y1], dtype=np.float32)
+
+    def _square(self, box: np.ndarray, w: int, h: int) -> np.ndarray:
+        """
+        Pad, square up (in pixels) and clamp a fractional box.
+        """
+        cx = (box[0] + box[2]) / 2 * w
+        cy = (box[1] + box[3]) / 2 * h
+        side = max((box[2] - box[0]) * w, (box[3] - box[1]) * h) * (1.0 + 2 * self.margin)
+        side = min(max(side, self.min_box * min(w, h)), min(w, h))
+
+        x0 = min(max(cx - side / 2, 0.0), w - side)
+        y0 = min(max(cy - side / 2, 0.0), h - side)
+        return np.array([x0 / w, y0 / h, (x0 + side) / w, (y0 + side) / h], dtype=np.float32)
+
+    def crop(self, img: np.ndarray, size: int, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Update the box with ``img`` (a full-resolution BGR frame) and return
+        the region of interest resized to ``size`` x ``size``, into ``out``
+        when given.
+        """
+        h, w = img.shape[:2]
+        raw = self._detect(img)
+        if raw is not None:
+            target = self._square(raw, w, h)
+            if self.box is None:
+                self.box = target
+            else:
+                self.box = self.smoothing * self.box + (1.0 - self.smoothing) * target
+
+        if self.box is None:
+            return cv2.resize(img, (size, size), dst=out, interpolation=cv2.INTER_LINEAR)
+
+        x0, y0, x1, y1 = (self.box * np.array([w, h, w, h], dtype=np.float32)).round().astype(int)
+        region = img[max(y0, 0):max(y1, y0 + 1), max(x0, 0):max(x1, x0 + 1)]
+        interpolation = cv2.INTER_AREA if region.shape[0] > size else cv2.INTER_LINEAR
+        return cv2.resize(region, (size, size), dst=out, interpolation=interpolation)
@@ -1,3 +1,8 @@
+import hashlib
+import json
+import os
+import threading
+import time
 from pathlib import Path
 from sys import platform
 import numpy as np
@@ -5,21 +10,187 @@ import onnxruntime as rt
 from einops import rearrange
 
 
+GRAPH_OPT_LEVELS = {
+    "disable": rt.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": rt.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": rt.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": rt.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "sequential": rt.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": rt.ExecutionMode.ORT_PARALLEL,
+}
+
+
+def build_session_options(profile: dict) -> rt.SessionOptions:
+    """
+    Build ORT SessionOptions from the "session_options" profile in config.json.
+    Missing keys keep the onnxruntime defaults.
+    """
+    so = rt.SessionOptions()
+
+    if "intra_op_num_threads" in profile:
+        so.intra_op_num_threads = int(profile["intra_op_num_threads"])
+    if "inter_op_num_threads" in profile:
+        so.inter_op_num_threads = int(profile["inter_op_num_threads"])
+    if "execution_mode" in profile:
+        so.execution_mode = EXECUTION_MODES[profile["execution_mode"]]
+    if "graph_optimization_level" in profile:
+        so.graph_optimization_level = GRAPH_OPT_LEVELS[profile["graph_optimization_level"]]
+    if "enable_cpu_mem_arena" in profile:
+        so.enable_cpu_mem_arena = bool(profile["enable_cpu_mem_arena"])
+    if "enable_mem_pattern" in profile:
+        so.enable_mem_pattern = bool(profile["enable_mem_pattern"])
+    if "allow_spinning" in profile:
+        # Idle ORT threads busy-wait by default, which steals CPU from the
+        # event loop and the decode pool on shared boxes.
+        flag = "1" if profile["allow_spinning"] else "0"
+        so.add_session_config_entry("session.intra_op.allow_spinning", flag)
+        so.add_session_config_entry("session.inter_op.allow_spinning", flag)
+
+    return so
+
+
+def model_fingerprint(model_path: Path) -> dict:
+    """
+    Size and SHA-256 of a model file, recorded next to its optimized copy so
+    the copy is only reused for the exact model it was built from.
+    """
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"source": model_path.name, "size": model_path.stat().st_size, "sha256": digest.hexdigest()}
+
+
+def _sidecar(optimized_path: Path) -> Path:
+    return optimized_path.with_name(optimized_path.name + ".json")
+
+
+def _partial(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+
+
+def optimized_is_fresh(optimized_path: Path, fingerprint: dict) -> bool:
+    if not optimized_path.exists():
+        return False
+    try:
+        with open(_sidecar(optimized_path), "r", encoding="utf-8") as f:
+            return json.load(f) == fingerprint
+    except (OSError, ValueError):
+        return False
+
+
+def resolve_variant(config: dict, variant: str | None = None) -> dict:
+    """
+    Return a copy of ``config`` with the selected entry of "model_variants"
+    merged over it ("session_options", "roi", "decoder" and "feature_cache"
+    are merged key by key; "generate" only documents how the variant's model
+    file is made and is dropped). The variant comes from the argument, then
+    the GESTU_MODEL_VARIANT environment variable, then "model_variant".
+    """
+    variant = variant or os.getenv("GESTU_MODEL_VARIANT") or config.get("model_variant")
+    variants = config.get("model_variants") or {}
+    resolved = dict(config)
+    if not variant:
+        return resolved
+    if variant not in variants:
+        raise ValueError(f"Unknown model variant {variant!r}, expected one of {sorted(variants)}")
+
+    overrides = dict(variants[variant])
+    overrides.pop("generate", None)
+    nested = {key: overrides.pop(key) for key in ("session_options", "roi", "decoder", "feature_cache") if key in overrides}
+    resolved.update(overrides)
+    for key, values in nested.items():
+        resolved[key] = {**(config.get(key) or {}), **values}
+    resolved["model_variant"] = variant
+    return resolved
+
+
+def load_labels(config: dict) -> dict[int, str]:
+    base_dir = Path(__file__).resolve().parent
+    labels_path = base_dir / config["path_to_class_list"]
+
+    with open(labels_path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    pairs = [line.split("\t", 1) for line in lines]
+    return {int(idx): lbl for idx, lbl in pairs}
+
+
+def _label_keys(label: str) -> set[str]:
+    # "ответ/сказать" should match a card named either "ответ" or "сказать".
+    label = label.strip().lower()
+    return {label} | {part.strip() for part in label.split("/") if part.strip()}
+
+
+class LabelSubset:
+    """
+    Class indices the model is allowed to answer with, e.g. the gesture cards
+    of one lesson, together with the card id each index stands for.
+
+    ``expected`` is the position of the card the learner is asked to show;
+    its confidence is reported even when it is not in the top-k.
+    """
+
+    __slots__ = ("indices", "card_ids", "expected")
+
+    def __init__(self, indices, card_ids, expected: int | None = None):
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.card_ids = np.asarray(card_ids, dtype=np.int64)
+        self.expected = expected
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_cards(cls, labels: dict[int, str], cards) -> "LabelSubset":
+        """
+        Build a subset from (card_id, gesture_name) pairs. Cards whose name
+        matches no label are left out.
+        """
+        by_key = {}
+        for idx, label in labels.items():
+            for key in _label_keys(label):
+                by_key.setdefault(key, idx)
+
+        indices, card_ids = [], []
+        for card_id, name in cards:
+            idx = by_key.get((name or "").strip().lower())
+            if idx is not None:
+                indices.append(idx)
+                card_ids.append(card_id)
+        return cls(indices, card_ids)
+
+    def with_expected(self, card_id: int | None) -> "LabelSubset":
+        pos = None
+        if card_id is not None:
+            hits = np.flatnonzero(self.card_ids == int(card_id))
+            pos = int(hits[0]) if hits.size else None
+        return LabelSubset(self.indices, self.card_ids, pos)
+
+
 class Predictor:
-    def __init__(self, model_config: dict):
-        self.config = model_config
+    def __init__(self, model_config: dict, variant: str | None = None):
+        self.config = resolve_variant(model_config, variant)
+        self.variant = self.config.get("model_variant")
+        self.input_size = int(self.config.get("input_size", 224))
         self.provider = self.config.get("provider", "CPUExecutionProvider")
         self.threshold = float(self.config.get("threshold", 0.5))
         self.topk = int(self.config.get("topk", 1))
+        # Smoothing decoders (smoothing.py) average the probability vectors
+        # over time, so every result carries them, even below the threshold.
+        self.return_probs = (self.config.get("decoder") or {}).get("type", "repeat") != "repeat"
         self.labels = {}
+        # Per-thread batch tensor that clips are stacked into (batch_buffer).
+        self._scratch = threading.local()
 
         self._init_model()
         self._load_labels()
 
-    def _init_model(self):
+    def _open_session(self, model_path: Path) -> rt.InferenceSession:
         base_dir = Path(__file__).resolve().parent
-        model_path = base_dir / self.config["path_to_model"]
-
         providers = [self.provider]
 
         if self.provider == "OpenVINOExecutionProvider":
@@ -27,23 +198,65 @@ class Predictor:
                 import onnxruntime.tools.add_openvino_win_libs as ov_utils
                 ov_utils.add_openvino_libs_to_path()
 
-        self.session = rt.InferenceSession(
+        profile = dict(self.config.get("session_options") or {})
+        optimized = profile.pop("optimized_model_path", None)
+        so = build_session_options(profile)
+
+        optimized_path = fingerprint = None
+        if optimized:
+            optimized_path = base_dir / optimized.format(model=model_path.stem)
+            fingerprint = model_fingerprint(model_path)
+            if optimized_is_fresh(optimized_path, fingerprint):
+                # Already optimized offline: skip the graph rewrite at startup.
+                model_path = optimized_path
+                optimized_path = None
+                so.graph_optimization_level = GRAPH_OPT_LEVELS["disable"]
+            else:
+                # Several workers may start at once: each writes its own
+                # copy and moves it into place, so none reads a half-written
+                # file.
+                so.optimized_model_filepath = str(_partial(optimized_path))
+                if optimized_path.suffix == ".ort":
+                    so.add_session_config_entry("session.save_model_format", "ORT")
+
+        session = rt.InferenceSession(
             str(model_path),
+            sess_options=so,
             providers=providers
         )
+        if optimized_path is not None:
+            os.replace(_partial(optimized_path), optimized_path)
+            sidecar = _sidecar(optimized_path)
+            with open(_partial(sidecar), "w", encoding="utf-8") as f:
+                json.dump(fingerprint, f)
+            os.replace(_partial(sidecar), sidecar)
+        return session
 
-        self.input_name = self.session.get_inputs()[0].name
-        self.output_name = self.session.get_outputs()[0].name
+    def _check_input_size(self, model_input, model_path: Path):
+        spatial = model_input.shape[-2:]
+        if any(isinstance(d, int) and d != self.input_size for d in spatial):
+            raise ValueError(
+                f"{model_path.name} expects {spatial[0]}x{spatial[1]} input, "
+                f"variant asks for {self.input_size}x{self.input_size}"
+            )
 
-    def _load_labels(self):
-        base_dir = Path(__file__).resolve().parent
-        labels_path = base_dir / self.config["path_to_class_list"]
+    def _init_model(self):
+        model_path = Path(__file__).resolve().parent / self.config["path_to_model"]
+        if not model_path.exists():
+            variant = (self.config.get("model_variants") or {}).get(self.variant) or {}
+            hint = f"; generate it with: {variant['generate']}" if variant.get("generate") else ""
+            raise FileNotFoundError(f"{model_path.name} of model variant {self.variant!r} not found{hint}")
+        self.session = self._open_session(model_path)
 
-        with open(labels_path, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip()]
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.output_name = self.session.get_outputs()[0].name
+        # Models exported with a fixed batch dimension of 1 cannot take stacked clips.
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self._check_input_size(model_input, model_path)
 
-        pairs = [line.split("\t", 1) for line in lines]
-        self.labels = {int(idx): lbl for idx, lbl in pairs}
+    def _load_labels(self):
+        self.labels = load_labels(self.config)
 
     @staticmethod
     def _softmax(x: np.ndarray) -> np.ndarray:
@@ -51,25 +264,30 @@ class Predictor:
         exp = np.exp(x)
         return exp / np.sum(exp, axis=1, keepdims=True)
 
-    def predict(self, frames: list[np.ndarray]):
-        if len(frames) == 0:
-            return None
-
+    @staticmethod
+    def prepare_clip(frames) -> np.ndarray:
         clip = np.asarray(frames, dtype=np.float32) / 255.0
-        clip = rearrange(clip, "t h w c -> 1 c t h w")
+        return rearrange(clip, "t h w c -> 1 c t h w")
 
-        logits = self.session.run(
+    def run(self, clip: np.ndarray) -> np.ndarray:
+        return self.session.run(
             [self.output_name],
             {self.input_name: clip}
         )[0]
 
-        probs = self._softmax(logits)
+    def postprocess(self, logits: np.ndarray, subset: LabelSubset | None = None):
+        if subset is not None:
+            return self._postprocess_subset(logits.reshape(-1), subset)
+
+        probs = self._softmax(logits.reshape(1, -1))
         probs = np.squeeze(probs, axis=0)
 
         topk_idx = np.argsort(probs)[-self.topk:][::-1]
         topk_conf = probs[topk_idx]
 
         if float(np.max(topk_conf)) < self.threshold:
+            if self.return_probs:
+                return {"labels": {}, "confidence": {}, "probs": probs}
             return None
 
         result_labels = {
@@ -81,7 +299,114 @@ class Predictor:
             for i in range(len(topk_conf))
         }
 
-        return {
+        result = {
             "labels": result_labels,
             "confidence": result_conf,
         }
+        if self.return_probs:
+            result["probs"] = probs
+        return result
+
+    def _postprocess_subset(self, logits: np.ndarray, subset: LabelSubset):
+        """
+        Score only the subset's classes. Confidences stay on the scale of the
+        full softmax (same denominator over all classes), so thresholds mean
+        the same thing with or without a subset.
+        """
+        if len(subset) == 0:
+            return None
+
+        m = np.max(logits)
+        denom = np.sum(np.exp(logits - m))
+        probs = np.exp(logits[subset.indices] - m) / denom
+
+        k = min(self.topk, len(probs))
+        top = np.argpartition(probs, len(probs) - k)[-k:]
+        top = top[np.argsort(probs[top])[::-1]]
+
+        expected_conf = None
+        if subset.expected is not None:
+            expected_conf = float(probs[subset.expected])
+
+        if float(probs[top[0]]) < self.threshold:
+            if expected_conf is None and not self.return_probs:
+                return None
+            result = {"labels": {}, "confidence": {}, "card_ids": {}, "expected_confidence": expected_conf}
+        else:
+            result = {
+                "labels": {i: self.labels[int(subset.indices[pos])] for i, pos in enumerate(top)},
+                "confidence": {i: float(probs[pos]) for i, pos in enumerate(top)},
+                "card_ids": {i: int(subset.card_ids[pos]) for i, pos in enumerate(top)},
+                "expected_confidence": expected_conf,
+            }
+        if self.return_probs:
+            result["probs"] = probs
+        return result
+
+    def warmup(self) -> float:
+        """
+        Run one all-zero clip so the first real request does not pay for
+        ORT's lazy allocations. Returns the seconds it took.
+        """
+        window = int(self.config.get("window_size", 32))
+        clip = np.zeros((1, 3, window, self.input_size, self.input_size), dtype=np.float32)
+        t0 = time.perf_counter()
+        self.run(clip)
+        return time.perf_counter() - t0
+
+    def predict(self, frames: list[np.ndarray]):
+        if len(frames) == 0:
+            return None
+
+        logits = self.run(self.prepare_clip(frames))
+        return self.postprocess(logits[0])
+
+    def batch_buffer(self, n: int, clip_shape: tuple) -> np.ndarray:
+        """
+        A float32 (n,) + ``clip_shape`` array to stack clips into, allocated
+        once per thread and reused (grown when needed) by the next batch of
+        that thread.
+        """
+        batch = getattr(self._scratch, "batch", None)
+        if batch is None or batch.shape[0] < n or batch.shape[1:] != tuple(clip_shape):
+            batch = self._scratch.batch = np.empty((n,) + tuple(clip_shape), dtype=np.float32)
+        return batch[:n]
+
+    def predict_batch(self, clips, subsets: list | None = None, timings: dict | None = None) -> list:
+        """
+        Run several prepared clips of shape (1, c, t, h, w) and postprocess each one.
+
+        ``clips`` is either a list of such clips or an already stacked
+        (B, c, t, h, w) array. A list is copied into the reusable batch_buffer
+        when the model has a dynamic batch dimension; fixed-batch models run
+        clip by clip.
+        ``subsets`` optionally gives a LabelSubset (or None) per clip. When
+        ``timings`` is given, seconds spent in "run" and "postprocess" are
+        stored in it.
+        """
+        if len(clips) == 0:
+            return []
+
+        t0 = time.perf_counter()
+        if isinstance(clips, np.ndarray):
+            if self.dynamic_batch:
+                logits = self.run(clips)
+            else:
+                logits = np.concatenate([self.run(clips[i:i + 1]) for i in range(len(clips))], axis=0)
+        elif self.dynamic_batch and len(clips) > 1:
+            batch = self.batch_buffer(len(clips), clips[0].shape[1:])
+            for i, clip in enumerate(clips):
+                batch[i] = clip[0]
+            logits = self.run(batch)
+        else:
+            logits = np.concatenate([self.run(clip) for clip in clips], axis=0)
+        t1 = time.perf_counter()
+
+        if subsets is None:
+            subsets = [None] * len(logits)
+        results = [self.postprocess(row, subset) for row, subset in zip(logits, subsets)]
+
+        if timings is not None:
+            timings["run"] = t1 - t0
+            timings["postprocess"] = time.perf_counter() - t1
+        return results
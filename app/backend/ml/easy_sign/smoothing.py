@@ -0,0 +1,146 @@
+import numpy as np
+
+from .runtime import LabelSubset
+from .stability import WordStabilizer
+
+DECODER_TYPES = ("repeat", "ema", "window")
+
+
+class SmoothingDecoder:
+    """
+    Turns per-window probability vectors into confirmed words.
+
+    Every Predictor result carries the class probabilities of its window
+    (``pred["probs"]``, restricted to the lesson's classes when a LabelSubset
+    is used). They are averaged over time, either as an exponential moving
+    average with weight ``alpha`` for the newest window ("ema") or as the
+    mean of the last ``window`` vectors ("window"). A word is confirmed when
+    its averaged probability reaches ``on_threshold``. It then stays latched
+    and is not confirmed again until its average falls below
+    ``off_threshold``. On top of that, the same word is not repeated within
+    ``cooldown_s`` seconds.
+
+    With ``alpha`` around 0.5 a single confident window is enough to cross
+    the threshold after one or two runs, where WordStabilizer always needs
+    ``repeats`` identical top-1 answers.
+    """
+
+    def __init__(self, labels: dict[int, str], subset: LabelSubset | None = None, mode: str = "ema",
+                 alpha: float = 0.5, window: int = 3, on_threshold: float = 0.6,
+                 off_threshold: float = 0.4, cooldown_s: float = 0.8):
+        if mode not in ("ema", "window"):
+            raise ValueError(f"Unknown smoothing mode {mode!r}")
+        self.labels = labels
+        self.subset = subset
+        self.mode = mode
+        self.alpha = min(max(float(alpha), 0.01), 1.0)
+        self.window = max(1, int(window))
+        self.on_threshold = float(on_threshold)
+        self.off_threshold = min(float(off_threshold), self.on_threshold)
+        self.cooldown_s = float(cooldown_s)
+
+        self._avg: np.ndarray | None = None
+        self._history: np.ndarray | None = None   # (window, n) ring for "window"
+        self._head = 0
+        self._latched: int | None = None
+        self._last_word = ""
+        self._last_at = 0.0
+
+    def reset(self):
+        self._avg = None
+        self._history = None
+        self._head = 0
+        self._latched = None
+
+    def _average(self, probs: np.ndarray) -> np.ndarray:
+        if self._avg is None or self._avg.shape != probs.shape:
+            self._avg = np.zeros_like(probs, dtype=np.float32)
+            self._history = None
+            self._head = 0
+
+        if self.mode == "ema":
+            self._avg *= 1.0 - self.alpha
+            self._avg += self.alpha * probs
+            return self._avg
+
+        # Running sum over a ring of the last ``window`` vectors.
+        if self._history is None:
+            self._history = np.zeros((self.window, probs.size), dtype=np.float32)
+        self._avg += probs - self._history[self._head]
+        self._history[self._head] = probs
+        self._head = (self._head + 1) % self.window
+        return self._avg / self.window
+
+    def _describe(self, pos: int) -> tuple[str, int | None]:
+        if self.subset is None:
+            return self.labels.get(pos, ""), None
+        return self.labels.get(int(self.subset.indices[pos]), ""), int(self.subset.card_ids[pos])
+
+    def update(self, pred: dict | None, now: float) -> tuple[str, float, int | None] | None:
+        """
+        Feed one Predictor result (``now`` from time.monotonic()). Returns
+        ``(word, confidence, card_id)`` when a word is confirmed, else None.
+        ``confidence`` is the averaged probability; ``card_id`` is None
+        without a subset.
+        """
+        if not pred or pred.get("probs") is None:
+            return None
+
+        avg = self._average(np.asarray(pred["probs"], dtype=np.float32).reshape(-1))
+
+        if self._latched is not None and avg[self._latched] < self.off_threshold:
+            self._latched = None
+
+        best = int(np.argmax(avg))
+        conf = float(avg[best])
+        if conf < self.on_threshold or best == self._latched:
+            return None
+
+        word, card_id = self._describe(best)
+        if (now - self._last_at) < self.cooldown_s and word == self._last_word:
+            return None
+
+        self._latched = best
+        self._last_word = word
+        self._last_at = now
+        return word, conf, card_id
+
+
+def decoder_settings(config: dict) -> dict:
+    """
+    The "decoder" section of the model config with defaults filled in.
+    """
+    settings = {
+        "type": "repeat",
+        "min_confidence": 0.6,
+        "repeats": 3,
+        "alpha": 0.5,
+        "window": 3,
+        "on_threshold": 0.6,
+        "off_threshold": 0.4,
+        "cooldown_s": 0.8,
+    }
+    settings.update(config.get("decoder") or {})
+    if settings["type"] not in DECODER_TYPES:
+        raise ValueError(f"Unknown decoder type {settings['type']!r}, expected one of {DECODER_TYPES}")
+    return settings
+
+
+def build_decoder(config: dict, labels: dict[int, str], subset: LabelSubset | None = None):
+    """
+    WordStabilizer or SmoothingDecoder for one socket, as configured in the
+    "decoder" section. Both expose ``update(pred, now)``.
+    """
+    s = decoder_settings(config)
+    if s["type"] == "repeat":
+        return WordStabilizer(min_confidence=s["min_confidence"], repeats=s["repeats"], cooldown_s=s["cooldown_s"])
+    return SmoothingDecoder(
+        labels,
+        subset,
+        mode=s["type"],
+        alpha=s["alpha"],
+        window=s["window"],
+        on_threshold=s["on_threshold"],
+        off_threshold=s["off_threshold"],
+        cooldown_s=s["cooldown_s"],
+    )
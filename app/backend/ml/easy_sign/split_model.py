@@ -0,0 +1,164 @@
+"""
+Split model.onnx into a backbone and a temporal head for feature-cache mode
+and register the pair in config.json under "feature_cache".
+
+    python -m app.backend.ml.easy_sign.split_model --list
+    python -m app.backend.ml.easy_sign.split_model --split /blocks.3/Add_output_0 --chunk-frames 8
+
+``--list`` prints the tensors where the graph can be cut in two, i.e. where
+everything after that point depends on the model input only through that
+one tensor, together with its inferred shape. ``--split`` takes such a
+tensor name (or, with ``--node``, a node whose first output it is).
+
+The backbone's batch and time dimensions are made symbolic so it accepts
+chunks of any length; whether the model actually computes the same thing on
+chunks is checked by validate_split.py, not here.
+"""
+import argparse
+import json
+from pathlib import Path
+
+import onnx
+from onnx import shape_inference
+
+BASE_DIR = Path(__file__).resolve().parent
+CFG_PATH = BASE_DIR / "config.json"
+
+
+def _shape(value_info) -> list:
+    dims = value_info.type.tensor_type.shape.dim
+    return [d.dim_param or d.dim_value for d in dims]
+
+
+def crossing_tensors(graph, index: int) -> set[str]:
+    """
+    Tensors produced at or before node ``index`` (or graph inputs) that are
+    needed after it. Initializers are not counted: both halves get a copy.
+    """
+    initializers = {i.name for i in graph.initializer}
+    produced = {i.name for i in graph.input} - initializers
+    for node in graph.node[:index + 1]:
+        produced.update(node.output)
+
+    needed = set()
+    for node in graph.node[index + 1:]:
+        needed.update(name for name in node.input if name in produced)
+    needed.update(o.name for o in graph.output if o.name in produced)
+    return needed
+
+
+def cut_points(model) -> list[tuple[int, str, str, list]]:
+    inferred = shape_inference.infer_shapes(model)
+    shapes = {v.name: _shape(v) for v in inferred.graph.value_info}
+    graph = model.graph
+    output_names = {o.name for o in graph.output}
+
+    points = []
+    for i, node in enumerate(graph.node[:-1]):
+        crossing = crossing_tensors(graph, i)
+        if len(crossing) != 1:
+            continue
+        (name,) = crossing
+        if name in output_names:
+            continue
+        points.append((i, node.name or node.op_type, name, shapes.get(name, [])))
+    return points
+
+
+def _symbolic(value_info, axes: dict[int, str]):
+    dims = value_info.type.tensor_type.shape.dim
+    for axis, param in axes.items():
+        if axis < len(dims):
+            dims[axis].Clear()
+            dims[axis].dim_param = param
+
+
+def split(src: Path, split_tensor: str, backbone_dst: Path, head_dst: Path):
+    model = onnx.load(str(src))
+    graph = model.graph
+    input_name = graph.input[0].name
+    output_name = graph.output[0].name
+
+    index = next((i for i, n in enumerate(graph.node) if split_tensor in n.output), None)
+    if index is None:
+        raise SystemExit(f"no node produces {split_tensor!r}")
+    crossing = crossing_tensors(graph, index)
+    if crossing != {split_tensor}:
+        others = sorted(crossing - {split_tensor})
+        raise SystemExit(f"cannot cut at {split_tensor!r}: the head would also need {others}")
+
+    onnx.utils.extract_model(str(src), str(backbone_dst), [input_name], [split_tensor])
+    onnx.utils.extract_model(str(src), str(head_dst), [split_tensor], [output_name])
+
+    backbone = onnx.load(str(backbone_dst))
+    # Shapes inferred for the full-length clip no longer hold for chunks.
+    del backbone.graph.value_info[:]
+    _symbolic(backbone.graph.input[0], {0: "B", 2: "T"})
+    _symbolic(backbone.graph.output[0], {0: "B", 2: "t"})
+    onnx.save(backbone, str(backbone_dst))
+
+    head = onnx.load(str(head_dst))
+    del head.graph.value_info[:]
+    _symbolic(head.graph.input[0], {0: "B"})
+    _symbolic(head.graph.output[0], {0: "B"})
+    onnx.save(head, str(head_dst))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, default=str(CFG_PATH))
+    parser.add_argument("--model", type=str, default=None, help="defaults to path_to_model from config.json")
+    parser.add_argument("--list", action="store_true", help="print the possible cut points")
+    parser.add_argument("--split", type=str, default=None, help="tensor to cut at")
+    parser.add_argument("--node", type=str, default=None, help="node whose first output to cut at")
+    parser.add_argument("--chunk-frames", type=int, default=8)
+    parser.add_argument("--time-axis", type=int, default=2, help="time axis of the cut tensor")
+    parser.add_argument("--no-config", action="store_true", help="do not touch config.json")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    src = Path(args.model) if args.model else BASE_DIR / cfg["path_to_model"]
+
+    if args.list:
+        for i, node, tensor, shape in cut_points(onnx.load(str(src))):
+            print(f"{i:5d}  {node:<40} {tensor:<48} {shape}")
+        return
+
+    split_tensor = args.split
+    if args.node:
+        model = onnx.load(str(src), load_external_data=False)
+        node = next((n for n in model.graph.node if n.name == args.node), None)
+        if node is None:
+            raise SystemExit(f"no node named {args.node!r}")
+        split_tensor = node.output[0]
+    if not split_tensor:
+        parser.error("one of --list, --split or --node is required")
+
+    backbone_dst = src.with_name(src.stem + ".backbone.onnx")
+    head_dst = src.with_name(src.stem + ".head.onnx")
+    split(src, split_tensor, backbone_dst, head_dst)
+    print(f"wrote {backbone_dst.name} and {head_dst.name}")
+
+    if args.no_config:
+        return
+
+    def rel(p: Path) -> str:
+        return str(p.relative_to(BASE_DIR)) if p.is_relative_to(BASE_DIR) else str(p)
+
+    section = cfg.setdefault("feature_cache", {})
+    section.update({
+        "backbone_model": rel(backbone_dst),
+        "head_model": rel(head_dst),
+        "split_tensor": split_tensor,
+        "chunk_frames": args.chunk_frames,
+        "time_axis": args.time_axis,
+    })
+    section.setdefault("enabled", False)
+    with open(args.config, "w", encoding="utf-8") as f:
+        json.dump(cfg, f, ensure_ascii=False, indent=4)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
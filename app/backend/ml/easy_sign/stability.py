@@ -0,0 +1,52 @@
+from collections import deque
+
+
+class WordStabilizer:
+    """
+    Turns per-window predictions into confirmed words.
+
+    A word is confirmed once the top-1 label of ``repeats`` consecutive
+    predictions is the same, each with a confidence of at least
+    ``min_confidence``. The same word is not confirmed again within
+    ``cooldown_s`` seconds.
+    """
+
+    def __init__(self, min_confidence: float = 0.6, repeats: int = 3, cooldown_s: float = 0.8):
+        self.min_confidence = float(min_confidence)
+        self.repeats = max(1, int(repeats))
+        self.cooldown_s = float(cooldown_s)
+
+        self._recent = deque(maxlen=self.repeats)
+        self._last_word = ""
+        self._last_at = 0.0
+
+    def reset(self):
+        self._recent.clear()
+
+    def update(self, pred: dict | None, now: float) -> tuple[str, float, int | None] | None:
+        """
+        Feed one Predictor result (``now`` from time.monotonic()). Returns
+        ``(word, confidence, card_id)`` when a word is confirmed, else None;
+        ``card_id`` is None unless the prediction was scored on a LabelSubset.
+        """
+        if not pred:
+            return None
+
+        word = pred["labels"].get(0, "")
+        conf = float(pred["confidence"].get(0, 0.0))
+        if conf < self.min_confidence:
+            return None
+
+        self._recent.append(word)
+        if len(self._recent) < self.repeats:
+            return None
+        if not all(w == word for w in self._recent):
+            return None
+
+        if (now - self._last_at) < self.cooldown_s and word == self._last_word:
+            return None
+
+        self._last_word = word
+        self._last_at = now
+        self._recent.clear()
+        return word, conf, (pred.get("card_ids") or {}).get(0)
@@ -0,0 +1,79 @@
+import numpy as np
+
+from .clip_buffer import ClipBuffer
+
+
+class StrideGate:
+    """
+    Decides when a sliding window is worth re-scoring.
+
+    Inference runs every ``stride`` new frames once the window is full. Under
+    load the stride grows linearly towards ``max_stride``. A run is skipped
+    when the newest frame differs from the newest frame of the previous run
+    by less than ``motion_threshold`` (mean absolute difference on a strided
+    thumbnail, pixel values in [0, 1]), but never more than ``max_skip``
+    frames in a row.
+    """
+
+    def __init__(self, stride: int = 8, max_stride: int | None = None,
+                 motion_threshold: float = 0.0, max_skip: int = 64, thumb_step: int = 14):
+        self.stride = max(1, int(stride))
+        self.max_stride = max(self.stride, int(max_stride or stride))
+        self.motion_threshold = float(motion_threshold)
+        self.max_skip = max(self.stride, int(max_skip))
+        self.thumb_step = max(1, int(thumb_step))
+
+        self._since_run = 0
+        self._since_check = 0
+        self._last_thumb: np.ndarray | None = None
+
+        self.skipped = 0
+
+    @classmethod
+    def from_config(cls, config: dict) -> "StrideGate":
+        stride = int(config.get("infer_stride", 8))
+        return cls(
+            stride=stride,
+            max_stride=int(config.get("infer_stride_max", stride)),
+            motion_threshold=float(config.get("motion_threshold", 0.0)),
+            max_skip=int(config.get("motion_max_skip", 64)),
+        )
+
+    def current_stride(self, load: float = 0.0) -> int:
+        load = min(max(float(load), 0.0), 1.0)
+        return self.stride + round((self.max_stride - self.stride) * load)
+
+    def should_run(self, frames: ClipBuffer, load: float = 0.0) -> bool:
+        """
+        Call once after every appended frame. Returns True when the caller
+        should run inference on the current window now.
+        """
+        self._since_run += 1
+        self._since_check += 1
+
+        if not frames.full:
+            return False
+        if self._since_check < self.current_stride(load):
+            return False
+        self._since_check = 0
+
+        thumb = None
+        if self.motion_threshold > 0.0:
+            thumb = frames.thumbnail(self.thumb_step)
+            if (
+                self._last_thumb is not None
+                and thumb is not None
+                and self._since_run < self.max_skip
+                and float(np.mean(np.abs(thumb - self._last_thumb))) < self.motion_threshold
+            ):
+                self.skipped += 1
+                return False
+
+        self._since_run = 0
+        self._last_thumb = thumb
+        return True
+
+    def reset(self):
+        self._since_run = 0
+        self._since_check = 0
+        self._last_thumb = None
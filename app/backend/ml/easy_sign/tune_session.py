@@ -0,0 +1,135 @@
+"""
+Benchmark ORT thread settings on this host and write the fastest profile to
+config.json under "session_options".
+
+Run from the repository root:
+
+    python -m app.backend.ml.easy_sign.tune_session --batch 1 --repeats 10
+    python -m app.backend.ml.easy_sign.tune_session --processes 2 --write
+    python -m app.backend.ml.easy_sign.tune_session --variant fp32_160
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.backend.ml.easy_sign.runtime import Predictor, resolve_variant
+
+CFG_PATH = Path(__file__).resolve().parent / "config.json"
+
+
+def candidate_threads(max_threads: int) -> list[int]:
+    out = {1, max_threads}
+    n = 2
+    while n < max_threads:
+        out.add(n)
+        n *= 2
+    return sorted(out)
+
+
+def measure(cfg: dict, profile: dict, clip: np.ndarray, warmup: int, repeats: int) -> float:
+    # ``cfg`` is already resolved: keep the variant's name but not its
+    # overrides, which would be merged over ``profile`` again.
+    name = cfg.get("model_variant")
+    cfg = dict(cfg, session_options=profile, model_variants={name: {}} if name else {})
+    predictor = Predictor(cfg, name)
+    for _ in range(warmup):
+        predictor.run(clip)
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        predictor.run(clip)
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times))
+
+
+def replace_key(text: str, key: str, value) -> str:
+    """
+    Replace the value of top-level ``key`` in the JSON document ``text``,
+    leaving the rest of the file (layout, key order) as it is. The key is
+    appended when it is missing.
+    """
+    doc = json.loads(text)
+    decoder = json.JSONDecoder()
+    dumped = json.dumps(value, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+
+    # Walk the top-level object member by member, so a nested key of the
+    # same name is never touched.
+    pos = text.index("{") + 1
+    for _ in doc:
+        name, end = decoder.raw_decode(text, text.index('"', pos))
+        start = text.index(":", end) + 1
+        while text[start].isspace():
+            start += 1
+        _value, end = decoder.raw_decode(text, start)
+        if name == key:
+            return text[:start] + dumped + text[end:]
+        pos = end
+    closing = text.rindex("}")
+    body = text[:closing].rstrip()
+    sep = "," if doc else ""
+    return f"{body}{sep}\n    {json.dumps(key)}: {dumped}\n" + text[closing:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, default=str(CFG_PATH))
+    parser.add_argument("--variant", type=str, default=None, help="model variant to benchmark")
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes sharing this host; threads are capped at cores / processes")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--write", action="store_true", help="store the fastest profile in the config")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        text = f.read()
+    cfg = json.loads(text)
+
+    # The profile is tuned on the variant's model and clip size, and written
+    # back as the shared "session_options".
+    variant = resolve_variant(cfg, args.variant)
+    base = dict(variant.get("session_options") or {})
+    # Benchmark the plain model; the optimized copy is rebuilt on next start.
+    base.pop("optimized_model_path", None)
+
+    max_threads = max(1, (os.cpu_count() or 1) // max(1, args.processes))
+    t = int(variant.get("window_size", 32))
+    size = int(variant.get("input_size", 224))
+    clip = np.random.default_rng(0).random((args.batch, 3, t, size, size), dtype=np.float32)
+
+    results = []
+    for intra, mode, spinning in itertools.product(
+        candidate_threads(max_threads), ["sequential", "parallel"], [False, True]
+    ):
+        inter = 1 if mode == "sequential" else min(2, max_threads)
+        profile = dict(
+            base,
+            intra_op_num_threads=intra,
+            inter_op_num_threads=inter,
+            execution_mode=mode,
+            allow_spinning=spinning,
+        )
+        ms = measure(variant, profile, clip, args.warmup, args.repeats) * 1000.0
+        results.append((ms, profile))
+        print(f"intra={intra:<3} inter={inter:<2} mode={mode:<10} spinning={int(spinning)}  {ms:8.1f} ms")
+
+    best_ms, best = min(results, key=lambda r: r[0])
+    print(f"fastest: {best_ms:.1f} ms -> {best}")
+
+    if args.write:
+        optimized = (cfg.get("session_options") or {}).get("optimized_model_path")
+        if optimized:
+            best["optimized_model_path"] = optimized
+        with open(args.config, "w", encoding="utf-8") as f:
+            f.write(replace_key(text, "session_options", best))
+        print(f"written to {args.config}")
+
+
+if __name__ == "__main__":
+    main()
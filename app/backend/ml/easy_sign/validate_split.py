@@ -0,0 +1,147 @@
+"""
+Check a backbone/head split (split_model.py) against the monolithic model.
+
+    python -m app.backend.ml.easy_sign.validate_split --videos recordings/
+    python -m app.backend.ml.easy_sign.validate_split --synthetic 6 --out split.json
+
+Every window is scored twice while sliding over the video every
+``chunk_frames`` frames: once by the full model on the whole clip, and once
+through a FeatureCache, the way /ws/gesture runs in feature-cache mode.
+Reported are the largest logit difference, top-1/top-5 agreement with the
+full model and the latency of both paths per window. Without recordings,
+``--synthetic`` streams of random frames are used, which only checks the
+numerics, not accuracy.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+from app.backend.ml.easy_sign.feature_cache import FeatureCache, TwoStagePredictor
+from app.backend.ml.easy_sign.recordings import find_recordings, iter_video_frames
+from app.backend.ml.easy_sign.runtime import Predictor, resolve_variant
+
+CFG_PATH = Path(__file__).resolve().parent / "config.json"
+
+
+def synthetic_frames(n: int, size: int, seed: int):
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        yield i / 25.0, rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+
+
+def compare(full: Predictor, split: TwoStagePredictor, frames, window: int) -> dict:
+    buf = ClipBuffer(window, full.input_size)
+    cache = FeatureCache(buf, split.chunk_frames)
+    diffs, top1, top5, full_s, split_s = [], [], [], [], []
+
+    for _, frame in frames:
+        buf.append(frame)
+        if not buf.full or buf.appended % split.chunk_frames:
+            continue
+
+        t0 = time.perf_counter()
+        ref = full.run(buf.clip())[0]
+        t1 = time.perf_counter()
+        got = split.run_cached([cache])[0]
+        split_s.append(time.perf_counter() - t1)
+        full_s.append(t1 - t0)
+
+        diffs.append(float(np.max(np.abs(ref - got))))
+        best = int(np.argmax(ref))
+        top1.append(int(np.argmax(got)) == best)
+        top5.append(best in np.argsort(got)[-5:])
+
+    return {
+        "windows": len(diffs),
+        "max_abs_diff": max(diffs) if diffs else None,
+        "top1": top1,
+        "top5": top5,
+        "full_s": full_s,
+        "split_s": split_s,
+        "chunks_computed": cache.computed,
+        "chunks_reused": cache.reused,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, default=str(CFG_PATH))
+    parser.add_argument("--variant", type=str, default=None)
+    parser.add_argument("--videos", type=str, default=None, help="folder with recorded videos")
+    parser.add_argument("--synthetic", type=int, default=0, help="number of random frame streams instead")
+    parser.add_argument("--frames", type=int, default=96, help="frames per synthetic stream")
+    parser.add_argument("--out", type=str, default=None)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = resolve_variant(json.load(f), args.variant)
+    if not (cfg.get("feature_cache") or {}).get("backbone_model"):
+        raise SystemExit("no feature_cache section; run split_model.py first")
+
+    full = Predictor(cfg)
+    split = TwoStagePredictor(cfg)
+    window = int(cfg.get("window_size", 32))
+
+    streams = []
+    if args.videos:
+        streams += [(str(v), iter_video_frames(v, full.input_size)) for v in find_recordings(args.videos)]
+    for i in range(args.synthetic):
+        streams.append((f"synthetic-{i}", synthetic_frames(args.frames, full.input_size, i)))
+    if not streams:
+        parser.error("give --videos or --synthetic")
+
+    rows = []
+    total = {"top1": [], "top5": [], "full_s": [], "split_s": [], "computed": 0, "reused": 0, "diff": 0.0}
+    for name, frames in streams:
+        r = compare(full, split, frames, window)
+        if not r["windows"]:
+            continue
+        rows.append({
+            "stream": name,
+            "windows": r["windows"],
+            "max_abs_diff": r["max_abs_diff"],
+            "top1_agreement": float(np.mean(r["top1"])),
+            "top5_agreement": float(np.mean(r["top5"])),
+        })
+        total["top1"] += r["top1"]
+        total["top5"] += r["top5"]
+        total["full_s"] += r["full_s"]
+        total["split_s"] += r["split_s"]
+        total["computed"] += r["chunks_computed"]
+        total["reused"] += r["chunks_reused"]
+        total["diff"] = max(total["diff"], r["max_abs_diff"])
+        print(
+            f"{name}: {r['windows']} windows  max |diff| {r['max_abs_diff']:.2e}  "
+            f"top1 {rows[-1]['top1_agreement']:.3f}  top5 {rows[-1]['top5_agreement']:.3f}"
+        )
+
+    if not rows:
+        raise SystemExit("no stream was long enough for a full window")
+    summary = {
+        "windows": len(total["top1"]),
+        "max_abs_diff": total["diff"],
+        "top1_agreement": float(np.mean(total["top1"])),
+        "top5_agreement": float(np.mean(total["top5"])),
+        "full_p50_ms": float(np.percentile(total["full_s"], 50) * 1000.0),
+        "split_p50_ms": float(np.percentile(total["split_s"], 50) * 1000.0),
+        "chunks_computed": total["computed"],
+        "chunks_reused": total["reused"],
+    }
+    print(
+        f"total: {summary['windows']} windows  max |diff| {summary['max_abs_diff']:.2e}  "
+        f"top1 {summary['top1_agreement']:.3f}  top5 {summary['top5_agreement']:.3f}  "
+        f"full p50 {summary['full_p50_ms']:.1f} ms  split p50 {summary['split_p50_ms']:.1f} ms  "
+        f"chunks computed {summary['chunks_computed']} reused {summary['chunks_reused']}"
+    )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "streams": rows}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Standalone inference worker for the remote worker mode.
+
+Each worker loads one Predictor, runs a dummy clip through it and only then
+listens on a Unix socket. The gateway (remote_pool.RemoteBackend, inside the
+web process) keeps the clip windows in shared memory segments, exactly like
+the process pool does, and sends only segment handles and label subsets; the
+worker attaches to the segments, runs the batch and sends back the result
+dicts. Clips never go through the socket.
+
+Messages on the socket are length-prefixed pickles (see ``send_message``):
+requests ``(id, op, payload)`` with op "predict" or "health", replies
+``(id, ok, payload)``. A predict payload is ``(handles, subsets, forget)``,
+where ``forget`` names the segments the gateway released since its last
+request to this worker; the worker drops its mappings of them. The socket
+file is created with mode 0600, so only the same user can connect.
+
+Serve one worker:
+
+    python -m app.backend.ml.easy_sign.worker_server --socket /tmp/gestu/worker-0.sock
+
+or start and supervise several on one box (a worker that exits is restarted):
+
+    python -m app.backend.ml.easy_sign.worker_server --workers 3 --socket-dir /tmp/gestu
+
+and point the web process at them with ``GESTU_WORKER_MODE=remote`` and
+``GESTU_INFERENCE_SOCKETS=/tmp/gestu/worker-0.sock,/tmp/gestu/worker-1.sock,...``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pickle
+import signal
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from . import process_pool
+from .runtime import resolve_variant
+
+CFG_PATH = Path(__file__).resolve().parent / "config.json"
+
+LENGTH = struct.Struct("!I")
+
+
+async def read_message(reader: asyncio.StreamReader):
+    (n,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    return pickle.loads(await reader.readexactly(n))
+
+
+def send_message(writer: asyncio.StreamWriter, message):
+    body = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(LENGTH.pack(len(body)) + body)
+
+
+class WorkerServer:
+    """
+    Serves predict and health requests for one Predictor. Batches run one at
+    a time on a helper thread, so health checks are answered while a batch
+    is being computed.
+    """
+
+    def __init__(self, config: dict, path: str):
+        self.path = path
+        self.config = config
+        self._lock = asyncio.Lock()
+        self.queued = 0
+        self.busy = False
+        self.batches = 0
+        self.started_at = time.time()
+
+    def health(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "busy": self.busy,
+            "queued": self.queued,
+            "batches": self.batches,
+            "model_variant": self.config.get("model_variant"),
+            "uptime_s": time.time() - self.started_at,
+        }
+
+    async def _predict(self, handles: list, subsets: list, forget=()):
+        self.queued += 1
+        try:
+            await self._lock.acquire()
+        finally:
+            self.queued -= 1
+        self.busy = True
+        try:
+            return await asyncio.to_thread(process_pool._worker_predict_batch, handles, subsets, forget)
+        finally:
+            self.busy = False
+            self.batches += 1
+            self._lock.release()
+
+    async def _handle(self, req_id, op, payload, writer: asyncio.StreamWriter):
+        try:
+            if op == "health":
+                reply = (req_id, True, self.health())
+            elif op == "predict":
+                reply = (req_id, True, await self._predict(*payload))
+            else:
+                reply = (req_id, False, f"unknown op {op!r}")
+        except Exception as exc:
+            reply = (req_id, False, f"{type(exc).__name__}: {exc}")
+        if not writer.is_closing():
+            send_message(writer, reply)
+            await writer.drain()
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+        try:
+            while True:
+                req_id, op, payload = await read_message(reader)
+                task = asyncio.create_task(self._handle(req_id, op, payload, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._serve_client, path=self.path)
+        finally:
+            os.umask(old_umask)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        print(f"worker {os.getpid()} serving on {self.path}", flush=True)
+        async with server:
+            await stop.wait()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def serve(config: dict, path: str, threads: int = 0):
+    if (config.get("feature_cache") or {}).get("enabled"):
+        # Workers only run the monolithic model; the chunk features would
+        # have to live next to each socket's window in the gateway.
+        raise ValueError("feature_cache is not supported by inference workers; disable it in the config")
+    config = dict(config)
+    if threads:
+        config["session_options"] = {**(config.get("session_options") or {}), "intra_op_num_threads": threads}
+    process_pool._init_worker(config, standalone=True)
+    # Warm up before listening, so the gateway never routes to a cold worker.
+    timings = process_pool._worker_warmup()
+    print(
+        f"worker {os.getpid()} loaded the model in {timings['model_load']:.2f} s, "
+        f"first inference {timings['first_inference']:.2f} s",
+        flush=True,
+    )
+    asyncio.run(WorkerServer(config, path).serve())
+
+
+def supervise(args):
+    """
+    Run ``args.workers`` workers as child processes, restarting any that
+    exits, until interrupted.
+    """
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    paths = [str(Path(args.socket_dir) / f"worker-{i}.sock") for i in range(args.workers)]
+
+    def start(path: str) -> subprocess.Popen:
+        cmd = [
+            sys.executable, "-m", "app.backend.ml.easy_sign.worker_server",
+            "--config", args.config, "--socket", path, "--threads", str(threads),
+        ]
+        if args.variant:
+            cmd += ["--variant", args.variant]
+        return subprocess.Popen(cmd)
+
+    procs = {path: start(path) for path in paths}
+    print("GESTU_INFERENCE_SOCKETS=" + ",".join(paths), flush=True)
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while not stopping:
+        time.sleep(0.5)
+        for path, proc in procs.items():
+            if proc.poll() is not None and not stopping:
+                print(f"worker on {path} exited with {proc.returncode}, restarting", flush=True)
+                procs[path] = start(path)
+
+    for proc in procs.values():
+        proc.terminate()
+    for proc in procs.values():
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, default=str(CFG_PATH))
+    parser.add_argument("--variant", type=str, default=None)
+    parser.add_argument("--socket", type=str, default=None, help="serve a single worker on this path")
+    parser.add_argument("--workers", type=int, default=0, help="start and supervise this many workers")
+    parser.add_argument("--socket-dir", type=str, default="/tmp/gestu")
+    parser.add_argument("--threads", type=int, default=0, help="ORT intra-op threads per worker")
+    args = parser.parse_args()
+
+    if args.workers:
+        supervise(args)
+        return
+    if not args.socket:
+        parser.error("either --socket or --workers is required")
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config.setdefault("provider", "CPUExecutionProvider")
+    serve(resolve_variant(config, args.variant), args.socket, args.threads)
+
+
+if __name__ == "__main__":
+    main()
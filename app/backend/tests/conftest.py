@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+ROOT = BACKEND.parents[1]
+
+# The backend is imported both as ``app.backend.*`` and, from the REST side,
+# as top-level ``api``/``db`` packages.
+for path in (str(ROOT), str(BACKEND)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# db creates its engines on import; keep the tests off the working database.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
@@ -0,0 +1,89 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+from app.backend.ml.easy_sign.process_pool import ReleaseLog, SharedClipBuffer
+
+
+def _frame(value: int, size: int = 4) -> np.ndarray:
+    return np.full((size, size, 3), value, dtype=np.uint8)
+
+
+def test_clip_is_chronological_after_wrapping():
+    buf = ClipBuffer(window_size=3, size=4, dtype=np.uint8)
+    for value in (10, 20, 30, 40):
+        buf.append(_frame(value))
+    clip = buf.clip()
+    assert clip.shape == (1, 3, 3, 4, 4)
+    assert [round(float(clip[0, 0, t, 0, 0]) * 255) for t in range(3)] == [20, 30, 40]
+
+
+def test_release_waits_for_the_last_hold():
+    buf = ClipBuffer(window_size=2, size=4)
+    buf.append(_frame(1))
+    buf.hold()
+    buf.hold()
+    buf.release()
+    assert buf._ring is not None
+    buf.unhold()
+    assert buf._ring is not None
+    buf.unhold()
+    assert buf._ring is None and len(buf) == 0
+
+
+def test_release_without_holds_frees_at_once():
+    buf = ClipBuffer(window_size=2, size=4)
+    buf.append(_frame(1))
+    buf.release()
+    assert buf._ring is None
+    # The window is allocated again on the next frame.
+    buf.append(_frame(2))
+    assert len(buf) == 1
+
+
+def test_shared_buffer_unlinks_after_the_last_hold():
+    released = []
+    buf = SharedClipBuffer(window_size=2, size=4, inbox_bytes=16, on_release=released.append)
+    name = buf.shm.name
+    buf.append(_frame(1))
+    buf.hold()
+    buf.release()
+
+    # Still attachable while a batch holds it.
+    attached = SharedMemory(name=name)
+    attached.close()
+    assert released == []
+
+    buf.unhold()
+    assert released == [name]
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=name)
+
+
+def test_release_log_reports_new_names_and_wraps():
+    log = ReleaseLog()
+    try:
+        log.append("a")
+        log.append("b")
+        assert log.since(0) == (2, ["a", "b"])
+        assert log.since(2) == (2, [])
+        for i in range(ReleaseLog.SLOTS + 1):
+            log.append(f"n{i}")
+        n, names = log.since(2)
+        assert n == ReleaseLog.SLOTS + 3 and names is None
+    finally:
+        log.close(unlink=True)
+
+
+def test_clip_keeps_no_copy_per_buffer():
+    buf = ClipBuffer(window_size=3, size=4, dtype=np.uint8)
+    for value in (10, 20, 30, 40):
+        buf.append(_frame(value))
+    first = buf.clip()
+    assert buf.nbytes == buf.ring_nbytes(3, 4, dtype=np.uint8)
+    # The window is staged in this thread's scratch clip, shared by buffers.
+    other = ClipBuffer(window_size=3, size=4, dtype=np.uint8)
+    other.append(_frame(50))
+    assert np.shares_memory(first, other.clip())
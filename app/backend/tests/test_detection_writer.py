@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.backend.api.detection_writer import DetectionWriter
+from app.backend.db import Base, engine, get_session
+from app.backend.db.models import GestureCard, GestureDetection, Lesson, PracticeSession, User
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = get_session()
+    session.add_all([User(telegram_id=1, username="a"), User(telegram_id=2, username="b")])
+    session.add(Lesson(title="lesson", lesson_order=1))
+    session.flush()
+    session.add(GestureCard(lesson_id=1, gesture_name="кот", gesture_image_url=""))
+    session.add_all([PracticeSession(user_id=1, lesson_id=1), PracticeSession(user_id=2, lesson_id=1)])
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _stored(db) -> list[int]:
+    db.expire_all()
+    return sorted(r.session_id for r in db.query(GestureDetection))
+
+
+def test_rows_are_written_in_batches(db):
+    async def main():
+        writer = DetectionWriter(flush_interval_s=60)
+        for session_id in (1, 2, 1):
+            writer.submit(session_id, 1, 0.9)
+        await writer.close()
+        return writer.stats()
+
+    stats = asyncio.run(main())
+    assert stats["written"] == 3 and stats["failed"] == 0
+    assert _stored(db) == [1, 1, 2]
+
+
+def test_bad_rows_only_fail_their_session(db):
+    async def main():
+        writer = DetectionWriter(flush_interval_s=60, max_attempts=2)
+        writer.submit(1, 1, 0.9)
+        writer.submit(2, None, 0.8)  # violates NOT NULL
+        writer.submit(1, 1, 0.7)
+        await writer.flush()
+        after_first = writer.stats()
+        await writer.flush()
+        return after_first, writer.stats()
+
+    after_first, stats = asyncio.run(main())
+    assert after_first == {"pending": 1, "written": 2, "dropped": 0, "failed": 0}
+    assert stats == {"pending": 0, "written": 2, "dropped": 0, "failed": 1}
+    assert _stored(db) == [1, 1]
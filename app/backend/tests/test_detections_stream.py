@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import deps
+from api.app import app
+from api.routes.detections import STREAM_MAX_LINE_BYTES
+from db import Base, engine, get_session
+from db.models import GestureCard, GestureDetection, Lesson, PracticeSession, User
+
+
+class _User:
+    user_id = 1
+
+
+@pytest.fixture
+def client():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db = get_session()
+    db.add(User(telegram_id=1, username="a"))
+    db.add(Lesson(title="lesson", lesson_order=1))
+    db.flush()
+    db.add(GestureCard(lesson_id=1, gesture_name="кот", gesture_image_url=""))
+    db.add(PracticeSession(user_id=1, lesson_id=1))
+    db.commit()
+    db.close()
+
+    app.dependency_overrides[deps.get_current_user] = lambda: _User()
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _line(**fields) -> str:
+    return json.dumps({"session_id": 1, "gesture_card_id": 1, "detection_accuracy": 0.5, **fields})
+
+
+def _count() -> int:
+    db = get_session()
+    try:
+        return db.query(GestureDetection).count()
+    finally:
+        db.close()
+
+
+def test_stream_inserts_every_line(client):
+    body = "\n".join(_line() for _ in range(3)) + "\n\n"
+    r = client.post("/api/v1/detections/stream", content=body)
+    assert r.status_code == 200 and r.json() == {"inserted": 3}
+    assert _count() == 3
+
+
+def test_stream_rejects_an_invalid_line(client):
+    body = _line() + "\n" + json.dumps({"session_id": 1}) + "\n"
+    r = client.post("/api/v1/detections/stream", content=body)
+    assert r.status_code == 422 and "Line 2" in r.json()["detail"]
+    assert _count() == 0
+
+
+def test_stream_refuses_a_body_without_newlines(client):
+    def body():
+        for _ in range(16):
+            yield b"x" * 1024
+
+    r = client.post("/api/v1/detections/stream", content=body())
+    assert r.status_code == 413
+    assert _count() == 0
+
+
+def test_stream_refuses_an_overlong_line(client):
+    body = _line() + "\n" + " " * (STREAM_MAX_LINE_BYTES + 1) + _line() + "\n"
+    r = client.post("/api/v1/detections/stream", content=body)
+    assert r.status_code == 413 and "Line 2" in r.json()["detail"]
@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.backend.ml.easy_sign.frames import (
+    FRAME_HEADER,
+    KIND_ENCODED,
+    KIND_RAW_BGR,
+    KIND_RAW_RGBA,
+    decode_frame_bytes_bgr224,
+    pack_frame,
+    parse_frame_header,
+)
+
+
+def test_header_round_trip():
+    message = pack_frame(b"abc", seq=7, ts_ms=1234.5, kind=KIND_RAW_BGR, width=640, height=480)
+    header = parse_frame_header(message)
+    assert (header.version, header.kind, header.width, header.height, header.seq, header.ts_ms) == (
+        1, KIND_RAW_BGR, 640, 480, 7, 1234.5
+    )
+    assert message[FRAME_HEADER.size:] == b"abc"
+
+
+def test_short_message_is_rejected():
+    with pytest.raises(ValueError):
+        parse_frame_header(b"\x01\x01")
+
+
+def test_unknown_version_is_rejected():
+    message = bytearray(pack_frame(b"", seq=1, ts_ms=0.0))
+    message[0] = 2
+    with pytest.raises(ValueError):
+        parse_frame_header(bytes(message))
+
+
+def test_raw_frame_of_the_wrong_size_is_rejected():
+    message = pack_frame(bytes(10), seq=1, ts_ms=0.0, kind=KIND_RAW_BGR, width=4, height=4)
+    with pytest.raises(ValueError):
+        decode_frame_bytes_bgr224(message, size=8)
+
+
+def test_raw_rgba_frame_is_converted_to_bgr():
+    rgba = np.zeros((4, 4, 4), dtype=np.uint8)
+    rgba[..., 0] = 255  # red
+    message = pack_frame(rgba.tobytes(), seq=1, ts_ms=0.0, kind=KIND_RAW_RGBA, width=4, height=4)
+    frame = decode_frame_bytes_bgr224(message, size=8)
+    assert frame.shape == (8, 8, 3)
+    assert tuple(frame[0, 0]) == (0, 0, 255)
+
+
+def test_encoded_frame_is_resized():
+    ok, jpg = cv2.imencode(".jpg", np.full((48, 64, 3), 128, dtype=np.uint8))
+    assert ok
+    message = pack_frame(jpg.tobytes(), seq=1, ts_ms=0.0, kind=KIND_ENCODED)
+    frame = decode_frame_bytes_bgr224(message, size=16)
+    assert frame.shape == (16, 16, 3)
+    assert abs(int(frame[8, 8, 0]) - 128) < 8
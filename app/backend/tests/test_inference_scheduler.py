@@ -0,0 +1,106 @@
+import asyncio
+
+import numpy as np
+
+from app.backend.api.inference import InferenceScheduler
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+
+
+class FakeBackend:
+    """
+    Scores a clip as its first value; clips holding a negative value fail
+    every batch they are in.
+    """
+
+    max_inflight = 1
+
+    def __init__(self):
+        self.batches = []
+
+    async def predict_batch(self, clips, subsets, timings=None):
+        values = [float(np.asarray(c).flat[0]) for c in clips]
+        self.batches.append(values)
+        if any(v < 0 for v in values):
+            raise ValueError("bad clip")
+        return [{"value": v} for v in values]
+
+    async def close(self):
+        pass
+
+
+def _clip(value: float) -> np.ndarray:
+    return np.full((1, 1), value, dtype=np.float32)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_clips_share_a_batch():
+    async def main():
+        backend = FakeBackend()
+        scheduler = InferenceScheduler(backend, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(*[scheduler.predict(_clip(i)) for i in range(6)])
+        await scheduler.close()
+        return backend, results
+
+    backend, results = _run(main())
+    assert [r["value"] for r in results] == [0, 1, 2, 3, 4, 5]
+    assert [len(b) for b in backend.batches] == [4, 2]
+
+
+def test_failing_clip_fails_only_its_caller():
+    async def main():
+        backend = FakeBackend()
+        scheduler = InferenceScheduler(backend, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(
+            *[scheduler.predict(_clip(v)) for v in (1, -1, 3)], return_exceptions=True
+        )
+        await scheduler.close()
+        return backend, results
+
+    backend, results = _run(main())
+    assert results[0] == {"value": 1}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"value": 3}
+    # The whole batch once, then each clip on its own.
+    assert backend.batches == [[1, -1, 3], [1], [-1], [3]]
+
+
+def test_single_clip_failure_is_not_retried():
+    async def main():
+        backend = FakeBackend()
+        scheduler = InferenceScheduler(backend, max_batch_size=4, max_wait_ms=0)
+        try:
+            await scheduler.predict(_clip(-1))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected the clip to fail")
+        await scheduler.close()
+        return backend
+
+    assert _run(main()).batches == [[-1]]
+
+
+def test_buffer_is_held_until_its_batch_finishes():
+    class SlowBackend(FakeBackend):
+        async def predict_batch(self, clips, subsets, timings=None):
+            await asyncio.sleep(0.05)
+            return [{"value": 0} for _ in clips]
+
+    async def main():
+        scheduler = InferenceScheduler(SlowBackend(), max_batch_size=2, max_wait_ms=0)
+        buf = ClipBuffer(window_size=2, size=4)
+        buf.append(np.zeros((4, 4, 3), dtype=np.uint8))
+        task = asyncio.ensure_future(scheduler.predict(buf))
+        await asyncio.sleep(0.01)
+        buf.release()
+        released_early = buf._ring is None
+        await task
+        await scheduler.close()
+        return released_early, buf
+
+    released_early, buf = _run(main())
+    assert not released_early
+    assert buf._ring is None and buf._holds == 0
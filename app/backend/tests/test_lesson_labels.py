@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from app.backend.api.lesson_labels import LessonLabelCache
+from app.backend.db import Base, engine, get_session
+from app.backend.db.models import GestureCard, Lesson
+
+LABELS = {0: "кот", 1: "собака", 2: "дом"}
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = get_session()
+    session.add(Lesson(title="lesson", lesson_order=1))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _add_card(db, name: str):
+    db.add(GestureCard(lesson_id=1, gesture_name=name, gesture_image_url=""))
+    db.commit()
+
+
+def test_lesson_without_cards_is_not_cached(db):
+    cache = LessonLabelCache(LABELS)
+    assert len(cache.get(1)) == 0
+    _add_card(db, "кот")
+    assert len(cache.get(1)) == 1
+
+
+def test_entries_expire(db):
+    cache = LessonLabelCache(LABELS, ttl_s=0.05)
+    _add_card(db, "кот")
+    assert len(cache.get(1)) == 1
+    _add_card(db, "собака")
+    assert len(cache.get(1)) == 1
+    time.sleep(0.06)
+    assert len(cache.get(1)) == 2
+
+
+def test_invalidate_drops_the_lesson(db):
+    cache = LessonLabelCache(LABELS)
+    _add_card(db, "кот")
+    cache.get(1)
+    _add_card(db, "дом")
+    cache.invalidate(1)
+    assert len(cache.get(1)) == 2
@@ -0,0 +1,116 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from db import Base, engine, get_session
+from db.backfill_progress import backfill
+from db.models import CardProgressDaily, GestureCard, GestureDetection, Lesson, PracticeSession, User
+from db.progress import add_detections_sync, aggregate
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = get_session()
+    for telegram_id in (1, 2):
+        session.add(User(telegram_id=telegram_id, username=f"u{telegram_id}"))
+    session.add(Lesson(title="lesson", lesson_order=1))
+    session.flush()
+    for name in ("a", "b", "c"):
+        session.add(GestureCard(lesson_id=1, gesture_name=name, gesture_image_url=""))
+    for user_id in (1, 1, 2):
+        session.add(PracticeSession(user_id=user_id, lesson_id=1))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _detections(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    start = datetime(2026, 3, 1, 22, 0)
+    return [
+        {
+            "session_id": rng.randint(1, 3),
+            "gesture_card_id": rng.randint(1, 3),
+            "detection_accuracy": round(rng.random(), 3),
+            "detected_at": start + timedelta(minutes=rng.randint(0, 3 * 24 * 60)),
+        }
+        for _ in range(n)
+    ]
+
+
+def _raw_scan(session) -> dict:
+    rows = session.execute(
+        select(PracticeSession.user_id, GestureDetection.gesture_card_id,
+               GestureDetection.detected_at, GestureDetection.detection_accuracy)
+        .join(PracticeSession, PracticeSession.session_id == GestureDetection.session_id)
+    ).all()
+    totals = {}
+    for user_id, card_id, detected_at, accuracy in rows:
+        n, acc_sum, best = totals.get((user_id, card_id, detected_at.date()), (0, 0.0, 0.0))
+        totals[(user_id, card_id, detected_at.date())] = (n + 1, acc_sum + accuracy, max(best, accuracy))
+    return totals
+
+
+def _rollup(session) -> dict:
+    return {
+        (r.user_id, r.gesture_card_id, r.day): (r.attempts, r.accuracy_sum, r.best_accuracy)
+        for r in session.execute(select(CardProgressDaily)).scalars()
+    }
+
+
+def _assert_same(rollup: dict, raw: dict):
+    assert rollup.keys() == raw.keys()
+    for key, (n, acc_sum, best) in raw.items():
+        assert rollup[key][0] == n
+        assert rollup[key][1] == pytest.approx(acc_sum)
+        assert rollup[key][2] == pytest.approx(best)
+
+
+def test_rollup_matches_raw_scan(db):
+    rows = _detections(500)
+    for i in range(0, len(rows), 64):
+        batch = rows[i:i + 64]
+        db.execute(insert(GestureDetection), batch)
+        add_detections_sync(db, batch)
+        db.commit()
+    _assert_same(_rollup(db), _raw_scan(db))
+
+
+def test_backfill_rebuilds_rollup(db):
+    db.execute(insert(GestureDetection), _detections(300, seed=1))
+    db.execute(insert(CardProgressDaily), [
+        {"user_id": 1, "gesture_card_id": 1, "day": date(2020, 1, 1),
+         "attempts": 99, "accuracy_sum": 1.0, "best_accuracy": 1.0},
+    ])
+    db.commit()
+
+    assert backfill(chunk=7) == 300
+    db.expire_all()
+    _assert_same(_rollup(db), _raw_scan(db))
+
+
+def test_backfill_leaves_nothing_when_there_are_no_detections(db):
+    db.execute(delete(GestureDetection))
+    db.commit()
+    assert backfill() == 0
+    assert _rollup(db) == {}
+
+
+def test_aggregate_buckets_aware_timestamps_by_utc_day():
+    moscow = timezone(timedelta(hours=3))
+    rows = [
+        {"session_id": 1, "gesture_card_id": 1, "detection_accuracy": 0.5,
+         "detected_at": datetime(2026, 3, 2, 1, 30, tzinfo=moscow)},
+        {"session_id": 1, "gesture_card_id": 1, "detection_accuracy": 0.7,
+         "detected_at": datetime(2026, 3, 1, 23, 0)},
+    ]
+    [value] = aggregate(rows, {1: 5})
+    assert value["day"] == date(2026, 3, 1)
+    assert value["attempts"] == 2
+    assert value["best_accuracy"] == 0.7
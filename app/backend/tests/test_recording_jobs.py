@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytest
+
+from app.backend.api.recording_jobs import RecordingJob, RecordingJobs
+from app.backend.db import Base, engine, get_session
+from app.backend.db.models import GestureCard, GestureDetection, Lesson, PracticeSession, User
+from app.backend.ml.easy_sign.clip_buffer import ClipBuffer
+
+
+class _Backend:
+    """
+    Stands in for the live inference backend; remembers what it was given.
+    """
+
+    def __init__(self):
+        self.buffers = []
+        self.batches = []
+
+    def new_buffer(self, window_size, size=224, dtype=np.float32):
+        buf = ClipBuffer(window_size, size, dtype=dtype)
+        self.buffers.append(buf)
+        return buf
+
+    async def predict_batch(self, clips, subsets, timings=None):
+        self.batches.append([c.clip()[0, 0, -1, 0, 0] for c in clips])
+        return [{"card_ids": [1], "confidence": [0.9]} for _ in clips]
+
+
+@pytest.fixture
+def video(tmp_path):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db = get_session()
+    db.add(User(telegram_id=1, username="a"))
+    db.add(Lesson(title="lesson", lesson_order=1))
+    db.flush()
+    db.add(GestureCard(lesson_id=1, gesture_name="кот", gesture_image_url=""))
+    db.add(PracticeSession(user_id=1, lesson_id=1))
+    db.commit()
+    db.close()
+
+    path = tmp_path / "attempt.avi"
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25, (32, 32))
+    for i in range(20):
+        out.write(np.full((32, 32, 3), i * 10, dtype=np.uint8))
+    out.release()
+    return path
+
+
+def test_windows_go_through_the_backend(video):
+    backend = _Backend()
+    jobs = RecordingJobs(backend, window_size=8, input_size=16, stride=4, batch_size=2)
+    job = RecordingJob(1, 1, None, video, datetime(2026, 1, 1))
+    asyncio.run(jobs._run(job))
+
+    assert job.status == "done" and job.windows == 4 and job.detections == 4
+    # Windows end on frames 8, 12, 16 and 20, two per backend call.
+    assert [len(b) for b in backend.batches] == [2, 2]
+    last = [round(float(v) * 255 / 10) for b in backend.batches for v in b]
+    assert last == [7, 11, 15, 19]
+    # The job's windows are released once it is done.
+    assert len(backend.buffers) == 2 and all(b._ring is None for b in backend.buffers)
+
+    db = get_session()
+    try:
+        assert db.query(GestureDetection).count() == 4
+    finally:
+        db.close()
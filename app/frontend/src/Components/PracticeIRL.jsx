@@ -3,6 +3,23 @@ import { useNavigate } from "react-router-dom";
 import "./../Styles/PracticeIRL.css";
 import logotype from "./../assets/logo.svg";
 
+// Бинарный протокол кадров: заголовок <BBHHId (version, kind, width, height, seq, ts_ms) + JPEG
+const FRAME_SUBPROTOCOL = "gestu.frames.v1";
+const FRAME_HEADER_SIZE = 18;
+
+const packFrame = (payload, seq, tsMs) => {
+  const out = new Uint8Array(FRAME_HEADER_SIZE + payload.byteLength);
+  const view = new DataView(out.buffer);
+  view.setUint8(0, 1);
+  view.setUint8(1, 1);
+  view.setUint16(2, 0, true);
+  view.setUint16(4, 0, true);
+  view.setUint32(6, seq >>> 0, true);
+  view.setFloat64(10, tsMs, true);
+  out.set(new Uint8Array(payload), FRAME_HEADER_SIZE);
+  return out.buffer;
+};
+
 const PracticeIRL = () => {
   const [hasCamera, setHasCamera] = useState(false);
   const [cameraError, setCameraError] = useState(null);
@@ -30,6 +47,19 @@ const PracticeIRL = () => {
   const wsSeqRef = useRef(0);
   const activeSeqRef = useRef(0);
 
+  // Параметры отправки, которые сервер присылает в сообщениях "rate"
+  const sendIntervalRef = useRef(40);
+  const jpegQualityRef = useRef(0.55);
+  const frameSizeRef = useRef(224);
+  const retryAfterRef = useRef(0);
+
+  const applyRate = (rate) => {
+    if (!rate) return;
+    if (typeof rate.fps === "number" && rate.fps > 0) sendIntervalRef.current = 1000 / rate.fps;
+    if (typeof rate.quality === "number") jpegQualityRef.current = rate.quality;
+    if (typeof rate.size === "number") frameSizeRef.current = rate.size;
+  };
+
   const navigate = useNavigate();
   const openMenu = () => navigate("/menu");
 
@@ -85,7 +115,8 @@ const PracticeIRL = () => {
     activeSeqRef.current = seq;
 
     const url = getWsUrl();
-    const ws = new WebSocket(url);
+    const ws = new WebSocket(url, [FRAME_SUBPROTOCOL]);
+    ws.binaryType = "arraybuffer";
     wsRef.current = ws;
 
     ws.onopen = () => {
@@ -101,7 +132,32 @@ const PracticeIRL = () => {
       if (activeSeqRef.current !== seq) return;
       try {
         const data = JSON.parse(event.data);
-        if (data?.type === "ping") return;
+        if (data?.type === "ping") {
+          ws.send(JSON.stringify({ type: "pong", ts: data.ts }));
+          return;
+        }
+        if (data?.type === "hello") {
+          applyRate(data.rate);
+          return;
+        }
+        if (data?.type === "rate") {
+          applyRate(data);
+          return;
+        }
+        if (data?.type === "error") {
+          console.warn("WS server error", data.reason);
+          return;
+        }
+        if (data?.type === "busy") {
+          if (data.status === "queued") {
+            setWsStatus("connecting");
+            setWsStatusText(`Сервер занят, вы в очереди (${data.position})`);
+          } else {
+            retryAfterRef.current = (data.retry_after_s || 5) * 1000;
+            setWsStatusText("Сервер перегружен, попробуем позже...");
+          }
+          return;
+        }
         if (typeof data?.word === "string") setGesture(data.word);
         if (typeof data?.confidence === "number") setConfidence(data.confidence);
       } catch {}
@@ -143,7 +199,12 @@ const PracticeIRL = () => {
       }
 
       const attempt = Math.min(reconnectAttemptRef.current, 5);
-      const delay = Math.min(500 * Math.pow(2, attempt), 10000);
+      let delay = Math.min(500 * Math.pow(2, attempt), 10000);
+      // 1013: сервер перегружен — ждём столько, сколько он попросил
+      if (e.code === 1013) {
+        delay = Math.max(delay, retryAfterRef.current);
+        retryAfterRef.current = 0;
+      }
 
       setWsStatus("connecting");
       setWsStatusText("Соединяем...");
@@ -259,6 +320,7 @@ const PracticeIRL = () => {
 
     let rafId;
     let lastSent = 0;
+    let frameSeq = 0;
 
     const sendFrame = (time) => {
       rafId = requestAnimationFrame(sendFrame);
@@ -267,16 +329,34 @@ const PracticeIRL = () => {
       const ws = wsRef.current;
       if (!ws || ws.readyState !== WebSocket.OPEN) return;
 
-      const SEND_INTERVAL_MS = 40; // Примерно 25 fps
-      if (time - lastSent < SEND_INTERVAL_MS) return;
+      // По умолчанию примерно 25 fps, дальше — сколько разрешит сервер
+      if (time - lastSent < sendIntervalRef.current) return;
 
       if (ws.bufferedAmount > 1_000_000) return;
       if (video.readyState < 2) return;
 
       lastSent = time;
 
-      ctx.drawImage(video, 0, 0, 224, 224);
-      const dataUrl = canvas.toDataURL("image/jpeg", 0.55);
+      const size = frameSizeRef.current;
+      if (canvas.width !== size) {
+        canvas.width = size;
+        canvas.height = size;
+      }
+      ctx.drawImage(video, 0, 0, size, size);
+      const quality = jpegQualityRef.current;
+
+      // Старый сервер не выбирает подпротокол — тогда остаёмся на JSON с data URL
+      if (ws.protocol === FRAME_SUBPROTOCOL) {
+        const seq = ++frameSeq;
+        canvas.toBlob(async (blob) => {
+          if (!blob || ws.readyState !== WebSocket.OPEN) return;
+          const payload = await blob.arrayBuffer();
+          ws.send(packFrame(payload, seq, Date.now()));
+        }, "image/jpeg", quality);
+        return;
+      }
+
+      const dataUrl = canvas.toDataURL("image/jpeg", quality);
 
       ws.send(JSON.stringify({ type: "frame", data: dataUrl }));
     };